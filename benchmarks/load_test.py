@@ -0,0 +1,420 @@
+# benchmarks/load_test.py
+"""Concurrent load test for conception and training
+
+Usage:
+    python benchmarks/load_test.py --workers 4 --clients 16 --duration 10
+    python benchmarks/load_test.py --workers 4 --saturate --max-clients 256 --json load.json
+
+Simulated clients run closed loops (issue an operation, wait for it,
+issue the next) against a fresh temporary directory. They are spread
+over --workers processes as threads, so the records directory is shared
+across processes the way it is in production. Each operation is drawn
+from --mix:
+
+    conceive   genetics.conceive_embryo, inherited once parents exist
+    batch      conceive_batch.conceive_many on --batch-size parent pairs
+    train      EmbryoSchool.train_embryo on an embryo built from a record
+
+Per level the report gives throughput (operations, conceptions and
+training days per second), latency percentiles per operation, error
+rates and filesystem contention:
+- the latency of a small atomic record write probed from the parent
+  while the load runs, compared with the idle baseline
+- the mean time spent in create_conception_record
+- block I/O and context switches of the workers
+
+--saturate doubles the number of clients until throughput stops
+growing, p99 latency exceeds --slo-ms or errors exceed --max-error-rate,
+and reports the last level before that point.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from pathlib import Path
+
+from synthetic import SyntheticEmbryo
+from run_benchmarks import git_commit, percentile, working_directory
+
+import conceive_batch
+import embryo_services
+import instrumentation
+import record_io
+
+LATENCY_PERCENTILES = (50, 90, 99, 99.9)
+DEFAULT_MIX = "conceive=6,batch=1,train=3"
+SEED_EMBRYOS = 64
+
+_worker = {}
+
+
+def parse_mix(text: str):
+    """'conceive=6,batch=1,train=3' -> ([names], [weights])"""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation in mix: {name}")
+        mix[name] = float(weight or 1)
+    return list(mix), list(mix.values())
+
+
+# -- operations ----------------------------------------------------------
+# Each takes (rng, known embryo IDs) and returns the work it did
+
+def op_conceive(rng, known):
+    genetics = embryo_services.genetics()
+    if len(known) >= 2 and rng.random() < 0.5:
+        embryo_id = genetics.conceive_embryo(*rng.sample(known, 2))
+    else:
+        embryo_id = genetics.conceive_embryo()
+    known.append(embryo_id)
+    return {"conceptions": 1}
+
+
+def op_batch(rng, known):
+    tasks = [(i, *rng.sample(known, 2)) for i in range(_worker["batch_size"])]
+    errors = 0
+    for result in conceive_batch.conceive_many(tasks):
+        if "error" in result:
+            errors += 1
+        else:
+            known.append(result["embryo_id"])
+    if errors:
+        raise RuntimeError(f"{errors} of {len(tasks)} batch conceptions failed")
+    return {"conceptions": len(tasks)}
+
+
+def op_train(rng, known):
+    genetics = embryo_services.genetics()
+    school = _worker["school"]
+    embryo_id = rng.choice(known)
+    record = genetics.load_conception_record(embryo_id)
+    embryo = SyntheticEmbryo(record["genetic_data"], embryo_id=embryo_id,
+                             development_stage=rng.uniform(0, 10))
+    ready = [name for name, plan in school.compiled_programs().items()
+             if plan.required_stage <= embryo.development_stage]
+    program = rng.choice(ready)
+    school.train_embryo(embryo, program)
+    return {"training_days": school.compiled_program(program).duration}
+
+
+OPERATIONS = {"conceive": op_conceive, "batch": op_batch, "train": op_train}
+
+
+# -- workers -------------------------------------------------------------
+
+def _init_worker(directory: str, batch_size: int):
+    os.chdir(directory)
+    _worker["batch_size"] = batch_size
+    _worker["school"] = embryo_services.school_module().EmbryoSchool()
+
+
+def _client(client_id, seed, known, names, weights, start, end, samples):
+    rng = random.Random(f"{seed}:{client_id}")
+    known = list(known)
+    while time.time() < end:
+        name = rng.choices(names, weights)[0]
+        t0 = time.perf_counter_ns()
+        began = time.time()
+        try:
+            work, error = OPERATIONS[name](rng, known), None
+        except Exception as e:
+            work, error = {}, type(e).__name__
+        if began >= start:
+            samples.append((name, time.perf_counter_ns() - t0, error, work))
+
+
+def _run_level(args):
+    """Worker task: run this process's share of clients for one level
+
+    Clients start at `go`; only operations begun after `start` are sampled.
+    """
+    first_client, clients, seed, known, names, weights, go, start, end = args
+    instrumentation.enable()
+    instrumentation.reset("load_test")
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    samples = []
+    threads = [threading.Thread(target=_client, args=(first_client + i, seed, known, names,
+                                                      weights, start, end, samples))
+               for i in range(clients)]
+    time.sleep(max(0.0, go - time.time()))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    after = resource.getrusage(resource.RUSAGE_SELF)
+    timers = instrumentation.stats()["timers"]
+    instrumentation.disable()
+    return {
+        "samples": samples,
+        "record_writes": timers.get("create_conception_record", {}),
+        "rusage": {
+            "cpu_s": (after.ru_utime + after.ru_stime) - (usage.ru_utime + usage.ru_stime),
+            "blocks_in": after.ru_inblock - usage.ru_inblock,
+            "blocks_out": after.ru_oublock - usage.ru_oublock,
+            "voluntary_switches": after.ru_nvcsw - usage.ru_nvcsw,
+            "involuntary_switches": after.ru_nivcsw - usage.ru_nivcsw
+        }
+    }
+
+
+# -- filesystem probe ----------------------------------------------------
+
+class WriteProbe:
+    """Time small atomic record writes in the load test directory"""
+
+    def __init__(self, directory: Path, interval: float = 0.05):
+        self.path = directory / "probe.json"
+        self.interval = interval
+        self.latencies = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def sample(self, n: int):
+        for _ in range(n):
+            self._write()
+        return self.summary()
+
+    def _write(self):
+        t0 = time.perf_counter_ns()
+        record_io.write(self.path, {"probe": time.time()})
+        self.latencies.append(time.perf_counter_ns() - t0)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._write()
+
+    def start(self) -> "WriteProbe":
+        self._thread = threading.Thread(target=self._run, name="write-probe", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.summary()
+
+    def summary(self):
+        latencies = sorted(self.latencies)
+        return {f"p{p}_us": percentile(latencies, p) / 1000 for p in (50, 99)}
+
+
+# -- driver --------------------------------------------------------------
+
+def _seed_population(n: int):
+    genetics = embryo_services.genetics()
+    ids = [genetics.conceive_embryo() for _ in range(n // 2)]
+    ids += [genetics.conceive_embryo(*random.sample(ids, 2)) for _ in range(n - n // 2)]
+    return ids
+
+
+def run_level(pool, workers: int, clients: int, duration: float, warmup: float,
+              mix, seed: int, known, directory: Path, idle_probe) -> dict:
+    names, weights = mix
+    go = time.time() + 0.5
+    start = go + warmup
+    end = start + duration
+    shares = [clients // workers + (1 if i < clients % workers else 0) for i in range(workers)]
+    tasks, first = [], 0
+    for share in shares:
+        if share:
+            tasks.append((first, share, seed, known, names, weights, go, start, end))
+            first += share
+
+    probe = WriteProbe(directory).start()
+    results = pool.map(_run_level, tasks)
+    probe_summary = probe.stop()
+    return summarize(clients, duration, results, probe_summary, idle_probe)
+
+
+def summarize(clients, duration, results, probe, idle_probe) -> dict:
+    latencies = defaultdict(list)
+    errors = defaultdict(Counter)
+    work = Counter()
+    for result in results:
+        for name, latency, error, done in result["samples"]:
+            latencies[name].append(latency)
+            if error:
+                errors[name][error] += 1
+            else:
+                work.update(done)
+    total = sum(len(v) for v in latencies.values())
+    failed = sum(sum(c.values()) for c in errors.values())
+
+    operations = {}
+    for name, values in sorted(latencies.items()):
+        values.sort()
+        operations[name] = {
+            "count": len(values),
+            "throughput_per_s": len(values) / duration,
+            "error_rate": sum(errors[name].values()) / len(values),
+            "errors": dict(errors[name]),
+            "latency_ms": dict(
+                {f"p{p}": percentile(values, p) / 1e6 for p in LATENCY_PERCENTILES},
+                max=values[-1] / 1e6
+            )
+        }
+    all_latencies = sorted(v for values in latencies.values() for v in values)
+
+    writes = [r["record_writes"] for r in results if r["record_writes"]]
+    write_count = sum(w["count"] for w in writes)
+    rusage = Counter()
+    for result in results:
+        rusage.update(result["rusage"])
+    return {
+        "clients": clients,
+        "duration_s": duration,
+        "operations_per_s": total / duration,
+        "conceptions_per_s": work["conceptions"] / duration,
+        "training_days_per_s": work["training_days"] / duration,
+        "error_rate": failed / total if total else 0.0,
+        "p99_ms": percentile(all_latencies, 99) / 1e6,
+        "operations": operations,
+        "filesystem": {
+            "probe_write_us": probe,
+            "idle_probe_write_us": idle_probe,
+            "probe_slowdown_p99": (probe["p99_us"] / idle_probe["p99_us"]
+                                   if idle_probe["p99_us"] else None),
+            "record_write_mean_us": (sum(w["total_ms"] for w in writes) * 1000 / write_count
+                                     if write_count else None),
+            "blocks_out": rusage["blocks_out"],
+            "blocks_in": rusage["blocks_in"],
+            "voluntary_switches": rusage["voluntary_switches"],
+            "cpu_utilization": rusage["cpu_s"] / duration
+        }
+    }
+
+
+def print_level(level: dict):
+    fs = level["filesystem"]
+    print(f"clients {level['clients']:5d}  {level['operations_per_s']:9.1f} ops/s"
+          f"  {level['conceptions_per_s']:9.1f} conceptions/s"
+          f"  {level['training_days_per_s']:8.1f} days/s"
+          f"  p99 {level['p99_ms']:8.1f} ms  errors {level['error_rate']:6.2%}"
+          f"  probe p99 x{fs['probe_slowdown_p99'] or 0:5.1f}", flush=True)
+    for name, op in level["operations"].items():
+        latency = op["latency_ms"]
+        print(f"    {name:9s} {op['throughput_per_s']:9.1f}/s  p50 {latency['p50']:8.2f}"
+              f"  p99 {latency['p99']:8.2f}  p99.9 {latency['p99.9']:8.2f} ms"
+              f"  errors {op['error_rate']:6.2%} {op['errors'] or ''}", flush=True)
+
+
+def find_saturation(levels, min_gain: float, slo_ms: float, max_error_rate: float):
+    """Index of the last level before throughput flattens or limits are broken"""
+    best = 0
+    for i, level in enumerate(levels):
+        if level["error_rate"] > max_error_rate or (slo_ms and level["p99_ms"] > slo_ms):
+            return best, "limits"
+        if i and level["operations_per_s"] < levels[best]["operations_per_s"] * (1 + min_gain):
+            return best, "throughput"
+        best = i
+    return best, None
+
+
+def run(workers: int, client_levels, duration: float, warmup: float, mix, seed: int,
+        batch_size: int, min_gain: float = 0.05, slo_ms: float = None,
+        max_error_rate: float = 0.01, saturate: bool = False) -> dict:
+    levels = []
+    with tempfile.TemporaryDirectory(prefix="embryo-load-") as tmp, working_directory(tmp):
+        directory = Path(tmp)
+        random.seed(seed)
+        known = _seed_population(SEED_EMBRYOS)
+        idle_probe = WriteProbe(directory).sample(200)
+        with multiprocessing.Pool(workers, initializer=_init_worker,
+                                  initargs=(tmp, batch_size)) as pool:
+            for clients in client_levels:
+                level = run_level(pool, workers, clients, duration, warmup, mix, seed,
+                                  known, directory, idle_probe)
+                levels.append(level)
+                print_level(level)
+                if saturate:
+                    index, reason = find_saturation(levels, min_gain, slo_ms, max_error_rate)
+                    if reason is not None:
+                        break
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(),
+            "workers": workers,
+            "mix": dict(zip(*mix)),
+            "batch_size": batch_size,
+            "seed": seed
+        },
+        "levels": levels
+    }
+    if saturate:
+        index, reason = find_saturation(levels, min_gain, slo_ms, max_error_rate)
+        report["saturation"] = {
+            "clients": levels[index]["clients"],
+            "operations_per_s": levels[index]["operations_per_s"],
+            "conceptions_per_s": levels[index]["conceptions_per_s"],
+            "training_days_per_s": levels[index]["training_days_per_s"],
+            "p99_ms": levels[index]["p99_ms"],
+            "stopped_by": reason or "max_clients"
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent load test for conception "
+                                                 "and training")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="client processes")
+    parser.add_argument("-c", "--clients", type=int, default=None,
+                        help="concurrent clients (default: one per worker)")
+    parser.add_argument("--duration", type=float, default=10.0,
+                        help="measured seconds per level")
+    parser.add_argument("--warmup", type=float, default=2.0,
+                        help="unmeasured seconds before each level")
+    parser.add_argument("--mix", default=DEFAULT_MIX,
+                        help=f"operation weights (default {DEFAULT_MIX})")
+    parser.add_argument("--batch-size", type=int, default=20,
+                        help="conceptions per batch operation")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--saturate", action="store_true",
+                        help="double clients until throughput saturates")
+    parser.add_argument("--max-clients", type=int, default=256)
+    parser.add_argument("--min-gain", type=float, default=0.05,
+                        help="throughput gain below which a level counts as saturated")
+    parser.add_argument("--slo-ms", type=float, help="p99 latency limit")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--json", help="write machine-readable results here")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    start_clients = args.clients or args.workers
+    if args.saturate:
+        levels = []
+        clients = start_clients
+        while clients <= args.max_clients:
+            levels.append(clients)
+            clients *= 2
+    else:
+        levels = [start_clients]
+
+    report = run(args.workers, levels, args.duration, args.warmup, mix, args.seed,
+                 args.batch_size, args.min_gain, args.slo_ms, args.max_error_rate,
+                 args.saturate)
+    if "saturation" in report:
+        s = report["saturation"]
+        print(f"saturation at {s['clients']} clients: {s['operations_per_s']:.1f} ops/s,"
+              f" {s['conceptions_per_s']:.1f} conceptions/s,"
+              f" {s['training_days_per_s']:.1f} training days/s,"
+              f" p99 {s['p99_ms']:.1f} ms (stopped by {s['stopped_by']})")
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+    failed = any(level["error_rate"] > args.max_error_rate for level in report["levels"])
+    sys.exit(1 if failed and not args.saturate else 0)
+
+
+if __name__ == "__main__":
+    main()
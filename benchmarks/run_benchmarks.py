@@ -0,0 +1,300 @@
+# benchmarks/run_benchmarks.py
+"""Benchmarks for conception, inheritance, training, curriculum and record I/O
+
+Usage:
+    python benchmarks/run_benchmarks.py --sizes 1k,100k --json results.json
+    python benchmarks/run_benchmarks.py compare base.json results.json
+
+Each hot path is timed per operation for latency percentiles and
+throughput, then re-run on a smaller sample under tracemalloc for peak
+memory (so allocation tracing does not skew the timings). Population
+sizes set the parent pool and record counts; the number of timed
+operations per benchmark is capped by --ops so 1M-embryo runs finish.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from synthetic import (REPO_DIR, SyntheticEmbryo, parse_size, reservoir,
+                       synthetic_population)
+
+import embryo_services
+
+PERCENTILES = (50, 90, 99)
+
+
+@contextmanager
+def working_directory(path):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def measure(operation, ops, memory_ops):
+    """Time `operation(i)` for ops calls, then trace peak memory on a sample"""
+    latencies = []
+    clock = time.perf_counter_ns
+    start = clock()
+    for i in range(ops):
+        t0 = clock()
+        operation(i)
+        latencies.append(clock() - t0)
+    total_s = (clock() - start) / 1e9
+
+    tracemalloc.start()
+    try:
+        for i in range(memory_ops):
+            operation(i)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "ops": ops,
+        "total_s": total_s,
+        "throughput_per_s": ops / total_s if total_s else 0.0,
+        "latency_us": dict(
+            {f"p{p}": percentile(latencies, p) / 1000 for p in PERCENTILES},
+            mean=sum(latencies) / len(latencies) / 1000 if latencies else 0.0,
+            max=latencies[-1] / 1000 if latencies else 0.0
+        ),
+        "peak_memory_bytes": peak
+    }
+
+
+# -- benchmarks ----------------------------------------------------------
+# Each takes (size, pool, ops) and returns the per-operation callable
+
+def bench_population(size, pool, ops):
+    """Stream the whole synthetic population once per operation batch"""
+    population = [synthetic_population(size, seed=size)]
+
+    def operation(i):
+        if next(population[0], None) is None:
+            population[0] = synthetic_population(size, seed=size)
+            next(population[0])
+    return operation, size
+
+
+def bench_generate_random(size, pool, ops):
+    genetics = embryo_services.genetics()
+    return lambda i: genetics.generate_genetic_data(), ops
+
+
+def bench_generate_inherited(size, pool, ops):
+    genetics = embryo_services.genetics()
+    rng = random.Random(1)
+    pairs = [(rng.choice(pool)["genetic_data"], rng.choice(pool)["genetic_data"])
+             for _ in range(min(ops, 10_000))]
+
+    def operation(i):
+        parent1, parent2 = pairs[i % len(pairs)]
+        genetics.generate_genetic_data(parent1, parent2)
+    return operation, ops
+
+
+def bench_determine_trait(size, pool, ops):
+    genetics = embryo_services.genetics()
+    handler = genetics.GeneticDominanceHandler()
+    rng = random.Random(2)
+    pairs = []
+    for _ in range(min(ops, 10_000)):
+        name = rng.choice(genetics.TRAIT_NAMES)
+        pairs.append((
+            genetics.GeneticTrait(name, rng.uniform(1.5, 3.0), rng.random() > 0.5, rng.random() < 0.1),
+            genetics.GeneticTrait(name, rng.uniform(1.5, 3.0), rng.random() > 0.5, rng.random() < 0.1),
+            name
+        ))
+
+    def operation(i):
+        trait1, trait2, name = pairs[i % len(pairs)]
+        handler.determine_trait(trait1, trait2, name)
+    return operation, ops
+
+
+def bench_train_embryo(size, pool, ops):
+    school = embryo_services.school_module().EmbryoSchool()
+    embryos = [SyntheticEmbryo(record["genetic_data"], record["embryo_id"])
+               for record in pool[:min(len(pool), 1000)]]
+    programs = list(school.training_programs)
+
+    def operation(i):
+        school.train_embryo(embryos[i % len(embryos)], programs[i % 3])
+    return operation, min(ops, 200)
+
+
+def bench_create_curriculum(size, pool, ops):
+    school = embryo_services.school_module().EmbryoSchool()
+    embryos = [SyntheticEmbryo(record["genetic_data"], record["embryo_id"])
+               for record in pool[:min(len(pool), 1000)]]
+    return lambda i: school.create_curriculum(embryos[i % len(embryos)]), ops
+
+
+def bench_record_write(size, pool, ops):
+    genetics = embryo_services.genetics()
+    # Records are never overwritten, and measure() replays the indices
+    ids = itertools.count()
+
+    def operation(i):
+        record = pool[i % len(pool)]
+        genetics.create_conception_record(f"{next(ids):08x}", record["genetic_data"])
+    return operation, min(ops, size)
+
+
+def bench_record_read(size, pool, ops):
+    import record_io
+    records_dir = Path("conception_records")
+    # Binary records are stored as .bin, so list records in every format
+    files = sorted(record_io.glob(records_dir, "conception_*"))
+    if not files:
+        raise RuntimeError(f"No conception records in {records_dir}; run record_io.write first")
+
+    def operation(i):
+        record_io.read(files[i % len(files)])
+    return operation, min(ops, len(files))
+
+
+def bench_monitoring_refresh(size, pool, ops):
+    """Headless part of a monitoring refresh: bounded series view + decimation"""
+    from timeseries_store import DevelopmentLogStore
+    from live_charts import MinMaxDecimator
+
+    store = DevelopmentLogStore.for_embryo("bench", ["pattern_recognition"])
+    if len(store) < size:
+        for i in range(len(store), size):
+            store.append(i * 60.0, i * 0.001, {"pattern_recognition": i % 97})
+
+    def operation(i):
+        view = store.query(max_points=4000)
+        decimator = MinMaxDecimator(800)
+        if view["resolution"] is None:
+            stages = view["samples"]["stage"]
+        else:
+            stages = [b["fields"]["stage"]["max"] for b in view["buckets"]]
+        decimator.extend(range(len(stages)), stages)
+    return operation, min(ops, 200)
+
+
+BENCHMARKS = {
+    "population_stream": bench_population,
+    "generate_genetic_data.random": bench_generate_random,
+    "generate_genetic_data.inherited": bench_generate_inherited,
+    "determine_trait": bench_determine_trait,
+    "train_embryo": bench_train_embryo,
+    "create_curriculum": bench_create_curriculum,
+    "record_io.write": bench_record_write,
+    "record_io.read": bench_record_read,
+    "monitoring_refresh": bench_monitoring_refresh,
+}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run(sizes, ops, memory_ops, only=None, pool_size=10_000):
+    results = []
+    for size in sizes:
+        pool = reservoir(synthetic_population(size, seed=size), min(size, pool_size))
+        with tempfile.TemporaryDirectory(prefix="embryo-bench-") as tmp, working_directory(tmp):
+            for name, factory in BENCHMARKS.items():
+                if only and name not in only:
+                    continue
+                operation, n_ops = factory(size, pool, ops)
+                result = measure(operation, n_ops, min(memory_ops, n_ops))
+                result.update(name=name, size=size)
+                results.append(result)
+                print(f"{name:34s} {size:>9,d}  {result['throughput_per_s']:12,.1f} ops/s"
+                      f"  p50 {result['latency_us']['p50']:9.1f} us"
+                      f"  p99 {result['latency_us']['p99']:9.1f} us"
+                      f"  peak {result['peak_memory_bytes'] / 1024:9.1f} KiB",
+                      flush=True)
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform()
+        },
+        "results": results
+    }
+
+
+def compare(base_file, new_file, threshold):
+    """Print throughput/latency ratios; return True if anything regressed"""
+    base = {(r["name"], r["size"]): r for r in json.loads(Path(base_file).read_text())["results"]}
+    new = {(r["name"], r["size"]): r for r in json.loads(Path(new_file).read_text())["results"]}
+    regressed = False
+    for key in sorted(base.keys() & new.keys()):
+        old_r, new_r = base[key], new[key]
+        speed = new_r["throughput_per_s"] / old_r["throughput_per_s"] if old_r["throughput_per_s"] else 0
+        p99 = new_r["latency_us"]["p99"] / old_r["latency_us"]["p99"] if old_r["latency_us"]["p99"] else 0
+        memory = (new_r["peak_memory_bytes"] / old_r["peak_memory_bytes"]
+                  if old_r["peak_memory_bytes"] else 0)
+        flag = ""
+        if speed < 1 - threshold or p99 > 1 + threshold:
+            flag = "  REGRESSION"
+            regressed = True
+        print(f"{key[0]:34s} {key[1]:>9,d}  throughput x{speed:5.2f}  p99 x{p99:5.2f}"
+              f"  peak memory x{memory:5.2f}{flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embryo genetics benchmarks")
+    sub = parser.add_subparsers(dest="command")
+
+    compare_parser = sub.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--threshold", type=float, default=0.10,
+                                help="relative slowdown reported as a regression")
+
+    parser.add_argument("--sizes", default="1k,100k",
+                        help="comma separated population sizes, e.g. 1k,100k,1m")
+    parser.add_argument("--ops", type=int, default=2000,
+                        help="maximum timed operations per benchmark")
+    parser.add_argument("--memory-ops", type=int, default=200,
+                        help="operations traced for peak memory")
+    parser.add_argument("--only", help="comma separated benchmark names")
+    parser.add_argument("--json", help="write machine-readable results here")
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        sys.exit(1 if compare(args.base, args.new, args.threshold) else 0)
+
+    sizes = [parse_size(s) for s in args.sizes.split(",")]
+    only = set(args.only.split(",")) if args.only else None
+    report = run(sizes, args.ops, args.memory_ops, only)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# benchmarks/startup_benchmark.py
+"""Cold-start benchmark for the embryo manager UI
+
+Each scenario runs in a fresh interpreter so nothing is cached between
+runs. "eager" imports what the UI used to pull in at startup (matplotlib,
+the TkAgg backend and NumPy); "lazy" imports the UI module as it is now.
+With a display available, "first_paint" also builds the window and waits
+for its first idle cycle.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+
+LOAD_UI = """
+import importlib.util
+spec = importlib.util.spec_from_file_location("embryo_manager_ui", "embryo-manager-ui.py")
+ui = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(ui)
+"""
+
+SCENARIOS = {
+    "eager": """
+import tkinter
+import numpy
+import matplotlib.pyplot
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+""" + LOAD_UI,
+    "lazy": LOAD_UI,
+    "first_paint": LOAD_UI + """
+root = ui.tk.Tk()
+app = ui.EmbryoManagerUI(root)
+root.update()
+root.destroy()
+""",
+}
+
+TIMED = """
+import time
+_start = time.perf_counter()
+{body}
+print(time.perf_counter() - _start)
+"""
+
+
+def run_scenario(name, runs):
+    """Return in-process and whole-process timings for one scenario"""
+    code = TIMED.format(body=SCENARIOS[name])
+    in_process, wall = [], []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, "-c", code], cwd=REPO_DIR,
+                                capture_output=True, text=True)
+        elapsed = time.perf_counter() - start
+        if result.returncode != 0:
+            return {"error": result.stderr.strip().splitlines()[-1]}
+        in_process.append(float(result.stdout.strip().splitlines()[-1]))
+        wall.append(elapsed)
+    return {
+        "runs": runs,
+        "import_median_s": statistics.median(in_process),
+        "import_min_s": min(in_process),
+        "process_median_s": statistics.median(wall),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    names = ["eager", "lazy"]
+    if os.environ.get("DISPLAY") or sys.platform in ("win32", "darwin"):
+        names.append("first_paint")
+
+    results = {name: run_scenario(name, args.runs) for name in names}
+
+    for name, result in results.items():
+        if "error" in result:
+            print(f"{name:12s} failed: {result['error']}")
+        else:
+            print(f"{name:12s} import {result['import_median_s'] * 1000:8.1f} ms"
+                  f"   process {result['process_median_s'] * 1000:8.1f} ms")
+    if "error" not in results["eager"] and "error" not in results["lazy"]:
+        saved = results["eager"]["import_median_s"] - results["lazy"]["import_median_s"]
+        print(f"lazy startup saves {saved * 1000:.1f} ms")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
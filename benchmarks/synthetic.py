@@ -0,0 +1,116 @@
+# benchmarks/synthetic.py
+"""Synthetic populations and embryos for benchmarks and load tests"""
+import random
+import sys
+import uuid
+from pathlib import Path
+from typing import Dict, Any, Iterator
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+if str(REPO_DIR) not in sys.path:
+    sys.path.insert(0, str(REPO_DIR))
+
+import embryo_services
+
+SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+
+def parse_size(text: str) -> int:
+    """Parse '1k', '100k', '1m' or a plain integer"""
+    text = text.strip().lower()
+    if text in SIZES:
+        return SIZES[text]
+    if text.endswith("k"):
+        return int(float(text[:-1]) * 1_000)
+    if text.endswith("m"):
+        return int(float(text[:-1]) * 1_000_000)
+    return int(text)
+
+
+def synthetic_genetic_data(rng: random.Random, generation: int = 0) -> Dict[str, Any]:
+    """Cheap genetic data with the same shape as generate_genetic_data output"""
+    genetics = embryo_services.genetics()
+    return {
+        "combined_traits": {
+            name: round(rng.uniform(1.5, 3.0), 2) for name in genetics.TRAIT_NAMES
+        },
+        "specializations": rng.sample(genetics.SPECIALIZATIONS, k=rng.randint(2, 4)),
+        "potential_capabilities": {
+            name: round(rng.uniform(2.0, 3.0), 2) for name in genetics.CAPABILITIES
+        },
+        "growth_rate": round(rng.uniform(0.1, 0.2), 2),
+        "dna_information": {
+            "generation": generation,
+            "trait_sequences": {
+                name: [rng.randint(0, 3) for _ in range(8)]
+                for name in genetics.TRAIT_NAMES
+            }
+        }
+    }
+
+
+def synthetic_population(size: int, seed: int = 0) -> Iterator[Dict[str, Any]]:
+    """Yield `size` conception records without holding them all in memory"""
+    rng = random.Random(seed)
+    for i in range(size):
+        yield {
+            "embryo_id": f"{i:08x}",
+            "conception_time": None,
+            "genetic_data": synthetic_genetic_data(rng, generation=i % 8),
+            "parentage": None
+        }
+
+
+def reservoir(records: Iterator[Dict[str, Any]], k: int, seed: int = 0):
+    """Uniform sample of k records from a stream"""
+    rng = random.Random(seed)
+    sample = []
+    for i, record in enumerate(records):
+        if i < k:
+            sample.append(record)
+        else:
+            j = rng.randint(0, i)
+            if j < k:
+                sample[j] = record
+    return sample
+
+
+class SyntheticEmbryo:
+    """In-memory embryo exposing the interface EmbryoSchool relies on"""
+
+    def __init__(self, genetic_data: Dict[str, Any] = None, embryo_id: str = None,
+                 development_stage: float = 0.0, seed: int = None):
+        rng = random.Random(seed)
+        genetic_data = genetic_data or synthetic_genetic_data(rng)
+        self.embryo_id = embryo_id or str(uuid.UUID(int=rng.getrandbits(128)))[:8]
+        self.traits = dict(genetic_data["combined_traits"])
+        self.specializations = list(genetic_data["specializations"])
+        self.potential_capabilities = dict(genetic_data["potential_capabilities"])
+        self.growth_rate = genetic_data["growth_rate"]
+        self.development_stage = development_stage
+        self.age = 0
+        self.experiences = []
+        self.neural_connections = {name: 10.0 * value for name, value in self.traits.items()}
+
+    def learn_from_experience(self, experience: Dict[str, Any]) -> Dict[str, Any]:
+        capacity = self.traits.get("learning_capacity", 2.0)
+        quality = min(1.0, capacity / 3.0 * (1.2 - experience["complexity"] / 2))
+        self.experiences.append(experience["type"])
+        for name in self.neural_connections:
+            self.neural_connections[name] += quality * self.growth_rate
+        return {"processing_quality": quality, "experience_type": experience["type"]}
+
+    def develop(self):
+        self.age += 1
+        self.development_stage += self.growth_rate
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "embryo_id": self.embryo_id,
+            "development_stage": self.development_stage,
+            "age": self.age,
+            "experiences_count": len(self.experiences),
+            "specializations": list(self.specializations),
+            "neural_connections": dict(self.neural_connections),
+            "potential_capabilities": dict(self.potential_capabilities)
+        }
@@ -0,0 +1,233 @@
+# conceive_batch.py
+"""Conceive many embryos in one process
+
+Examples:
+    python conceive_batch.py -n 10000 --workers 8 --seed 42 --progress
+    python conceive_batch.py --pairs pairs.txt --format jsonl -o children.jsonl
+
+A pairs file holds one "parent1_id parent2_id" pair per line (comma or
+whitespace separated, '#' starts a comment) or a JSON list of pairs.
+Records are written to the record store as each embryo is conceived;
+an embryo whose ID already has a record is reported as an error instead
+of overwriting it. Modules are loaded once per worker instead of once per embryo. With
+--shared-table the existing population is loaded once into shared
+memory and workers read parents from it instead of from their records.
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+
+import embryo_services
+import instrumentation
+import population_table
+
+_worker_options: Dict[str, Any] = {}
+
+
+def _init_worker(seed: Optional[int], records_dir: str, table_handle=None,
+                 instrument: bool = False):
+    """Load the genetics module once and remember run options"""
+    _worker_options.update(seed=seed, records_dir=records_dir, table=None,
+                           instrument=instrument)
+    instrumentation.init_worker(instrument)
+    if table_handle is not None:
+        _worker_options["table"] = population_table.PopulationTable.open_handle(table_handle)
+    embryo_services.genetics()
+
+
+def _shared_parents(parent1_id, parent2_id):
+    table = _worker_options.get("table")
+    if table is None or not (parent1_id and parent2_id):
+        return None
+    parents = (table.genetic_data(parent1_id), table.genetic_data(parent2_id))
+    return parents if all(parents) else None
+
+
+def _conceive_task(task: Tuple[int, Optional[str], Optional[str]]) -> Dict[str, Any]:
+    """Conceive one embryo; with a shared table the child's genetic data is returned too"""
+    index, parent1_id, parent2_id = task
+    genetics = embryo_services.genetics()
+    seed = _worker_options.get("seed")
+    embryo_id = rng = None
+    if seed is not None:
+        # Seed per embryo so results do not depend on worker scheduling; a
+        # private generator leaves the caller's global random state alone.
+        # The parents are part of the seed so runs over different pairs
+        # files do not draw the same IDs.
+        rng = random.Random(f"{seed}:{index}:{parent1_id}:{parent2_id}")
+        embryo_id = f"{rng.getrandbits(32):08x}"
+
+    result = {"index": index, "embryo_id": embryo_id,
+              "parent1_id": parent1_id, "parent2_id": parent2_id}
+    try:
+        result["embryo_id"] = genetics.conceive_embryo(
+            parent1_id, parent2_id, embryo_id, _worker_options["records_dir"],
+            _shared_parents(parent1_id, parent2_id), rng)
+        if _worker_options.get("table") is not None:
+            # Just written, so this is a record cache hit
+            result["genetic_data"] = genetics.load_conception_record(
+                result["embryo_id"], _worker_options["records_dir"])["genetic_data"]
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    if _worker_options.get("instrument"):
+        # Handed back to the parent, which merges it into its own run
+        result["instrumentation"] = instrumentation.drain()
+    return result
+
+
+def read_pairs(pairs_file) -> List[Tuple[str, str]]:
+    """Read parent pairs from a text or JSON file"""
+    text = Path(pairs_file).read_text()
+    if text.lstrip().startswith("["):
+        pairs = [tuple(pair) for pair in json.loads(text)]
+    else:
+        pairs = []
+        for line in text.splitlines():
+            line = line.split("#", 1)[0].replace(",", " ").split()
+            if line:
+                pairs.append(tuple(line))
+    for pair in pairs:
+        if len(pair) != 2:
+            raise ValueError(f"Expected two parent IDs per pair, got {list(pair)}")
+    return pairs
+
+
+def conceive_many(tasks: List[Tuple[int, Optional[str], Optional[str]]], workers: int = 1,
+                  seed: int = None, records_dir="conception_records",
+                  chunksize: int = 64, table=None) -> Iterator[Dict[str, Any]]:
+    """Yield conception results in task order as they complete
+
+    With a writable population table, parents are read from it and each
+    child is appended to it, so later pairs can breed from earlier children.
+    """
+    if workers <= 1:
+        _worker_options.update(seed=seed, records_dir=str(records_dir), instrument=False)
+        embryo_services.genetics()
+        # This process is the writer; read parents straight from its table
+        _worker_options["table"] = table
+        try:
+            if table is None:
+                embryo_services.genetics().prefetch_parents(
+                    [(p1, p2) for _, p1, p2 in tasks], records_dir)
+            for task in tasks:
+                yield _publish(table, _conceive_task(task))
+        finally:
+            _worker_options["table"] = None
+        return
+
+    with multiprocessing.Pool(workers, initializer=_init_worker,
+                              initargs=(seed, str(records_dir),
+                                        table.handle if table is not None else None,
+                                        instrumentation.is_enabled())) as pool:
+        for result in pool.imap(_conceive_task, tasks, chunksize=chunksize):
+            yield _publish(table, result)
+
+
+def _publish(table, result: Dict[str, Any]) -> Dict[str, Any]:
+    """Append a child to the shared table and drop its genetic data from the result"""
+    instrumentation.merge(result.pop("instrumentation", None))
+    genetic_data = result.pop("genetic_data", None)
+    if table is not None and genetic_data is not None:
+        try:
+            table.append(result["embryo_id"], genetic_data)
+        except ValueError as e:
+            print(f"Warning: {result['embryo_id']} not added to the shared table: {e}",
+                  file=sys.stderr)
+    return result
+
+
+class ResultWriter:
+    """Stream results in the requested output format"""
+
+    def __init__(self, stream, fmt: str):
+        self.stream = stream
+        self.fmt = fmt
+        self.first = True
+        if fmt == "csv":
+            self.csv = csv.writer(stream)
+            self.csv.writerow(["index", "embryo_id", "parent1_id", "parent2_id", "error"])
+        elif fmt == "json":
+            stream.write("[")
+
+    def write(self, result: Dict[str, Any]):
+        if self.fmt == "ids":
+            if "error" not in result:
+                self.stream.write(result["embryo_id"] + "\n")
+        elif self.fmt == "jsonl":
+            self.stream.write(json.dumps(result) + "\n")
+        elif self.fmt == "json":
+            self.stream.write(("\n  " if self.first else ",\n  ") + json.dumps(result))
+        elif self.fmt == "csv":
+            self.csv.writerow([result["index"], result["embryo_id"], result["parent1_id"] or "",
+                               result["parent2_id"] or "", result.get("error", "")])
+        self.first = False
+
+    def close(self):
+        if self.fmt == "json":
+            self.stream.write("\n]\n" if not self.first else "]\n")
+        self.stream.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Conceive embryos in bulk")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("-n", "--count", type=int, help="number of random embryos")
+    source.add_argument("--pairs", help="file of parent ID pairs to breed")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="worker processes (default 1, in-process)")
+    parser.add_argument("--seed", type=int, help="seed for reproducible embryos and IDs")
+    parser.add_argument("--format", choices=["ids", "jsonl", "json", "csv"], default="ids")
+    parser.add_argument("-o", "--output", help="write results here instead of stdout")
+    parser.add_argument("--records-dir", default="conception_records")
+    parser.add_argument("--progress", action="store_true", help="report progress on stderr")
+    parser.add_argument("--shared-table", action="store_true",
+                        help="load parents once into shared memory for all workers")
+    args = parser.parse_args(argv)
+
+    if args.pairs:
+        tasks = [(i, p1, p2) for i, (p1, p2) in enumerate(read_pairs(args.pairs))]
+    else:
+        tasks = [(i, None, None) for i in range(args.count)]
+
+    table = None
+    if args.shared_table and args.pairs:
+        table = population_table.PopulationTable.from_records_dir(args.records_dir,
+                                                                  reserve=len(tasks))
+
+    stream = open(args.output, "w", newline="") if args.output else sys.stdout
+    writer = ResultWriter(stream, args.format)
+    errors = 0
+    start = last_report = time.monotonic()
+    try:
+        for done, result in enumerate(conceive_many(tasks, args.workers, args.seed,
+                                                    args.records_dir,
+                                                    table=table), 1):
+            writer.write(result)
+            if "error" in result:
+                errors += 1
+            now = time.monotonic()
+            if args.progress and (now - last_report >= 0.5 or done == len(tasks)):
+                last_report = now
+                rate = done / (now - start) if now > start else 0.0
+                print(f"\r{done}/{len(tasks)} embryos  {rate:,.0f}/s  {errors} errors",
+                      end="", file=sys.stderr, flush=True)
+    finally:
+        writer.close()
+        if args.output:
+            stream.close()
+        if table is not None:
+            table.close()
+            table.unlink()
+        if args.progress:
+            print(file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,15 +5,33 @@ from pathlib import Path
 import random
 from datetime import datetime
 import sys
-import importlib.util
+import queue
+import threading
+import time
 from typing import Dict, List, Any
 from embryo_manager_extensions import EmbryoManagerExtensions
+from embryo_services import CreationJob, EmbryoServices
+from fs_watch import DELETED, RESCAN, DirectoryWatcher
+from readiness_tracker import ReadinessTracker
+import record_io
+
+# Directories whose changes are pushed into the catalogue and monitoring views
+WATCHED_DIRS = ("embryos", "conception_records", "training_logs", "development_logs")
+# Seconds between repeated directory watch error dialogs
+WATCH_ERROR_INTERVAL = 60.0
 class EmbryoManagerUI:
     def __init__(self, root):
         self.root = root
         self.root.title("Embryo Management System")
         self.root.geometry("1200x800")
         
+        # Modules, school and loaded embryos live for the whole session
+        self.services = EmbryoServices()
+        
+        # Announce programs an embryo becomes eligible for while it trains
+        self.readiness = ReadinessTracker(self.services.school)
+        self.readiness.add_listener(self.on_readiness_event)
+        
         # Create main notebook for tabs
         self.notebook = ttk.Notebook(root)
         self.notebook.pack(expand=True, fill='both', padx=5, pady=5)
@@ -32,8 +50,23 @@ class EmbryoManagerUI:
         self.setup_training_tab()
         self.setup_monitoring_tab()
         
-        # Load existing embryos
-        self.load_existing_embryos()
+        # Extensions are built once; refreshes only update their widgets
+        self.extensions = EmbryoManagerExtensions(self)
+        
+        # Embryo catalogue, filled in the background once the window is up
+        self.embryo_index = {}
+        self.embryo_files = set()
+        self.catalogue_queue = None
+        self.root.after_idle(self.load_existing_embryos)
+        
+        # Follow files written by other processes instead of rescanning
+        self.change_queue = queue.Queue()
+        self.refresh_failed_for = None
+        self.watch_error_shown = None
+        self.watcher = DirectoryWatcher(WATCHED_DIRS, self.on_directory_changes,
+                                        on_error=self.on_watch_error).start()
+        self.root.after(200, self._drain_changes)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
     def setup_creation_tab(self):
         # Left panel for creation options
@@ -62,9 +95,24 @@ class EmbryoManagerUI:
         self.parent2_combo = ttk.Combobox(self.parent_frame, textvariable=self.parent2_var)
         self.parent2_combo.pack(pady=5)
         
+        # Number of embryos to create in one job
+        ttk.Label(left_panel, text="Count:").pack()
+        self.creation_count = tk.IntVar(value=1)
+        ttk.Spinbox(left_panel, from_=1, to=100000, textvariable=self.creation_count,
+                   width=10).pack(pady=5)
+        
         # Create button
-        ttk.Button(left_panel, text="Create Embryo", 
-                  command=self.create_embryo).pack(pady=20)
+        self.create_button = ttk.Button(left_panel, text="Create Embryo", 
+                                       command=self.create_embryo)
+        self.create_button.pack(pady=(20, 5))
+        self.cancel_button = ttk.Button(left_panel, text="Cancel", state='disabled',
+                                       command=self.cancel_creation)
+        self.cancel_button.pack()
+        self.creation_status = ttk.Label(left_panel, text="")
+        self.creation_status.pack(pady=5)
+        self.creation_job = None
+        self.creation_errors = []
+        self.last_created_id = None
         
         # Right panel for embryo list
         right_panel = ttk.LabelFrame(self.creation_tab, text="Existing Embryos")
@@ -148,67 +196,329 @@ class EmbryoManagerUI:
         self.stats_tree.pack(fill='both', expand=True)
         
     def load_existing_embryos(self):
-        """Load existing embryos from the embryos directory"""
+        """Load existing embryos from the embryos directory without blocking the UI"""
+        known = set(self.embryo_index)
+        # Each scan reports on its own queue; starting a new one supersedes the last
+        self.catalogue_queue = scan_queue = queue.Queue()
+        threading.Thread(target=self._scan_embryos, args=(known, scan_queue),
+                         daemon=True).start()
+        self.root.after(50, self._drain_catalogue, scan_queue)
+    
+    def _scan_embryos(self, known, scan_queue, batch_size=200):
+        """Collect catalogue rows for embryos not in the index (worker thread)"""
+        rows = []
+        found = set()
+        complete = False
         embryo_dir = Path("embryos")
-        if not embryo_dir.exists():
+        try:
+            if embryo_dir.exists():
+                for embryo_file in embryo_dir.glob("embryo_*.py"):
+                    if scan_queue is not self.catalogue_queue:
+                        return
+                    embryo_id = embryo_file.stem.split('_')[1]
+                    found.add(embryo_id)
+                    if embryo_id in known:
+                        continue
+                    rows.append(self._catalogue_row(embryo_file, embryo_id))
+                    if len(rows) >= batch_size:
+                        scan_queue.put(rows)
+                        rows = []
+            if rows:
+                scan_queue.put(rows)
+            complete = True
+        finally:
+            # A finished scan ends with the IDs of every embryo file it saw
+            scan_queue.put(found if complete else None)
+    
+    def _catalogue_row(self, embryo_file, embryo_id):
+        """Build the list row for one embryo file"""
+        creation_time = datetime.fromtimestamp(embryo_file.stat().st_ctime)
+        
+        # Determine creation type from conception records
+        creation_type = "Random"
+        conception_record = Path(f"conception_records/conception_{embryo_id}.json")
+        if record_io.exists(conception_record):
+            data = record_io.read(conception_record)
+            if data.get("parentage"):
+                creation_type = "Inherited"
+        
+        return (embryo_id, creation_type, creation_time.strftime("%Y-%m-%d %H:%M:%S"))
+    
+    def _drain_catalogue(self, scan_queue):
+        """Insert scanned rows on the Tk thread, one batch per tick"""
+        if scan_queue is not self.catalogue_queue:
             return
+        try:
+            batch = scan_queue.get_nowait()
+        except queue.Empty:
+            self.root.after(50, self._drain_catalogue, scan_queue)
+            return
+        if batch is None:
+            return
+        if isinstance(batch, set):
+            self._reconcile_embryo_files(batch)
+            return
+        # Scanned rows all come from embryo files
+        self.add_catalogue_rows(batch, [row[0] for row in batch])
+        self.root.after(1, self._drain_catalogue, scan_queue)
+    
+    def add_catalogue_rows(self, rows, with_files=()):
+        """Add rows to the embryo list and selectors, skipping known IDs
+        
+        with_files names the embryos that have an embryo file; only those
+        can be trained or monitored.
+        """
+        changed = False
+        for row in rows:
+            if row[0] in self.embryo_index:
+                continue
+            self.embryo_index[row[0]] = self.embryo_list.insert("", "end", values=row)
+            changed = True
+        for embryo_id in with_files:
+            if embryo_id not in self.embryo_files:
+                self.embryo_files.add(embryo_id)
+                changed = True
+        if changed:
+            self.update_selectors()
+    
+    def _reconcile_embryo_files(self, found):
+        """Forget embryo files a completed scan no longer found"""
+        gone = [embryo_id for embryo_id in self.embryo_files - found
+                if not self.services.embryo_file(embryo_id).exists()]
+        removed = [embryo_id for embryo_id in gone if not record_io.exists(
+            Path("conception_records") / f"conception_{embryo_id}.json")]
+        self.forget_embryo_files(gone)
+        self.remove_catalogue_rows(removed)
+    
+    def forget_embryo_files(self, embryo_ids):
+        """Keep listed embryos whose file was deleted out of training and monitoring"""
+        changed = False
+        for embryo_id in embryo_ids:
+            if embryo_id in self.embryo_files:
+                self.embryo_files.discard(embryo_id)
+                changed = True
+        if changed:
+            self.update_selectors()
+    
+    def update_selectors(self):
+        """Parents can be any listed embryo; training and monitoring need its file"""
+        embryo_ids = list(self.embryo_index)
+        for combo in (self.parent1_combo, self.parent2_combo):
+            combo['values'] = embryo_ids
+        with_files = [embryo_id for embryo_id in embryo_ids if embryo_id in self.embryo_files]
+        for combo in (self.training_embryo_combo, self.monitor_embryo_combo):
+            combo['values'] = with_files
+    
+    def remove_catalogue_rows(self, embryo_ids):
+        """Drop embryos whose files are all gone from the list and selectors"""
+        removed = False
+        for embryo_id in embryo_ids:
+            self.embryo_files.discard(embryo_id)
+            item = self.embryo_index.pop(embryo_id, None)
+            if item is not None:
+                self.embryo_list.delete(item)
+                removed = True
+        if removed:
+            self.update_selectors()
+    
+    def on_directory_changes(self, changes):
+        """Turn a batch of file changes into catalogue deltas (watcher thread)
+        
+        files records, for each embryo seen, whether its embryo file exists.
+        """
+        added, files, removed, touched = {}, {}, set(), {}
+        for change in changes:
+            if change.kind == RESCAN:
+                # Events were lost; only a full scan brings the catalogue back in line
+                self.change_queue.put(("rescan", None))
+                continue
+            path = change.path
+            directory = path.parent.name
+            if directory == "embryos" and path.name.startswith("embryo_") \
+                    and path.suffix == ".py":
+                embryo_id = path.stem.split('_')[1]
+            elif directory == "conception_records" and path.name.startswith("conception_"):
+                embryo_id = path.stem.split('_')[1]
+            elif directory == "training_logs" and path.name.startswith("training_"):
+                embryo_id = path.stem.split('_')[1]
+                touched.setdefault(embryo_id, set()).add("training")
+                continue
+            elif path.parent.parent.name == "development_logs":
+                touched.setdefault(directory, set()).add("development")
+                continue
+            elif directory == "development_logs":
+                touched.setdefault(path.stem, set()).add("development")
+                continue
+            else:
+                continue
             
-        for embryo_file in embryo_dir.glob("embryo_*.py"):
-            embryo_id = embryo_file.stem.split('_')[1]
-            creation_time = datetime.fromtimestamp(embryo_file.stat().st_ctime)
-            
-            # Determine creation type from conception records
-            creation_type = "Random"
-            conception_record = Path(f"conception_records/conception_{embryo_id}.json")
-            if conception_record.exists():
-                with open(conception_record) as f:
-                    data = json.load(f)
-                    if data.get("parentage"):
-                        creation_type = "Inherited"
-            
-            self.embryo_list.insert("", "end", values=(
-                embryo_id,
-                creation_type,
-                creation_time.strftime("%Y-%m-%d %H:%M:%S")
-            ))
+            embryo_file = Path("embryos") / f"embryo_{embryo_id}.py"
+            record_file = Path("conception_records") / f"conception_{embryo_id}.json"
+            files[embryo_id] = embryo_file.exists()
+            if change.kind == DELETED:
+                if not files[embryo_id] and not record_io.exists(record_file):
+                    removed.add(embryo_id)
+                continue
+            touched.setdefault(embryo_id, set()).add("status")
+            if embryo_id not in self.embryo_index and embryo_id not in added:
+                try:
+                    if embryo_file.exists():
+                        added[embryo_id] = self._catalogue_row(embryo_file, embryo_id)
+                    else:
+                        added[embryo_id] = self._conception_row(record_file, embryo_id)
+                except (OSError, ValueError):
+                    continue
+        if added or files or removed or touched:
+            self.change_queue.put(("changes", (list(added.values()), files, removed, touched)))
+    
+    def on_watch_error(self, error, changes):
+        """Report a failed change batch on the Tk thread (watcher thread)"""
+        self.change_queue.put(("error", f"{type(error).__name__}: {error}"))
+    
+    def _conception_row(self, record_file, embryo_id):
+        """List row for an embryo that so far only has a conception record"""
+        record = record_io.read(record_file)
+        if record.get("conception_time"):
+            created = datetime.fromisoformat(record["conception_time"])
+        else:
+            created = datetime.fromtimestamp(record_io.locate(record_file).stat().st_mtime)
+        creation_type = "Inherited" if record.get("parentage") else "Random"
+        return (embryo_id, creation_type, created.strftime("%Y-%m-%d %H:%M:%S"))
+    
+    def _drain_changes(self):
+        """Apply change deltas on the Tk thread"""
+        monitored = self.monitor_embryo_var.get()
+        refresh = set()
+        rescan = False
+        error = None
+        try:
+            while True:
+                kind, delta = self.change_queue.get_nowait()
+                if kind == "rescan":
+                    rescan = True
+                    continue
+                if kind == "error":
+                    # The failed batch is lost, so resynchronise from disk
+                    error, rescan = delta, True
+                    continue
+                added, files, removed, touched = delta
+                self.add_catalogue_rows(
+                    added, [embryo_id for embryo_id, present in files.items() if present])
+                self.forget_embryo_files(
+                    [embryo_id for embryo_id, present in files.items() if not present])
+                self.remove_catalogue_rows(removed)
+                refresh |= touched.get(monitored, set())
+        except queue.Empty:
+            pass
+        if rescan:
+            self.load_existing_embryos()
+            refresh.add("development")
+        if error is not None:
+            self._show_watch_error(error)
+        if monitored != self.refresh_failed_for:
+            self.refresh_failed_for = None
+            if monitored in self.embryo_index and refresh:
+                self._auto_refresh(monitored, refresh)
+        self.root.after(200, self._drain_changes)
+    
+    def _auto_refresh(self, monitored, refresh):
+        """Refresh monitoring after a change; stop for this embryo once it fails"""
+        if "development" in refresh:
+            refreshed = self.extensions.refresh_monitoring_data(monitored)
+        elif self.services.embryo_file(monitored).exists():
+            refreshed = self.refresh_monitoring()
+        else:
+            return
+        if not refreshed:
+            # Resumes after a manual refresh succeeds or another embryo is chosen
+            self.refresh_failed_for = monitored
+    
+    def _show_watch_error(self, message):
+        """Show directory watch errors, at most once every WATCH_ERROR_INTERVAL seconds"""
+        now = time.monotonic()
+        if self.watch_error_shown is not None \
+                and now - self.watch_error_shown < WATCH_ERROR_INTERVAL:
+            return
+        self.watch_error_shown = now
+        messagebox.showerror("Error", f"Failed to apply directory changes: {message}")
+    
+    def on_close(self):
+        """Stop background work before the window goes away"""
+        self.catalogue_queue = None
+        if self.creation_job is not None and self.creation_job.is_running():
+            self.creation_job.cancel()
+        self.watcher.stop()
+        self.readiness.close()
+        self.root.destroy()
     
     def create_embryo(self):
         """Handle embryo creation based on selected options"""
+        if self.creation_job is not None and self.creation_job.is_running():
+            messagebox.showerror("Error", "Embryo creation is already running")
+            return
         try:
-            if self.creation_type.get() == "random":
-                embryo_id = self.create_random_embryo()
-            else:
-                parent1 = self.parent1_var.get()
-                parent2 = self.parent2_var.get()
-                if not parent1 or not parent2:
-                    messagebox.showerror("Error", "Please select both parents")
-                    return
-                embryo_id = self.create_inherited_embryo(parent1, parent2)
-            
-            messagebox.showinfo("Success", f"Created embryo with ID: {embryo_id}")
-            self.load_existing_embryos()
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to create embryo: {str(e)}")
+            count = self.creation_count.get()
+        except tk.TclError:
+            count = 0
+        if count < 1:
+            messagebox.showerror("Error", "Count must be a positive number")
+            return
+        
+        parents = None
+        if self.creation_type.get() != "random":
+            parent1 = self.parent1_var.get()
+            parent2 = self.parent2_var.get()
+            if not parent1 or not parent2:
+                messagebox.showerror("Error", "Please select both parents")
+                return
+            parents = (parent1, parent2)
+        
+        # Conceive on a worker thread; results stream back in batches
+        self.creation_job = CreationJob(count, parents).start()
+        self.creation_errors = []
+        self.create_button['state'] = 'disabled'
+        self.cancel_button['state'] = 'normal'
+        self.creation_status['text'] = f"Creating 0/{count}"
+        self.root.after(50, self._drain_creation)
     
-    def create_random_embryo(self):
-        """Create a random embryo"""
-        # Import and use the genetic inheritance module
-        spec = importlib.util.spec_from_file_location("genetic_inheritance",
-                                                    "genetic-inheritance.py")
-        genetic_module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(genetic_module)
-        
-        return genetic_module.conceive_embryo()
+    def cancel_creation(self):
+        """Stop the running creation job after the embryo in progress"""
+        if self.creation_job is not None:
+            self.creation_job.cancel()
+            self.creation_status['text'] = "Cancelling..."
     
-    def create_inherited_embryo(self, parent1_id, parent2_id):
-        """Create an inherited embryo from selected parents"""
-        spec = importlib.util.spec_from_file_location("genetic_inheritance",
-                                                    "genetic-inheritance.py")
-        genetic_module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(genetic_module)
-        
-        return genetic_module.conceive_embryo(parent1_id, parent2_id)
+    def _drain_creation(self, max_batches=5):
+        """Insert created embryos on the Tk thread, a few batches per tick"""
+        job = self.creation_job
+        for _ in range(max_batches):
+            try:
+                batch = job.results.get_nowait()
+            except queue.Empty:
+                break
+            if batch is None:
+                self.creation_finished(job)
+                return
+            rows = [row for row in batch if row[0] != "error"]
+            self.creation_errors.extend(row[1] for row in batch if row[0] == "error")
+            # New embryos only have a conception record until their file is written
+            self.add_catalogue_rows(rows)
+            if rows:
+                self.last_created_id = rows[-1][0]
+            if not job.cancelled:
+                self.creation_status['text'] = f"Creating {job.created}/{job.count}"
+        self.root.after(50, self._drain_creation)
+    
+    def creation_finished(self, job):
+        """Report the outcome of a creation job"""
+        self.create_button['state'] = 'normal'
+        self.cancel_button['state'] = 'disabled'
+        outcome = "Cancelled" if job.cancelled else "Created"
+        self.creation_status['text'] = f"{outcome}: {job.created} of {job.count}"
+        if self.creation_errors:
+            messagebox.showerror("Error", f"Failed to create {len(self.creation_errors)} "
+                                 f"embryo(s): {self.creation_errors[0]}")
+        elif job.count == 1 and job.created == 1:
+            messagebox.showinfo("Success", f"Created embryo with ID: {self.last_created_id}")
     
     def start_training(self):
         """Start the selected training program"""
@@ -221,17 +531,11 @@ class EmbryoManagerUI:
         program_name = self.program_list.item(selected_items[0])['values'][0]
         
         try:
-            # Import and use the embryo school module
-            spec = importlib.util.spec_from_file_location("embryo_school",
-                                                        "embryo-school.py")
-            school_module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(school_module)
-            
-            school = school_module.EmbryoSchool()
-            embryo = school.load_embryo(f"embryos/embryo_{embryo_id}.py")
+            school = self.services.school
+            embryo = self.services.load_embryo(embryo_id)
+            self.readiness.watch(embryo)
             
             # Start training in a separate thread to not block UI
-            import threading
             def training_thread():
                 try:
                     result = school.train_embryo(embryo, program_name)
@@ -250,6 +554,12 @@ class EmbryoManagerUI:
         except Exception as e:
             messagebox.showerror("Error", f"Failed to start training: {str(e)}")
     
+    def on_readiness_event(self, event):
+        """Log readiness changes; called on the training thread"""
+        change = "became ready for" if event.ready else "is no longer ready for"
+        message = f"Embryo {event.embryo_id} {change} {event.program}"
+        self.root.after(0, self.extensions.log_training_event, message)
+    
     def simulate_progress(self):
         """Simulate training progress"""
         if self.progress_bar['value'] < 100:
@@ -264,20 +574,14 @@ class EmbryoManagerUI:
         messagebox.showinfo("Success", "Training program completed successfully")
     
     def refresh_monitoring(self):
-        """Refresh monitoring data for selected embryo"""
+        """Refresh monitoring data for selected embryo; False if it failed"""
         embryo_id = self.monitor_embryo_var.get()
         if not embryo_id:
-            return
+            return False
             
         try:
             # Load embryo and get status
-            spec = importlib.util.spec_from_file_location("embryo_school",
-                                                        "embryo-school.py")
-            school_module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(school_module)
-            
-            school = school_module.EmbryoSchool()
-            embryo = school.load_embryo(f"embryos/embryo_{embryo_id}.py")
+            embryo = self.services.load_embryo(embryo_id)
             status = embryo.get_status()
             
             # Clear existing stats
@@ -299,11 +603,12 @@ class EmbryoManagerUI:
             # Add specializations
             self.stats_tree.insert("", "end", values=("Specializations", 
                                                     ", ".join(status['specializations'])))
-            
-            self.extensions = EmbryoManagerExtensions(self)
 
         except Exception as e:
             messagebox.showerror("Error", f"Failed to refresh monitoring: {str(e)}")
+            return False
+        self.refresh_failed_for = None
+        return True
 
 def main():
     root = tk.Tk()
@@ -1,9 +1,22 @@
+import copy
 import json
+import os
 import random
+import threading
 import numpy as np
 from pathlib import Path
 import importlib.util
 from datetime import datetime
+from timeseries_store import DevelopmentLogStore
+import instrumentation
+import record_io
+import status_tracking
+import training_plans
+from instrumentation import instrumented
+
+# Status fields that change with the clock rather than with training, so
+# they are left out of cached status
+VOLATILE_STATUS_FIELDS = ("age",)
 
 class EmbryoSchool:
     def __init__(self):
@@ -164,6 +177,86 @@ class EmbryoSchool:
             }
         }
         
+        # Daily development samples are appended to per-embryo series here
+        self.development_log_dir = Path("development_logs")
+        
+        # Metrics and readiness are cached per embryo status version
+        self.metrics_cache_stats = {"hits": 0, "misses": 0}
+        self._metrics_cache_lock = threading.Lock()
+        
+        # Compiled plans, rebuilt when a program's definition changes
+        self._compiled_programs = {}
+        self._compiled_curricula = {}
+        self._program_listeners = []
+        
+        # User-defined programs, e.g. EMBRYO_TRAINING_PROGRAMS=programs/:extra.json
+        for config_file in training_plans.config_paths(
+                os.environ.get("EMBRYO_TRAINING_PROGRAMS", "")):
+            self.load_programs(config_file)
+        
+    def load_programs(self, config_file):
+        """Add programs and curriculum paths from a JSON or YAML config file"""
+        config = training_plans.load_config(config_file)
+        # Compile first so a bad program leaves the school unchanged
+        compiled = {name: training_plans.CompiledProgram(name, details)
+                    for name, details in config["programs"].items()}
+        programs = {**self.training_programs, **config["programs"]}
+        for specialization, path in config["curriculum_paths"].items():
+            unknown = [p for p in path if p not in programs]
+            if unknown:
+                raise ValueError(f"Curriculum path {specialization} in {config_file} "
+                                 f"uses unknown program {unknown[0]}")
+        self.training_programs.update(config["programs"])
+        self._compiled_programs.update(compiled)
+        self.curriculum_paths.update(config["curriculum_paths"])
+        self._programs_changed(list(config["programs"]))
+        return list(config["programs"])
+    
+    def add_program_listener(self, listener):
+        """Call listener(program_names) when programs are loaded or recompiled after edits"""
+        if listener not in self._program_listeners:
+            self._program_listeners.append(listener)
+    
+    def remove_program_listener(self, listener):
+        if listener in self._program_listeners:
+            self._program_listeners.remove(listener)
+    
+    def _programs_changed(self, program_names):
+        for listener in list(self._program_listeners):
+            try:
+                listener(program_names)
+            except Exception as e:
+                print(f"Warning: Program listener failed: {type(e).__name__}: {e}")
+    
+    def compiled_program(self, program_name):
+        """Immutable plan for a program, compiled once per definition"""
+        details = self.training_programs.get(program_name)
+        if details is None:
+            raise ValueError(f"Unknown training program: {program_name}")
+        plan = self._compiled_programs.get(program_name)
+        # Compared by value, so programs edited in place are recompiled too
+        if plan is None or not plan.matches(details):
+            edited = plan is not None
+            plan = self._compiled_programs[program_name] = training_plans.CompiledProgram(
+                program_name, details)
+            if edited:
+                self._programs_changed([program_name])
+        return plan
+    
+    def compiled_programs(self):
+        return {name: self.compiled_program(name) for name in self.training_programs}
+    
+    def compiled_curriculum(self, program_names, name=None):
+        """Plans for a sequence of programs, e.g. a curriculum path"""
+        key = (name, tuple(program_names))
+        programs = [self.compiled_program(p) for p in key[1]]
+        curriculum = self._compiled_curricula.get(key)
+        if curriculum is None or any(a is not b for a, b in zip(curriculum.programs, programs)):
+            curriculum = self._compiled_curricula[key] = training_plans.CompiledCurriculum(
+                name, programs)
+        return curriculum
+    
+    @instrumented("EmbryoSchool.load_embryo")
     def load_embryo(self, embryo_file):
         """Load an embryo from its Python file"""
         spec = importlib.util.spec_from_file_location("embryo_module", embryo_file)
@@ -173,26 +266,71 @@ class EmbryoSchool:
         
     def evaluate_embryo(self, embryo):
         """Evaluate embryo's current capabilities and recommend training"""
-        status = embryo.get_status()
+        status = self.cached_status(embryo)
         
         evaluation = {
             "development_stage": status["development_stage"],
             "experience_level": status["experiences_count"],
-            "specializations": status["specializations"],
-            "performance_metrics": self._calculate_performance_metrics(status),
+            "specializations": list(status["specializations"]),
+            "performance_metrics": self.performance_metrics(embryo),
             "recommended_programs": [],
             "readiness_assessment": {}
         }
         
         # Assess readiness for each program
-        for program, details in self.training_programs.items():
-            readiness = self._assess_program_readiness(status, program, details)
+        for program in self.training_programs:
+            readiness = self.program_readiness(embryo, program)
             evaluation["readiness_assessment"][program] = readiness
             if readiness["ready"]:
                 evaluation["recommended_programs"].append(program)
         
         return evaluation
     
+    def embryo_status(self, embryo):
+        """The embryo's full current status, safe to keep or modify"""
+        return copy.deepcopy(embryo.get_status())
+    
+    def cached_status(self, embryo):
+        """Embryo's status, reused until it learns or develops (do not mutate)
+        
+        VOLATILE_STATUS_FIELDS such as age are left out; embryo_status
+        has them.
+        """
+        cache = status_tracking.state_cache(embryo)
+        status = cache.get("status")
+        if status is None:
+            status = cache["status"] = {key: value for key, value in embryo.get_status().items()
+                                        if key not in VOLATILE_STATUS_FIELDS}
+        return status
+    
+    def _cached(self, embryo, key, compute):
+        cache = status_tracking.state_cache(embryo)
+        key = (key, id(self))
+        hit = key in cache
+        with self._metrics_cache_lock:
+            self.metrics_cache_stats["hits" if hit else "misses"] += 1
+        if hit:
+            instrumentation.count("metrics_cache.hits")
+            return cache[key]
+        instrumentation.count("metrics_cache.misses")
+        value = cache[key] = compute()
+        return value
+    
+    def performance_metrics(self, embryo):
+        """Performance metrics of the embryo's current status, memoized"""
+        metrics = self._cached(embryo, "metrics", lambda: self._calculate_performance_metrics(
+            self.cached_status(embryo)))
+        return dict(metrics)
+    
+    def program_readiness(self, embryo, program):
+        """Readiness for one program at the embryo's current status, memoized"""
+        # Keyed on the compiled plan, so an edited program is assessed afresh
+        plan = self.compiled_program(program)
+        readiness = self._cached(embryo, ("readiness", plan), lambda: self._assess_program_readiness(
+            self.cached_status(embryo), program, plan.source))
+        return copy.deepcopy(readiness)
+    
+    @instrumented("EmbryoSchool._calculate_performance_metrics")
     def _calculate_performance_metrics(self, status):
         """Calculate detailed performance metrics"""
         metrics = {}
@@ -241,56 +379,99 @@ class EmbryoSchool:
             "requirements": metric_requirements
         }
 
+    @instrumented("EmbryoSchool.train_embryo")
     def train_embryo(self, embryo, program_name):
         """Put an embryo through a specific training program"""
-        if program_name not in self.training_programs:
-            raise ValueError(f"Unknown training program: {program_name}")
-            
-        program = self.training_programs[program_name]
+        development_log = None
+        
+        def record_day(status):
+            nonlocal development_log
+            if development_log is None:
+                development_log = self._open_development_log(embryo, status)
+            if development_log is not None:
+                # Stamped under the series lock; other processes may train it too
+                development_log.append(None, status["development_stage"],
+                                       status["neural_connections"], ignore_unknown=True)
+        
+        outcome = self._run_program(embryo, program_name, on_day=record_day)
+        
+        # Save training log
+        log_dir = Path("training_logs")
+        log_dir.mkdir(exist_ok=True)
+        
+        training_record = {
+            "program": program_name,
+            "embryo_id": embryo.embryo_id,
+            **outcome
+        }
+        
+        log_file = log_dir / f"training_{embryo.embryo_id}_{program_name}.json"
+        record_io.write(log_file, training_record)
+        
+        return training_record
+    
+    def _run_program(self, embryo, program_name, on_day=None, keep_log=True, rng=None):
+        """Run a program on an embryo without writing anything to disk
+        
+        on_day(status) is called after each day's development step. rng
+        is an optional random.Random for the complexity jitter; the module
+        level random functions are used by default.
+        """
+        rng = rng or random
+        plan = self.compiled_program(program_name)
         training_log = []
         performance_history = []
         
         # Initial assessment
-        initial_status = embryo.get_status()
-        initial_metrics = self._calculate_performance_metrics(initial_status)
+        initial_metrics = self.performance_metrics(embryo)
         
         # Run the training program
-        for day in range(program["duration"]):
+        for day in range(plan.duration):
             daily_performance = {
                 "day": day + 1,
                 "experiences": []
             }
             
+            # Add some randomization to experience complexity
+            complexities = plan.day_complexities(
+                [rng.uniform(0.9, 1.1) for _ in range(len(plan))])
+            
             # Apply experiences
-            for experience in program["experiences"]:
-                # Add some randomization to experience complexity
-                modified_experience = experience.copy()
-                modified_experience["complexity"] *= random.uniform(0.9, 1.1)
+            for (experience_type, fields), complexity in zip(plan.steps, complexities):
+                modified_experience = {
+                    "type": experience_type,
+                    "complexity": complexity,
+                    **fields
+                }
                 
                 result = embryo.learn_from_experience(modified_experience)
-                training_log.append({
-                    "timestamp": datetime.now().isoformat(),
-                    "program": program_name,
-                    "day": day + 1,
-                    "experience": modified_experience,
-                    "result": result
-                })
+                if keep_log:
+                    training_log.append({
+                        "timestamp": datetime.now().isoformat(),
+                        "program": program_name,
+                        "day": day + 1,
+                        "experience": modified_experience,
+                        "result": result
+                    })
                 daily_performance["experiences"].append({
-                    "type": modified_experience["type"],
+                    "type": experience_type,
                     "performance": result["processing_quality"]
                 })
             
             # Development step
             embryo.develop()
+            instrumentation.count("training.days")
+            instrumentation.count("training.experiences", len(plan))
             
             # Calculate daily performance
-            status = embryo.get_status()
-            daily_performance["metrics"] = self._calculate_performance_metrics(status)
+            status = self.cached_status(embryo)
+            daily_performance["metrics"] = self.performance_metrics(embryo)
             performance_history.append(daily_performance)
+            if on_day is not None:
+                on_day(status)
         
         # Final assessment
-        final_status = embryo.get_status()
-        final_metrics = self._calculate_performance_metrics(final_status)
+        final_metrics = self.performance_metrics(embryo)
         
         # Calculate improvement
         improvement = {
@@ -298,28 +479,27 @@ class EmbryoSchool:
             for metric in initial_metrics
         }
         
-        # Save training log
-        log_dir = Path("training_logs")
-        log_dir.mkdir(exist_ok=True)
-        
-        training_record = {
-            "program": program_name,
-            "embryo_id": embryo.embryo_id,
+        return {
             "training_log": training_log,
             "performance_history": performance_history,
             "initial_metrics": initial_metrics,
             "final_metrics": final_metrics,
             "improvement": improvement
         }
-        
-        log_file = log_dir / f"training_{embryo.embryo_id}_{program_name}.json"
-        log_file.write_text(json.dumps(training_record, indent=2))
-        
-        return training_record
+    
+    def _open_development_log(self, embryo, status):
+        """Open the embryo's development series, creating it from its status"""
+        if self.development_log_dir is None:
+            return None
+        return DevelopmentLogStore.for_embryo(
+            embryo.embryo_id,
+            list(status["neural_connections"]),
+            log_dir=self.development_log_dir
+        )
     
     def create_curriculum(self, embryo):
         """Create a personalized curriculum based on embryo's specializations"""
-        status = embryo.get_status()
+        status = self.cached_status(embryo)
         curriculum = []
         specialization_paths = []
         
@@ -328,7 +508,7 @@ class EmbryoSchool:
             if specialization in self.curriculum_paths:
                 specialization_paths.append({
                     "specialization": specialization,
-                    "path": self.curriculum_paths[specialization]
+                    "path": list(self.curriculum_paths[specialization])
                 })
         
         # Create ordered curriculum considering prerequisites
@@ -340,25 +520,23 @@ class EmbryoSchool:
                     seen_programs.add(program)
         
         # Calculate estimated metrics
-        total_duration = sum(self.training_programs[p]["duration"] for p in curriculum)
-        estimated_completion_stage = status["development_stage"]
-        for program in curriculum:
-            estimated_completion_stage += self.training_programs[program]["duration"] * 0.5
+        plan = self.compiled_curriculum(curriculum)
+        estimated_completion_stage = status["development_stage"] + plan.duration * 0.5
         
         return {
             "embryo_id": embryo.embryo_id,
             "current_stage": status["development_stage"],
             "recommended_curriculum": curriculum,
             "specialization_paths": specialization_paths,
-            "estimated_duration": total_duration,
+            "estimated_duration": plan.duration,
             "estimated_completion_stage": estimated_completion_stage,
             "program_details": {
-                program: {
-                    "duration": self.training_programs[program]["duration"],
-                    "required_stage": self.training_programs[program]["required_stage"],
-                    "focus_metrics": self.training_programs[program]["metrics"]
+                program.name: {
+                    "duration": program.duration,
+                    "required_stage": program.required_stage,
+                    "focus_metrics": list(program.metrics)
                 }
-                for program in curriculum
+                for program in plan.programs
             }
         }
 
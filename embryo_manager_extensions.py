@@ -2,12 +2,16 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import json
+import random
 from pathlib import Path
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from datetime import datetime, timedelta
-import numpy as np
+import math
 from typing import Dict, List, Any
+from timeseries_store import DevelopmentLogStore
+import record_io
+
+# matplotlib, its TkAgg backend and NumPy are imported on first use of the
+# monitoring tab so they stay off the startup path
 
 class EmbryoManagerExtensions:
     def __init__(self, manager_ui):
@@ -74,32 +78,68 @@ class EmbryoManagerExtensions:
         
     def add_monitoring_graphs(self, parent):
         """Add graphical monitoring components"""
-        graphs_frame = ttk.Frame(parent)
-        graphs_frame.pack(side='bottom', fill='both', expand=True)
+        self.graphs_frame = ttk.Frame(parent)
+        self.graphs_frame.pack(side='bottom', fill='both', expand=True)
+        
+        # Figures are created by ensure_monitoring_graphs on first use
+        self.graphs_ready = False
+        self.dev_chart_embryo = None
+        # Sample index the next streamed development sample will have
+        self.dev_chart_next = 0
+        self.dev_series_until = None
+        self.monitoring_max_points = 4000
+        
+    def setup_monitoring_graphs(self):
+        """Defer figure creation until the monitoring tab is first shown"""
+        self.manager.notebook.bind('<<NotebookTabChanged>>', self.on_tab_changed, add='+')
+        
+    def on_tab_changed(self, event):
+        """Build the monitoring figures the first time their tab is selected"""
+        if self.manager.notebook.select() == str(self.manager.monitoring_tab):
+            self.ensure_monitoring_graphs()
         
-        # Create matplotlib figures
-        self.setup_development_graph(graphs_frame)
-        self.setup_neural_graph(graphs_frame)
+    def ensure_monitoring_graphs(self):
+        """Create the matplotlib figures if they do not exist yet"""
+        if self.graphs_ready:
+            return
+        self.setup_development_graph(self.graphs_frame)
+        self.setup_neural_graph(self.graphs_frame)
+        self.graphs_ready = True
         
     def setup_development_graph(self, parent):
         """Setup development progress graph"""
-        fig, self.dev_ax = plt.subplots(figsize=(6, 4))
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from live_charts import StreamingLineChart
+        
+        # Figures are owned by the canvas rather than the pyplot registry so
+        # they are not kept alive globally
+        fig = Figure(figsize=(6, 4))
+        self.dev_ax = fig.add_subplot()
         self.dev_canvas = FigureCanvasTkAgg(fig, master=parent)
         self.dev_canvas.get_tk_widget().pack(side='left', fill='both', expand=True)
         
         self.dev_ax.set_title('Development Progress')
         self.dev_ax.set_xlabel('Time')
         self.dev_ax.set_ylabel('Development Stage')
+        self.dev_chart = StreamingLineChart(self.dev_ax, self.dev_canvas)
         
     def setup_neural_graph(self, parent):
         """Setup neural connections graph"""
-        fig, self.neural_ax = plt.subplots(figsize=(6, 4))
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        
+        fig = Figure(figsize=(6, 4))
+        self.neural_ax = fig.add_subplot()
         self.neural_canvas = FigureCanvasTkAgg(fig, master=parent)
         self.neural_canvas.get_tk_widget().pack(side='right', fill='both', expand=True)
         
         self.neural_ax.set_title('Neural Connections')
         self.neural_ax.set_xlabel('Connection Type')
         self.neural_ax.set_ylabel('Connection Count')
+        self.neural_ax.tick_params(axis='x', rotation=45)
+        self.neural_bars = None
+        self.neural_bar_types = []
         
     def initialize_training_programs(self):
         """Initialize available training programs"""
@@ -156,7 +196,7 @@ class EmbryoManagerExtensions:
                 # Calculate weighted average with random variation
                 base_value = (p1_data['genetic_traits'][trait] + 
                             p2_data['genetic_traits'][trait]) / 2
-                variation = np.random.normal(0, 0.1)  # Small random variation
+                variation = random.gauss(0, 0.1)  # Small random variation
                 predicted[trait] = max(1.5, min(3.0, base_value + variation))
                 
             return predicted
@@ -166,11 +206,10 @@ class EmbryoManagerExtensions:
             
     def load_parent_data(self, parent_id: str) -> Dict[str, Any]:
         """Load parent embryo data"""
-        conception_file = Path(f"conception_records/conception_{parent_id}.json")
-        if conception_file.exists():
-            with open(conception_file) as f:
-                return json.load(f)
-        raise ValueError(f"Parent data not found for ID: {parent_id}")
+        try:
+            return self.manager.services.genetics.load_conception_record(parent_id)
+        except FileNotFoundError:
+            raise ValueError(f"Parent data not found for ID: {parent_id}")
         
     def update_training_metrics(self, metrics: Dict[str, float]):
         """Update training metrics display"""
@@ -184,28 +223,54 @@ class EmbryoManagerExtensions:
         self.training_log.insert('end', f"[{timestamp}] {message}\n")
         self.training_log.see('end')
         
-    def update_monitoring_graphs(self, embryo_data: Dict[str, Any]):
+    def update_monitoring_graphs(self, embryo_data: Dict[str, Any], embryo_id: str = None):
         """Update monitoring graphs with new data"""
-        # Update development progress graph
-        self.dev_ax.clear()
-        times = [i for i in range(len(embryo_data['development_history']))]
-        stages = [d['stage'] for d in embryo_data['development_history']]
+        self.ensure_monitoring_graphs()
         
-        self.dev_ax.plot(times, stages)
-        self.dev_ax.set_title('Development Progress')
-        self.dev_ax.set_xlabel('Time')
-        self.dev_ax.set_ylabel('Development Stage')
-        self.dev_canvas.draw()
+        # Stream only the unseen tail of the development history when the
+        # same embryo is refreshed, otherwise start the chart over. The x
+        # axis is the sample index, which decimated histories carry along
+        history = embryo_data['development_history']
+        indices = [d.get('index', i) for i, d in enumerate(history)]
+        last = indices[-1] + 1 if indices else 0
+        if embryo_id is not None and embryo_id == self.dev_chart_embryo \
+                and last >= self.dev_chart_next:
+            new = [(i, d['stage']) for i, d in zip(indices, history) if i >= self.dev_chart_next]
+            self.append_development_samples([stage for _, stage in new], [i for i, _ in new])
+        else:
+            self.dev_chart.reset([d['stage'] for d in history], indices)
+            self.dev_chart_embryo = embryo_id
+            self.dev_chart_next = last
         
-        # Update neural connections graph
-        self.neural_ax.clear()
-        conn_types = list(embryo_data['neural_connections'].keys())
-        conn_values = list(embryo_data['neural_connections'].values())
+        self.update_neural_graph(embryo_data['neural_connections'])
         
-        self.neural_ax.bar(conn_types, conn_values)
-        self.neural_ax.set_title('Neural Connections')
-        self.neural_ax.tick_params(axis='x', rotation=45)
-        self.neural_canvas.draw()
+    def update_neural_graph(self, neural_connections: Dict[str, float]):
+        """Update the neural connections bars in place"""
+        self.ensure_monitoring_graphs()
+        # Bars are rebuilt only when the set of connection types changes
+        conn_types = list(neural_connections.keys())
+        conn_values = list(neural_connections.values())
+        
+        if self.neural_bars is None or conn_types != self.neural_bar_types:
+            if self.neural_bars is not None:
+                self.neural_bars.remove()
+            self.neural_bars = self.neural_ax.bar(conn_types, conn_values)
+            self.neural_bar_types = conn_types
+        else:
+            for bar, value in zip(self.neural_bars, conn_values):
+                bar.set_height(value)
+        self.neural_ax.relim()
+        self.neural_ax.autoscale_view()
+        self.neural_canvas.draw_idle()
+        
+    def append_development_samples(self, stages: List[float], indices: List[int] = None):
+        """Stream new development stage samples, at their sample indices, into the live chart"""
+        self.ensure_monitoring_graphs()
+        if stages:
+            if indices is None:
+                indices = list(range(self.dev_chart_next, self.dev_chart_next + len(stages)))
+            self.dev_chart.extend(stages, indices)
+            self.dev_chart_next = indices[-1] + 1
         
     def on_embryo_select(self, event):
         """Handle embryo selection in list"""
@@ -253,26 +318,82 @@ class EmbryoManagerExtensions:
                               "\n".join(f"- {outcome}" for outcome in info['expected_outcomes']))
             
     def refresh_monitoring_data(self, embryo_id: str):
-        """Refresh monitoring data for selected embryo"""
+        """Refresh monitoring data for selected embryo; False if it failed"""
         try:
-            # Load embryo data
-            embryo_data = self.load_embryo_data(embryo_id)
-            
-            # Update graphs
-            self.update_monitoring_graphs(embryo_data)
+            if embryo_id == self.dev_chart_embryo and self.dev_series_until is not None:
+                # Only read samples appended since the last refresh
+                embryo_data = self.load_embryo_data(
+                    embryo_id, start=math.nextafter(self.dev_series_until, math.inf))
+                history = embryo_data['development_history']
+                self.append_development_samples([d['stage'] for d in history],
+                                                [d['index'] for d in history])
+                if embryo_data['neural_connections']:
+                    self.update_neural_graph(embryo_data['neural_connections'])
+            else:
+                embryo_data = self.load_embryo_data(
+                    embryo_id, max_points=self.monitoring_max_points)
+                self.update_monitoring_graphs(embryo_data, embryo_id)
+            self.dev_series_until = embryo_data.get('last_timestamp')
             
             # Update stats tree
-            self.manager.refresh_monitoring()
+            return self.manager.refresh_monitoring()
             
         except Exception as e:
             messagebox.showerror("Error", f"Failed to refresh monitoring data: {str(e)}")
+            return False
             
-    def load_embryo_data(self, embryo_id: str) -> Dict[str, Any]:
-        """Load complete embryo data including history"""
-        # Load development logs
+    def load_embryo_data(self, embryo_id: str, start: float = None, end: float = None,
+                         max_points: int = None) -> Dict[str, Any]:
+        """Load embryo data including history, limited to a time range when possible"""
+        series_dir = Path(f"development_logs/{embryo_id}")
+        if (series_dir / "fields.json").exists():
+            return self.load_development_series(DevelopmentLogStore(series_dir),
+                                                start, end, max_points)
+        
+        # Fall back to the legacy whole-blob development log
         log_file = Path(f"development_logs/{embryo_id}.json")
-        if not log_file.exists():
+        if not record_io.exists(log_file):
             raise ValueError(f"No development logs found for embryo: {embryo_id}")
             
-        with open(log_file) as f:
-            return json.load(f)
+        return record_io.read(log_file)
+            
+    def load_development_series(self, store: DevelopmentLogStore, start: float = None,
+                                end: float = None, max_points: int = None) -> Dict[str, Any]:
+        """Read a range of a development series in the legacy log layout"""
+        history = []
+        if max_points is None:
+            samples = store.range(start, end, ["stage"], with_index=True)
+        else:
+            view = store.query(start, end, max_points)
+            samples = view.get("samples")
+            # Keep each bucket's extremes, at their sample indices, so
+            # decimation stays faithful
+            for bucket in view.get("buckets", []):
+                stage = bucket["fields"]["stage"]
+                if stage["min"] is None:
+                    continue
+                low = stage.get("min_index", bucket["index"])
+                high = stage.get("max_index", bucket["index"] + bucket["count"] - 1)
+                points = sorted([(low, stage["min"]), (high, stage["max"])])
+                history += [{"timestamp": bucket["start"], "index": index, "stage": value}
+                            for index, value in points]
+        if samples is not None:
+            history = [{"timestamp": t, "index": index, "stage": stage}
+                       for t, index, stage in zip(samples["timestamp"], samples["index"],
+                                                  samples["stage"])
+                       if not math.isnan(stage)]
+        
+        neural_connections = {}
+        latest = store.latest()
+        if latest is not None and (start is None or latest["timestamp"] >= start):
+            neural_connections = {
+                name[len("neural."):]: value
+                for name, value in latest.items()
+                if name.startswith("neural.") and not math.isnan(value)
+            }
+        
+        return {
+            "development_history": history,
+            "neural_connections": neural_connections,
+            "last_timestamp": store.last_timestamp if len(store) else None
+        }
@@ -0,0 +1,172 @@
+# embryo_services.py
+import copy
+import importlib.util
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+REPO_DIR = Path(__file__).resolve().parent
+
+# Repo modules whose file names are not importable with a plain import
+MODULE_FILES = {
+    "genetic_inheritance": "genetic-inheritance.py",
+    "embryo_school": "embryo-school.py",
+}
+
+_modules: Dict[str, Any] = {}
+_modules_lock = threading.RLock()
+
+
+def load_module(name: str):
+    """Load a repo module once per process and return the cached module"""
+    with _modules_lock:
+        module = _modules.get(name)
+        if module is not None:
+            return module
+
+        module = sys.modules.get(name)
+        if module is None:
+            spec = importlib.util.spec_from_file_location(name, REPO_DIR / MODULE_FILES[name])
+            module = importlib.util.module_from_spec(spec)
+            # Register before executing so pickling and worker processes can
+            # resolve functions defined in the module by name
+            sys.modules[name] = module
+            try:
+                spec.loader.exec_module(module)
+            except BaseException:
+                del sys.modules[name]
+                raise
+
+        _modules[name] = module
+        return module
+
+
+def genetics():
+    """Return the shared genetic-inheritance module"""
+    return load_module("genetic_inheritance")
+
+
+def school_module():
+    """Return the shared embryo-school module"""
+    return load_module("embryo_school")
+
+
+class EmbryoServices:
+    """Long-lived service layer shared by the manager UI and its extensions"""
+
+    def __init__(self, embryo_dir="embryos"):
+        self.embryo_dir = Path(embryo_dir)
+        self._school = None
+        self._embryos: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+
+    @property
+    def genetics(self):
+        return genetics()
+
+    @property
+    def school(self):
+        """Single EmbryoSchool instance for the session"""
+        with self._lock:
+            if self._school is None:
+                self._school = school_module().EmbryoSchool()
+            return self._school
+
+    def embryo_file(self, embryo_id: str) -> Path:
+        return self.embryo_dir / f"embryo_{embryo_id}.py"
+
+    def load_embryo(self, embryo_id: str):
+        """Return a fresh copy of the embryo for an ID
+
+        The file is re-executed only when it changed. As with loading from
+        the file, changes to the copy (e.g. training) are not written back,
+        and no two callers share an embryo object.
+        """
+        embryo_file = self.embryo_file(embryo_id)
+        stamp = embryo_file.stat().st_mtime_ns
+
+        with self._lock:
+            cached = self._embryos.get(embryo_id)
+        if cached is None or cached[0] != stamp:
+            cached = (stamp, self.school.load_embryo(embryo_file))
+            with self._lock:
+                self._embryos[embryo_id] = cached
+        # The cached embryo is never handed out, so it can be copied unlocked
+        return copy.deepcopy(cached[1])
+
+    def forget_embryo(self, embryo_id: str):
+        """Drop a cached embryo so the next load reads it from disk"""
+        with self._lock:
+            self._embryos.pop(embryo_id, None)
+
+
+class CreationJob:
+    """Conceive embryos on a background thread, streaming results in batches
+
+    Each batch put on `results` is a list of (embryo_id, creation_type,
+    created) rows or ("error", message) tuples; None marks the end of the
+    job, whether it finished, failed or was cancelled.
+    """
+
+    def __init__(self, count: int, parents: Optional[Tuple[str, str]] = None,
+                 batch_size: int = 50, flush_interval: float = 0.1,
+                 records_dir="conception_records"):
+        self.count = count
+        self.parents = parents
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.records_dir = records_dir
+        self.results: "queue.Queue[Optional[List[tuple]]]" = queue.Queue()
+        self.created = 0
+        self.errors = 0
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="embryo-creation", daemon=True)
+
+    def start(self) -> "CreationJob":
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def is_running(self) -> bool:
+        return self._thread.is_alive()
+
+    def _run(self):
+        module = genetics()
+        parent1_id, parent2_id = self.parents or (None, None)
+        creation_type = "Inherited" if self.parents else "Random"
+        batch = []
+        last_flush = time.monotonic()
+        try:
+            if self.parents:
+                module.prefetch_parents([self.parents], self.records_dir)
+            for _ in range(self.count):
+                if self._cancel.is_set():
+                    break
+                try:
+                    embryo_id = module.conceive_embryo(parent1_id, parent2_id,
+                                                       records_dir=self.records_dir)
+                    batch.append((embryo_id, creation_type,
+                                  datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+                    self.created += 1
+                except Exception as e:
+                    batch.append(("error", f"{type(e).__name__}: {e}"))
+                    self.errors += 1
+                now = time.monotonic()
+                if len(batch) >= self.batch_size or now - last_flush >= self.flush_interval:
+                    self.results.put(batch)
+                    batch = []
+                    last_flush = now
+        finally:
+            if batch:
+                self.results.put(batch)
+            self.results.put(None)
@@ -0,0 +1,320 @@
+# fs_watch.py
+"""Change notifications for the embryo data directories
+
+DirectoryWatcher reports created, modified and deleted files under a set
+of directories (one level of subdirectories included, for the per-embryo
+development series). It uses inotify through ctypes on Linux and falls
+back to polling modification times elsewhere. Changes are coalesced per
+path and delivered in debounced batches on the watcher thread:
+
+    watcher = DirectoryWatcher(["embryos", "conception_records"], on_changes).start()
+    ...
+    watcher.stop()
+
+When the kernel drops events (its queue overflowed) the batch carries a
+RESCAN change for each watched directory instead; the receiver should
+rescan those directories, since any change in them may have been missed.
+Exceptions raised by the callback are passed to on_error.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+import time
+from collections import namedtuple
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+Change = namedtuple("Change", ["path", "kind"])
+
+CREATED = "created"
+MODIFIED = "modified"
+DELETED = "deleted"
+RESCAN = "rescan"
+
+# inotify(7) event bits
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE \
+    | IN_DELETE_SELF | IN_MODIFY
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def _ignored(name: str) -> bool:
+    # Temporary files of atomic writes show up as the final name on rename
+    return name.startswith(".") or name.endswith(".tmp")
+
+
+class _InotifyBackend:
+    """Blocking source of raw changes from the kernel"""
+
+    def __init__(self, directories: List[Path]):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.roots = {d.resolve() for d in directories}
+        # wd -> (directory, "root" | "sub" | "parent")
+        self.watches: Dict[int, Tuple[Path, str]] = {}
+        self.missing_roots = set()
+        self.initial: List[Change] = []
+        for root in self.roots:
+            self._watch_root(root)
+
+    def _watch(self, directory: Path, role: str) -> bool:
+        wd = self._add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            return False
+        # A parent watch never downgrades a root or subdirectory watch
+        if role != "parent" or wd not in self.watches:
+            self.watches[wd] = (directory, role)
+        return True
+
+    def _watch_root(self, root: Path, report_existing: bool = False):
+        if not self._watch(root, "root"):
+            # Not there yet: watch the parent for it to appear
+            self.missing_roots.add(root)
+            self._watch(root.parent, "parent")
+            return
+        self.missing_roots.discard(root)
+        for entry in os.scandir(root):
+            if _ignored(entry.name):
+                continue
+            if entry.is_dir():
+                self._watch_subdir(Path(entry.path), report_existing)
+            elif report_existing:
+                self.initial.append(Change(Path(entry.path), CREATED))
+
+    def _watch_subdir(self, directory: Path, report_existing: bool = True):
+        if self._watch(directory, "sub") and report_existing:
+            # Files written before the watch was in place
+            for entry in os.scandir(directory):
+                if entry.is_file() and not _ignored(entry.name):
+                    self.initial.append(Change(Path(entry.path), CREATED))
+
+    def read(self, timeout: float) -> List[Change]:
+        changes, self.initial = self.initial, []
+        ready, _, _ = select.select([self.fd], [], [], 0 if changes else timeout)
+        if not ready:
+            return changes
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return changes
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0").decode(errors="replace")
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                changes.extend(self._resync())
+                continue
+            watch = self.watches.get(wd)
+            if watch is None:
+                continue
+            directory, role = watch
+            if mask & IN_IGNORED:
+                # Watched directory removed; wait for a root to come back
+                del self.watches[wd]
+                if role == "root":
+                    self.missing_roots.add(directory)
+                    self._watch(directory.parent, "parent")
+                continue
+            if not name or _ignored(name):
+                continue
+            path = directory / name
+
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    if path in self.missing_roots:
+                        self._watch_root(path, report_existing=True)
+                    elif role == "root":
+                        self._watch_subdir(path)
+                continue
+            if role == "parent":
+                continue
+            if mask & (IN_DELETE | IN_MOVED_FROM):
+                changes.append(Change(path, DELETED))
+            elif mask & (IN_CREATE | IN_MOVED_TO):
+                changes.append(Change(path, CREATED))
+            elif mask & (IN_CLOSE_WRITE | IN_MODIFY):
+                changes.append(Change(path, MODIFIED))
+        return changes + self.initial if self.initial else changes
+
+    def _resync(self) -> List[Change]:
+        """Rewatch after lost events and ask for a rescan of every root"""
+        for root in self.roots:
+            try:
+                # Watches subdirectories created while events were dropped
+                self._watch_root(root)
+            except OSError:
+                continue
+        return [Change(root, RESCAN) for root in sorted(self.roots)]
+
+    def close(self):
+        os.close(self.fd)
+
+
+class _PollingBackend:
+    """Compare (mtime, size) snapshots of the watched files"""
+
+    def __init__(self, directories: List[Path], interval: float = 1.0):
+        self.directories = [d.resolve() for d in directories]
+        self.interval = interval
+        self.snapshot = self._scan()
+        self.next_scan = time.monotonic() + interval
+
+    def _scan(self) -> Dict[Path, Tuple[int, int]]:
+        snapshot = {}
+        for directory in self.directories:
+            self._scan_dir(directory, snapshot, depth=1)
+        return snapshot
+
+    def _scan_dir(self, directory: Path, snapshot, depth: int):
+        try:
+            entries = list(os.scandir(directory))
+        except (FileNotFoundError, NotADirectoryError):
+            return
+        for entry in entries:
+            if _ignored(entry.name):
+                continue
+            try:
+                if entry.is_dir():
+                    if depth:
+                        self._scan_dir(Path(entry.path), snapshot, depth - 1)
+                    continue
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            snapshot[Path(entry.path)] = (stat.st_mtime_ns, stat.st_size)
+
+    def read(self, timeout: float) -> List[Change]:
+        # Wait at most timeout; scan only once the poll interval is up
+        delay = self.next_scan - time.monotonic()
+        if delay > timeout:
+            time.sleep(max(timeout, 0))
+            return []
+        time.sleep(max(delay, 0))
+        self.next_scan = time.monotonic() + self.interval
+        current = self._scan()
+        previous, self.snapshot = self.snapshot, current
+        changes = [Change(path, CREATED) for path in current.keys() - previous.keys()]
+        changes += [Change(path, DELETED) for path in previous.keys() - current.keys()]
+        changes += [Change(path, MODIFIED) for path, stamp in current.items()
+                    if path in previous and previous[path] != stamp]
+        return changes
+
+    def close(self):
+        pass
+
+
+def _coalesce(previous: Optional[str], kind: str) -> Optional[str]:
+    """Net effect of two changes to one path inside a batch"""
+    if RESCAN in (previous, kind):
+        return RESCAN
+    if previous is None:
+        return kind
+    if previous == CREATED:
+        return None if kind == DELETED else CREATED
+    if previous == DELETED and kind != DELETED:
+        return MODIFIED
+    return kind
+
+
+class DirectoryWatcher:
+    """Debounced change batches for a set of directories"""
+
+    def __init__(self, directories, callback: Callable[[List[Change]], None],
+                 debounce: float = 0.25, max_delay: float = 1.0, backend: str = None,
+                 poll_interval: float = 1.0,
+                 on_error: Callable[[Exception, List[Change]], None] = None):
+        self.directories = [Path(d) for d in directories]
+        self.callback = callback
+        self.on_error = on_error
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.backend_name = backend
+        self._backend = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _open_backend(self):
+        if self.backend_name != "polling":
+            try:
+                backend = _InotifyBackend(self.directories)
+                self.backend_name = "inotify"
+                return backend
+            except (OSError, AttributeError):
+                # No inotify on this platform or the watch limit is reached
+                if self.backend_name == "inotify":
+                    raise
+        self.backend_name = "polling"
+        return _PollingBackend(self.directories, self.poll_interval)
+
+    def start(self) -> "DirectoryWatcher":
+        self._backend = self._open_backend()
+        self._thread = threading.Thread(target=self._run, name="directory-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._backend is not None:
+            self._backend.close()
+            self._backend = None
+
+    def _run(self):
+        pending: Dict[Path, str] = {}
+        first = last = 0.0
+        while not self._stop.is_set():
+            changes = self._backend.read(self.debounce if pending else 0.5)
+            now = time.monotonic()
+            if changes:
+                if not pending:
+                    first = now
+                last = now
+                for change in changes:
+                    kind = _coalesce(pending.get(change.path), change.kind)
+                    if kind is None:
+                        pending.pop(change.path, None)
+                    else:
+                        pending[change.path] = kind
+            # Deliver once the directories go quiet, or at least every max_delay
+            if pending and (now - last >= self.debounce or now - first >= self.max_delay):
+                batch = [Change(path, kind) for path, kind in pending.items()]
+                pending = {}
+                try:
+                    self.callback(batch)
+                except Exception as e:
+                    self._report(e, batch)
+
+    def _report(self, error: Exception, batch: List[Change]):
+        """Hand a callback failure to on_error; the watcher keeps running"""
+        if self.on_error is None:
+            print(f"Warning: change callback failed: {error}")
+            return
+        try:
+            self.on_error(error, batch)
+        except Exception as e:
+            print(f"Warning: change error handler failed: {e}")
@@ -1,9 +1,53 @@
 import json
+import os
 import random
 from datetime import datetime
 from pathlib import Path
 import uuid
 import math
+import threading
+from collections import OrderedDict
+import instrumentation
+from instrumentation import instrumented
+import genome_store
+import record_io
+
+# "full" writes complete genetic data into every conception record;
+# "content" shares recurring blocks and stores deltas against the parents
+RECORD_STORAGE = os.environ.get("EMBRYO_RECORD_STORAGE", "full")
+
+# Budget for parsed parent records kept in memory, in bytes of record data
+RECORD_CACHE_BYTES = int(os.environ.get("EMBRYO_RECORD_CACHE_BYTES", 64 * 1024 * 1024))
+
+# Callables notified with every new conception record
+_conception_listeners = []
+
+def add_conception_listener(listener):
+    """Call listener(record) for each conception record created in this process"""
+    if listener not in _conception_listeners:
+        _conception_listeners.append(listener)
+
+def remove_conception_listener(listener):
+    if listener in _conception_listeners:
+        _conception_listeners.remove(listener)
+
+TRAIT_NAMES = [
+    "learning_capacity", "pattern_recognition", "decision_making",
+    "memory_capacity", "adaptability", "social_interaction",
+    "task_specialization", "resource_management", "processing_speed",
+    "energy_efficiency", "error_tolerance", "parallel_processing"
+]
+
+SPECIALIZATIONS = [
+    "pattern_analysis", "decision_optimization", "multi_task_processing",
+    "collaborative_learning", "resource_optimization", "error_correction",
+    "adaptive_learning", "parallel_computation"
+]
+
+CAPABILITIES = [
+    "learning_potential", "adaptation_capacity",
+    "processing_capability", "social_capability"
+]
 
 class DigitalNucleotide:
     def __init__(self, value):
@@ -35,31 +79,32 @@ class DigitalNucleotide:
         return self
 
 class GeneticTrait:
-    def __init__(self, name, value, is_dominant=False, is_suppressed=False):
+    def __init__(self, name, value, is_dominant=False, is_suppressed=False, rng=None):
         self.name = name
         self.value = value
         self.is_dominant = is_dominant
         self.is_suppressed = is_suppressed
-        self.dna_sequence = self._generate_dna_sequence()
+        self.dna_sequence = self._generate_dna_sequence(rng or random)
     
-    def _generate_dna_sequence(self):
+    def _generate_dna_sequence(self, rng=random):
         """Generate DNA sequence representing the trait"""
         sequence_length = 8  # Each trait represented by 8 nucleotides
-        return [DigitalNucleotide(random.randint(0, 3)) for _ in range(sequence_length)]
+        return [DigitalNucleotide(rng.randint(0, 3)) for _ in range(sequence_length)]
     
     @classmethod
-    def from_parents(cls, parent1_trait, parent2_trait):
+    def from_parents(cls, parent1_trait, parent2_trait, rng=None):
         """Create a new trait by combining parent traits"""
+        rng = rng or random
         # Randomly select dominance and suppression from parents
-        is_dominant = random.choice([parent1_trait.is_dominant, parent2_trait.is_dominant])
-        is_suppressed = random.choice([parent1_trait.is_suppressed, parent2_trait.is_suppressed])
+        is_dominant = rng.choice([parent1_trait.is_dominant, parent2_trait.is_dominant])
+        is_suppressed = rng.choice([parent1_trait.is_suppressed, parent2_trait.is_suppressed])
         
         # Value inheritance with slight mutation
-        base_value = random.choice([parent1_trait.value, parent2_trait.value])
-        mutation = random.uniform(-0.2, 0.2)  # Allow small variations
+        base_value = rng.choice([parent1_trait.value, parent2_trait.value])
+        mutation = rng.uniform(-0.2, 0.2)  # Allow small variations
         new_value = max(1.5, min(3.0, base_value + mutation))
         
-        return cls(parent1_trait.name, round(new_value, 2), is_dominant, is_suppressed)
+        return cls(parent1_trait.name, round(new_value, 2), is_dominant, is_suppressed, rng)
 
 class GeneticDominanceHandler:
     def __init__(self):
@@ -78,18 +123,18 @@ class GeneticDominanceHandler:
             "parallel_processing": {"dominant": [2, 3], "recessive": [0, 1]}
         }
     
-    def determine_trait(self, trait1, trait2, specialization=None):
+    def determine_trait(self, trait1, trait2, specialization=None, rng=None):
         """Determine trait expression when combining two genetic traits"""
         if trait1.is_suppressed and trait2.is_suppressed:
-            return GeneticTrait(trait1.name, 0, False, True)
+            return GeneticTrait(trait1.name, 0, False, True, rng=rng)
             
         if trait1.is_suppressed:
-            return GeneticTrait(trait2.name, trait2.value, trait2.is_dominant, False)
+            return GeneticTrait(trait2.name, trait2.value, trait2.is_dominant, False, rng=rng)
         if trait2.is_suppressed:
-            return GeneticTrait(trait1.name, trait1.value, trait1.is_dominant, False)
+            return GeneticTrait(trait1.name, trait1.value, trait1.is_dominant, False, rng=rng)
             
         if specialization and specialization in self.specialization_dominance:
-            return self._determine_specialized_trait(trait1, trait2, specialization)
+            return self._determine_specialized_trait(trait1, trait2, specialization, rng)
             
         if trait1.is_dominant and trait2.is_dominant:
             # Co-dominance: average the values
@@ -97,31 +142,52 @@ class GeneticDominanceHandler:
                 trait1.name,
                 (trait1.value + trait2.value) / 2,
                 True,
-                False
+                False,
+                rng=rng
             )
         elif trait1.is_dominant:
-            return GeneticTrait(trait1.name, trait1.value, True, False)
+            return GeneticTrait(trait1.name, trait1.value, True, False, rng=rng)
         elif trait2.is_dominant:
-            return GeneticTrait(trait2.name, trait2.value, True, False)
+            return GeneticTrait(trait2.name, trait2.value, True, False, rng=rng)
         else:
             # Both recessive, take lower value
             return GeneticTrait(
                 trait1.name,
                 min(trait1.value, trait2.value),
                 False,
-                False
+                False,
+                rng=rng
             )
+    
+    def _determine_specialized_trait(self, trait1, trait2, specialization, rng=None):
+        """Let the trait whose DNA carries more of the favoured nucleotides win"""
+        dominant_values = self.specialization_dominance[specialization]["dominant"]
+        score1 = sum(1 for n in trait1.dna_sequence if n.value in dominant_values)
+        score2 = sum(1 for n in trait2.dna_sequence if n.value in dominant_values)
+        
+        if score1 == score2:
+            # Equally favoured sequences are co-dominant
+            return GeneticTrait(
+                trait1.name,
+                (trait1.value + trait2.value) / 2,
+                trait1.is_dominant or trait2.is_dominant,
+                False,
+                rng=rng
+            )
+        winner = trait1 if score1 > score2 else trait2
+        return GeneticTrait(winner.name, winner.value, True, False, rng=rng)
 
-def generate_genetic_data(parent1_data=None, parent2_data=None):
-    """Generate genetic traits either randomly or through inheritance"""
+@instrumented("generate_genetic_data")
+def generate_genetic_data(parent1_data=None, parent2_data=None, rng=None):
+    """Generate genetic traits either randomly or through inheritance
+    
+    rng is an optional random.Random for reproducible draws; the module
+    level random functions are used by default.
+    """
+    rng = rng or random
     dominance_handler = GeneticDominanceHandler()
     
-    trait_names = [
-        "learning_capacity", "pattern_recognition", "decision_making",
-        "memory_capacity", "adaptability", "social_interaction",
-        "task_specialization", "resource_management", "processing_speed",
-        "energy_efficiency", "error_tolerance", "parallel_processing"
-    ]
+    trait_names = TRAIT_NAMES
     
     if parent1_data and parent2_data:
         # Create traits through inheritance
@@ -130,24 +196,27 @@ def generate_genetic_data(parent1_data=None, parent2_data=None):
             parent1_trait = GeneticTrait(
                 name, 
                 parent1_data["combined_traits"][name],
-                random.random() > 0.5,
-                random.random() < 0.1
+                rng.random() > 0.5,
+                rng.random() < 0.1,
+                rng
             )
             parent2_trait = GeneticTrait(
                 name,
                 parent2_data["combined_traits"][name],
-                random.random() > 0.5,
-                random.random() < 0.1
+                rng.random() > 0.5,
+                rng.random() < 0.1,
+                rng
             )
-            traits[name] = GeneticTrait.from_parents(parent1_trait, parent2_trait)
+            traits[name] = GeneticTrait.from_parents(parent1_trait, parent2_trait, rng)
     else:
         # Generate random traits
         traits = {
             name: GeneticTrait(
                 name,
-                round(random.uniform(1.5, 3.0), 2),
-                random.random() > 0.5,
-                random.random() < 0.1
+                round(rng.uniform(1.5, 3.0), 2),
+                rng.random() > 0.5,
+                rng.random() < 0.1,
+                rng
             )
             for name in trait_names
         }
@@ -158,52 +227,48 @@ def generate_genetic_data(parent1_data=None, parent2_data=None):
         # Create a second trait for combination
         second_trait = GeneticTrait(
             name,
-            round(random.uniform(1.5, 3.0), 2),
-            random.random() > 0.5,
-            random.random() < 0.1
+            round(rng.uniform(1.5, 3.0), 2),
+            rng.random() > 0.5,
+            rng.random() < 0.1,
+            rng
         )
-        combined_trait = dominance_handler.determine_trait(trait, second_trait, name)
+        combined_trait = dominance_handler.determine_trait(trait, second_trait, name, rng)
         combined_traits[name] = combined_trait.value
     
     # Inherit or generate specializations
     if parent1_data and parent2_data:
         # Combine specializations from parents with possible mutations
         all_specializations = set(parent1_data["specializations"] + parent2_data["specializations"])
-        num_specializations = random.randint(2, min(4, len(all_specializations)))
-        specializations = random.sample(list(all_specializations), num_specializations)
+        num_specializations = rng.randint(2, min(4, len(all_specializations)))
+        specializations = rng.sample(list(all_specializations), num_specializations)
     else:
-        specializations = random.sample([
-            "pattern_analysis", "decision_optimization", "multi_task_processing",
-            "collaborative_learning", "resource_optimization", "error_correction",
-            "adaptive_learning", "parallel_computation"
-        ], k=random.randint(2, 4))
+        specializations = rng.sample(SPECIALIZATIONS, k=rng.randint(2, 4))
     
     # Generate or inherit potential capabilities
     if parent1_data and parent2_data:
         potential_capabilities = {}
-        for capability in ["learning_potential", "adaptation_capacity", 
-                         "processing_capability", "social_capability"]:
+        for capability in CAPABILITIES:
             # Average parents' values with small random variation
             base_value = (parent1_data["potential_capabilities"][capability] + 
                          parent2_data["potential_capabilities"][capability]) / 2
-            variation = random.uniform(-0.2, 0.2)
+            variation = rng.uniform(-0.2, 0.2)
             potential_capabilities[capability] = round(
                 max(2.0, min(3.0, base_value + variation)), 
                 2
             )
     else:
         potential_capabilities = {
-            "learning_potential": round(random.uniform(2.0, 3.0), 2),
-            "adaptation_capacity": round(random.uniform(2.0, 3.0), 2),
-            "processing_capability": round(random.uniform(2.0, 3.0), 2),
-            "social_capability": round(random.uniform(2.0, 3.0), 2)
+            "learning_potential": round(rng.uniform(2.0, 3.0), 2),
+            "adaptation_capacity": round(rng.uniform(2.0, 3.0), 2),
+            "processing_capability": round(rng.uniform(2.0, 3.0), 2),
+            "social_capability": round(rng.uniform(2.0, 3.0), 2)
         }
     
     return {
         "combined_traits": combined_traits,
         "specializations": specializations,
         "potential_capabilities": potential_capabilities,
-        "growth_rate": round(random.uniform(0.1, 0.2), 2),
+        "growth_rate": round(rng.uniform(0.1, 0.2), 2),
         "dna_information": {
             "mutation_rates": {
                 "point": 0.001,
@@ -223,8 +288,16 @@ def generate_genetic_data(parent1_data=None, parent2_data=None):
         }
     }
 
-def create_conception_record(embryo_id, genetic_data, parent1_id=None, parent2_id=None):
-    """Create a record of the conception with optional parent information"""
+@instrumented("create_conception_record")
+def create_conception_record(embryo_id, genetic_data, parent1_id=None, parent2_id=None,
+                             records_dir="conception_records", storage=None,
+                             parents_data=None):
+    """Create a record of the conception with optional parent information
+
+    parents_data holds both parents' genetic data, for content storage
+    to encode the child against. Raises FileExistsError rather than
+    overwrite an existing record.
+    """
     record = {
         "embryo_id": embryo_id,
         "conception_time": datetime.now().isoformat(),
@@ -235,34 +308,163 @@ def create_conception_record(embryo_id, genetic_data, parent1_id=None, parent2_i
         } if parent1_id and parent2_id else None
     }
     
-    records_dir = Path("conception_records")
+    records_dir = Path(records_dir)
     records_dir.mkdir(exist_ok=True)
     
     record_file = records_dir / f"conception_{embryo_id}.json"
-    record_file.write_text(json.dumps(record, indent=2))
+    if (storage or RECORD_STORAGE) == "content":
+        store = genome_store.store_for(records_dir)
+        parents = dict(zip((parent1_id, parent2_id), parents_data)) if parents_data else None
+        manifest = dict(record, genetic_data=store.encode_genetic_data(genetic_data, parents))
+        record_io.write(record_file, manifest, exclusive=True)
+        record_cache.put(embryo_id, record, records_dir, size=len(record_io.dumps(record, "compact")))
+    else:
+        record_io.write(record_file, record, exclusive=True)
+        record_cache.put(embryo_id, record, records_dir)
+    
+    # The record is already written; a failing listener must not fail the conception
+    for listener in list(_conception_listeners):
+        try:
+            listener(record)
+        except Exception as e:
+            print(f"Warning: Conception listener failed for {embryo_id}: {type(e).__name__}: {e}")
+
+class RecordCache:
+    """Process-wide LRU of parsed conception records, bounded by record size
+    
+    Entries remember the file's mtime and size and are reloaded when the
+    record changes on disk. Cached records are shared: do not mutate them.
+    """
+    def __init__(self, max_bytes=RECORD_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _key(embryo_id, records_dir):
+        return (os.path.abspath(records_dir), embryo_id)
+    
+    def get(self, embryo_id, records_dir="conception_records"):
+        key = self._key(embryo_id, records_dir)
+        record_file = record_io.locate(Path(key[0]) / f"conception_{embryo_id}.json")
+        stat = os.stat(record_file)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                instrumentation.count("record_cache.hits")
+                return entry[2]
+            self.misses += 1
+        instrumentation.count("record_cache.misses")
+        
+        with open(record_file, "rb") as f:
+            data = f.read()
+        raw = record_io.loads(data)
+        record = genome_store.expand_record(raw, records_dir)
+        # Manifests and compressed records expand to more than their file size
+        if record is raw and not record_io.is_binary(data):
+            size = len(data)
+        else:
+            size = len(record_io.dumps(record, "compact"))
+        self._store(key, stamp, record, size)
+        return record
+    
+    def put(self, embryo_id, record, records_dir="conception_records", size=None):
+        """Remember a record just written, so children of new embryos skip the read"""
+        key = self._key(embryo_id, records_dir)
+        stat = os.stat(record_io.locate(Path(key[0]) / f"conception_{embryo_id}.json"))
+        self._store(key, (stat.st_mtime_ns, stat.st_size), record, size or stat.st_size)
+    
+    def _store(self, key, stamp, record, size):
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= previous[1]
+            self._entries[key] = (stamp, size, record)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+    
+    def invalidate(self, embryo_id=None, records_dir="conception_records"):
+        """Forget one record, or everything when no ID is given"""
+        with self._lock:
+            if embryo_id is None:
+                self._entries.clear()
+                self.total_bytes = 0
+                return
+            entry = self._entries.pop(self._key(embryo_id, records_dir), None)
+            if entry is not None:
+                self.total_bytes -= entry[1]
+    
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self.total_bytes,
+                    "max_bytes": self.max_bytes, "hits": self.hits, "misses": self.misses}
+
+record_cache = RecordCache()
+
+def load_conception_record(embryo_id, records_dir="conception_records"):
+    """Read a conception record through the record cache (do not mutate it)"""
+    return record_cache.get(embryo_id, records_dir)
+
+def prefetch_parents(pairs, records_dir="conception_records"):
+    """Load every distinct parent of a batch of pairs once
+    
+    Returns the genetic data by embryo ID; parents without a record are
+    left out.
+    """
+    parent_ids = sorted({parent_id for pair in pairs for parent_id in pair if parent_id})
+    parents = {}
+    for parent_id in parent_ids:
+        try:
+            parents[parent_id] = record_cache.get(parent_id, records_dir)["genetic_data"]
+        except FileNotFoundError:
+            continue
+    return parents
 
-def conceive_embryo(parent1_id=None, parent2_id=None):
-    """Create a new embryo either randomly or from parents"""
-    embryo_id = str(uuid.uuid4())[:8]
+@instrumented("conceive_embryo")
+def conceive_embryo(parent1_id=None, parent2_id=None, embryo_id=None,
+                    records_dir="conception_records", parents_data=None, rng=None):
+    """Create a new embryo either randomly or from parents
     
+    parents_data may carry both parents' genetic data when the caller
+    already holds it (e.g. a shared population table), skipping the reads.
+    rng is passed on to generate_genetic_data. A generated ID that is
+    already taken is replaced; a given one raises FileExistsError.
+    """
     # Load parent data if provided
     parent1_data = None
     parent2_data = None
     
-    if parent1_id and parent2_id:
-        records_dir = Path("conception_records")
+    if parent1_id and parent2_id and parents_data:
+        parent1_data, parent2_data = parents_data
+    elif parent1_id and parent2_id:
         try:
-            with open(records_dir / f"conception_{parent1_id}.json") as f:
-                parent1_data = json.loads(f)["genetic_data"]
-            with open(records_dir / f"conception_{parent2_id}.json") as f:
-                parent2_data = json.loads(f)["genetic_data"]
+            parent1_data = load_conception_record(parent1_id, records_dir)["genetic_data"]
+            parent2_data = load_conception_record(parent2_id, records_dir)["genetic_data"]
         except FileNotFoundError:
             print("Warning: Parent data not found, generating random embryo")
     
-    genetic_data = generate_genetic_data(parent1_data, parent2_data)
-    create_conception_record(embryo_id, genetic_data, parent1_id, parent2_id)
-    
-    return embryo_id
+    genetic_data = generate_genetic_data(parent1_data, parent2_data, rng)
+    while True:
+        new_id = embryo_id or str(uuid.uuid4())[:8]
+        try:
+            create_conception_record(
+                new_id, genetic_data, parent1_id, parent2_id, records_dir,
+                parents_data=(parent1_data, parent2_data) if parent1_data else None)
+        except FileExistsError:
+            if embryo_id:
+                raise
+            continue
+        return new_id
 
 if __name__ == "__main__":
     # Example usage
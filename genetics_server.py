@@ -0,0 +1,415 @@
+# genetics_server.py
+"""Local asyncio HTTP/JSON service for conception and training
+
+Endpoints (all JSON):
+    GET  /health
+    POST /conceive          {"parent1_id": ..., "parent2_id": ...}   (parents optional,
+                            404 unless both have conception records)
+    POST /conceive/batch    {"count": N} or {"pairs": [[p1, p2], ...]}
+    POST /evaluate          {"embryo_id": ...}
+    POST /curriculum        {"embryo_id": ...}
+    POST /train             {"embryo_id": ..., "program": ..., "include_log": false}
+
+CPU-bound work runs in a process pool whose workers load the genetics
+and school modules once. Single conceive requests arriving close
+together are grouped into one pool task, and requests beyond
+--max-pending are refused with 503 instead of queueing without bound;
+each conception in a batch request counts as one pending request.
+"""
+import argparse
+import asyncio
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+import embryo_services
+import instrumentation
+import record_io
+
+MAX_BODY_BYTES = 1 << 20
+MAX_HEADERS = 100
+# Most conceptions one /conceive/batch request may ask for
+MAX_BATCH = 1024
+
+# -- worker process side -------------------------------------------------
+
+_worker_services: Optional[embryo_services.EmbryoServices] = None
+
+
+def _init_worker(data_dir: str, instrument: bool = False):
+    """Warm a pool worker: set its data directory and load modules once"""
+    global _worker_services
+    os.chdir(data_dir)
+    instrumentation.init_worker(instrument)
+    _worker_services = embryo_services.EmbryoServices()
+    embryo_services.genetics()
+    _worker_services.school
+
+
+def _conceive_many(pairs: List[Tuple[Optional[str], Optional[str]]]) -> List[Any]:
+    """Conceive one embryo per (parent1, parent2) pair; errors are returned per item"""
+    genetics = embryo_services.genetics()
+    genetics.prefetch_parents(pairs)
+    results = []
+    for parent1_id, parent2_id in pairs:
+        try:
+            results.append({"embryo_id": genetics.conceive_embryo(parent1_id, parent2_id)})
+        except Exception as e:
+            results.append({"error": f"{type(e).__name__}: {e}"})
+    return results
+
+
+def _evaluate(embryo_id: str) -> Dict[str, Any]:
+    embryo = _worker_services.load_embryo(embryo_id)
+    return _worker_services.school.evaluate_embryo(embryo)
+
+
+def _curriculum(embryo_id: str) -> Dict[str, Any]:
+    embryo = _worker_services.load_embryo(embryo_id)
+    return _worker_services.school.create_curriculum(embryo)
+
+
+def _train(embryo_id: str, program: str, include_log: bool) -> Dict[str, Any]:
+    school = _worker_services.school
+    # Training mutates the embryo, so never reuse a cached instance
+    embryo = school.load_embryo(_worker_services.embryo_file(embryo_id))
+    _worker_services.forget_embryo(embryo_id)
+    record = school.train_embryo(embryo, program)
+    if not include_log:
+        record = {k: v for k, v in record.items() if k != "training_log"}
+    return record
+
+
+# -- event loop side -----------------------------------------------------
+
+class HTTPError(Exception):
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class ConceptionBatcher:
+    """Group single conception requests into pool-sized batches"""
+
+    def __init__(self, server: "GeneticsServer", batch_size: int, window: float):
+        self.server = server
+        self.batch_size = batch_size
+        self.window = window
+        self.pending: List[Tuple[Tuple, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+
+    def submit(self, pair) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((pair, future))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window, self.flush)
+        return future
+
+    def flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self.pending = self.pending, []
+        if batch:
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch):
+        try:
+            results = await self.server.offload(_conceive_many, [pair for pair, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+
+class GeneticsServer:
+    def __init__(self, data_dir=".", workers: int = None, batch_size: int = 64,
+                 batch_window: float = 0.005, max_pending: int = 1024,
+                 max_batch: int = MAX_BATCH):
+        self.data_dir = str(Path(data_dir).resolve())
+        self.workers = workers or os.cpu_count() or 1
+        # Workers are instrumented when the server is and report back per task
+        self.instrument = instrumentation.is_enabled()
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                        initargs=(self.data_dir, self.instrument))
+        self.batcher = ConceptionBatcher(self, batch_size, batch_window)
+        self.max_pending = max_pending
+        self.max_batch = max_batch
+        self.in_flight = 0
+        self.routes = {
+            ("GET", "/health"): self.handle_health,
+            ("POST", "/conceive"): self.handle_conceive,
+            ("POST", "/conceive/batch"): self.handle_conceive_batch,
+            ("POST", "/evaluate"): self.handle_evaluate,
+            ("POST", "/curriculum"): self.handle_curriculum,
+            ("POST", "/train"): self.handle_train,
+        }
+
+    async def offload(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        if not self.instrument:
+            return await loop.run_in_executor(self.pool, fn, *args)
+        result, stats = await loop.run_in_executor(self.pool, instrumentation.call_and_drain,
+                                                   fn, *args)
+        instrumentation.merge(stats)
+        return result
+
+    # -- handlers ------------------------------------------------------
+
+    async def handle_health(self, body):
+        return {"status": "ok", "in_flight": self.in_flight,
+                "queued_conceptions": len(self.batcher.pending)}
+
+    async def handle_conceive(self, body):
+        parents = (body.get("parent1_id"), body.get("parent2_id"))
+        if parents != (None, None) and not all(isinstance(p, str) and p for p in parents):
+            raise HTTPError(HTTPStatus.BAD_REQUEST,
+                            "parent1_id and parent2_id must both be given as strings")
+        self._check_parents([parents])
+        result = await self.batcher.submit(parents)
+        if "error" in result:
+            raise HTTPError(HTTPStatus.INTERNAL_SERVER_ERROR, result["error"])
+        return result
+
+    async def handle_conceive_batch(self, body):
+        pairs = self._batch_pairs(body)
+        if not pairs:
+            return {"results": []}
+        self._check_parents(pairs)
+
+        # The request itself is already counted in in_flight
+        extra = len(pairs) - 1
+        if self.in_flight + extra > self.max_pending:
+            raise HTTPError(HTTPStatus.SERVICE_UNAVAILABLE, "Server busy, retry later")
+        self.in_flight += extra
+        try:
+            # Split large batches across workers
+            size = max(1, -(-len(pairs) // self.workers))
+            chunks = [pairs[i:i + size] for i in range(0, len(pairs), size)]
+            chunk_results = await asyncio.gather(*(self.offload(_conceive_many, c)
+                                                   for c in chunks))
+        finally:
+            self.in_flight -= extra
+        return {"results": [r for chunk in chunk_results for r in chunk]}
+
+    def _batch_pairs(self, body) -> List[Tuple[Optional[str], Optional[str]]]:
+        """Validated parent pairs of a batch request, at most max_batch of them"""
+        limit = min(self.max_batch, self.max_pending)
+        if "pairs" in body:
+            pairs = body["pairs"]
+            if not isinstance(pairs, list):
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "pairs must be a list")
+            if any(not isinstance(pair, list) or len(pair) != 2
+                   or not all(isinstance(p, str) and p for p in pair) for pair in pairs):
+                raise HTTPError(HTTPStatus.BAD_REQUEST,
+                                "pairs must be [parent1_id, parent2_id] lists of strings")
+            count = len(pairs)
+        else:
+            try:
+                count = int(body.get("count", 1))
+            except (TypeError, ValueError):
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "count must be an integer")
+            if count < 0:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "count must not be negative")
+            pairs = None
+        if count > limit:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"at most {limit} conceptions per batch")
+        return [tuple(pair) for pair in pairs] if pairs is not None else [(None, None)] * count
+
+    async def handle_evaluate(self, body):
+        return await self.offload(_evaluate, self._embryo_id(body))
+
+    async def handle_curriculum(self, body):
+        return await self.offload(_curriculum, self._embryo_id(body))
+
+    async def handle_train(self, body):
+        program = body.get("program")
+        if not program:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "program is required")
+        try:
+            return await self.offload(_train, self._embryo_id(body), program,
+                                      bool(body.get("include_log", False)))
+        except ValueError as e:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, str(e))
+
+    def _check_parents(self, pairs):
+        """Refuse with 404 unless every named parent has a conception record"""
+        records_dir = Path(self.data_dir) / "conception_records"
+        for embryo_id in sorted({p for pair in pairs for p in pair if p is not None}):
+            if "/" in embryo_id or "\\" in embryo_id or not record_io.exists(
+                    records_dir / f"conception_{embryo_id}.json"):
+                raise HTTPError(HTTPStatus.NOT_FOUND, f"Unknown parent: {embryo_id}")
+
+    def _embryo_id(self, body) -> str:
+        embryo_id = body.get("embryo_id")
+        if not embryo_id:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "embryo_id is required")
+        if not (Path(self.data_dir) / "embryos" / f"embryo_{embryo_id}.py").exists():
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"Unknown embryo: {embryo_id}")
+        return embryo_id
+
+    # -- HTTP plumbing -------------------------------------------------
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._respond(writer, HTTPStatus.BAD_REQUEST,
+                                        {"error": "Malformed request line"}, False)
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    if len(headers) >= MAX_HEADERS:
+                        await self._respond(writer, HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE,
+                                            {"error": "Too many headers"}, False)
+                        return
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = (headers.get("connection", "").lower() != "close"
+                              and version == "HTTP/1.1")
+                # The body cannot be skipped reliably after a bad header, so
+                # these errors close the connection
+                try:
+                    length = self._content_length(headers)
+                except HTTPError as e:
+                    await self._respond(writer, e.status, {"error": str(e)}, False)
+                    break
+                raw_body = await reader.readexactly(length) if length else b""
+
+                status, payload = await self.dispatch(method, target.split("?")[0], raw_body)
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        except (asyncio.LimitOverrunError, ValueError):
+            # A request or header line longer than the stream limit
+            await self._respond_quietly(writer, HTTPStatus.BAD_REQUEST,
+                                        {"error": "Request line or header too long"})
+        except Exception as e:
+            await self._respond_quietly(writer, HTTPStatus.INTERNAL_SERVER_ERROR,
+                                        {"error": f"{type(e).__name__}: {e}"})
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionResetError, BrokenPipeError):
+                pass
+
+    async def dispatch(self, method: str, path: str, raw_body: bytes):
+        handler = self.routes.get((method, path))
+        if handler is None:
+            return HTTPStatus.NOT_FOUND, {"error": f"No route for {method} {path}"}
+
+        # Backpressure: refuse work rather than let the queue grow unbounded
+        if self.in_flight >= self.max_pending and path != "/health":
+            return HTTPStatus.SERVICE_UNAVAILABLE, {"error": "Server busy, retry later"}
+
+        try:
+            body = json.loads(raw_body) if raw_body else {}
+            if not isinstance(body, dict):
+                raise ValueError("request body must be a JSON object")
+        except ValueError as e:
+            return HTTPStatus.BAD_REQUEST, {"error": f"Invalid JSON: {e}"}
+
+        self.in_flight += 1
+        try:
+            return HTTPStatus.OK, await handler(body)
+        except HTTPError as e:
+            return e.status, {"error": str(e)}
+        except Exception as e:
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(e).__name__}: {e}"}
+        finally:
+            self.in_flight -= 1
+
+    @staticmethod
+    def _content_length(headers: Dict[str, str]) -> int:
+        """Validated body length of a request"""
+        if "transfer-encoding" in headers:
+            raise HTTPError(HTTPStatus.NOT_IMPLEMENTED, "Transfer-Encoding is not supported")
+        value = headers.get("content-length", "") or "0"
+        if not (value.isascii() and value.isdigit()):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"Invalid Content-Length: {value!r}")
+        length = int(value)
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large")
+        return length
+
+    async def _respond_quietly(self, writer, status: HTTPStatus, payload):
+        """Send a closing error response unless the client is already gone"""
+        try:
+            await self._respond(writer, status, payload, False)
+        except (ConnectionResetError, BrokenPipeError):
+            pass
+
+    async def _respond(self, writer, status: HTTPStatus, payload, keep_alive: bool):
+        body = json.dumps(payload).encode()
+        head = [f"HTTP/1.1 {status.value} {status.phrase}",
+                "Content-Type: application/json",
+                f"Content-Length: {len(body)}",
+                f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        if status == HTTPStatus.SERVICE_UNAVAILABLE:
+            head.append("Retry-After: 1")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    async def serve(self, host: str, port: int):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        addresses = ", ".join(str(s.getsockname()) for s in server.sockets)
+        print(f"Genetics service listening on {addresses}", flush=True)
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local conception and training service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--data-dir", default=".",
+                        help="directory holding embryos/ and conception_records/")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--batch-size", type=int, default=64,
+                        help="single conceptions grouped per pool task")
+    parser.add_argument("--batch-window-ms", type=float, default=5.0,
+                        help="how long to wait for a conception batch to fill")
+    parser.add_argument("--max-pending", type=int, default=1024,
+                        help="requests in flight before answering 503")
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH,
+                        help="most conceptions in one /conceive/batch request")
+    args = parser.parse_args()
+
+    server = GeneticsServer(args.data_dir, args.workers, args.batch_size,
+                            args.batch_window_ms / 1000, args.max_pending, args.max_batch)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+# genome_index.py
+"""Genome similarity search over packed 2-bit trait sequences
+
+Every trait sequence is 8 nucleotides of 2 bits, so it packs into one
+16-bit word and a genome into a row of 12 words. The distance between
+two genomes is the number of differing nucleotides: XOR the words, fold
+each 2-bit symbol onto its low bit and popcount, optionally weighting
+each trait. Queries scan the whole population as NumPy array operations.
+"""
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+import numpy as np
+
+import embryo_services
+import genome_store
+import record_io
+
+NUCLEOTIDES_PER_TRAIT = 8
+LOW_BITS = 0x5555
+
+if hasattr(np, "bitwise_count"):
+    def _popcount16(values):
+        return np.bitwise_count(values)
+else:
+    _POPCOUNT16 = np.array([bin(i).count("1") for i in range(1 << 16)], dtype=np.uint8)
+
+    def _popcount16(values):
+        return _POPCOUNT16[values]
+
+
+def trait_names() -> List[str]:
+    return embryo_services.genetics().TRAIT_NAMES
+
+
+def pack_sequence(sequence: List[int]) -> int:
+    """Pack a trait's nucleotide values (0-3) into one 16-bit word"""
+    word = 0
+    for position, value in enumerate(sequence[:NUCLEOTIDES_PER_TRAIT]):
+        word |= (value & 0b11) << (2 * position)
+    return word
+
+
+def unpack_sequence(word: int) -> List[int]:
+    return [(word >> (2 * position)) & 0b11 for position in range(NUCLEOTIDES_PER_TRAIT)]
+
+
+def pack_genome(trait_sequences: Dict[str, List[int]], names: List[str] = None) -> np.ndarray:
+    """Pack a dna_information.trait_sequences mapping into a row of words"""
+    names = names or trait_names()
+    return np.array([pack_sequence(trait_sequences[name]) for name in names], dtype=np.uint16)
+
+
+def symbol_mismatches(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Per-trait count of differing nucleotides between packed words"""
+    diff = np.bitwise_xor(a, b)
+    folded = (diff | (diff >> 1)) & LOW_BITS
+    return _popcount16(folded)
+
+
+class GenomeIndex:
+    """Packed genomes of a whole population with Hamming-distance queries"""
+
+    def __init__(self, names: List[str] = None, capacity: int = 1024):
+        self.trait_names = list(names or trait_names())
+        self.trait_index = {name: i for i, name in enumerate(self.trait_names)}
+        self.genomes = np.zeros((capacity, len(self.trait_names)), dtype=np.uint16)
+        self.embryo_ids: List[str] = []
+        self.positions: Dict[str, int] = {}
+
+    def __len__(self):
+        return len(self.embryo_ids)
+
+    # -- building ------------------------------------------------------
+
+    def _reserve(self, extra: int):
+        needed = len(self) + extra
+        if needed > len(self.genomes):
+            grown = np.zeros((max(needed, 2 * len(self.genomes)), len(self.trait_names)),
+                             dtype=np.uint16)
+            grown[:len(self)] = self.genomes[:len(self)]
+            self.genomes = grown
+
+    def add(self, embryo_id: str, trait_sequences: Dict[str, List[int]]):
+        """Add or replace one embryo's genome"""
+        row = pack_genome(trait_sequences, self.trait_names)
+        if embryo_id in self.positions:
+            self.genomes[self.positions[embryo_id]] = row
+            return
+        self._reserve(1)
+        self.genomes[len(self)] = row
+        self.positions[embryo_id] = len(self)
+        self.embryo_ids.append(embryo_id)
+
+    def add_packed(self, embryo_ids: List[str], packed: np.ndarray):
+        """Append many already packed genomes at once"""
+        self._reserve(len(embryo_ids))
+        start = len(self)
+        self.genomes[start:start + len(embryo_ids)] = packed
+        for offset, embryo_id in enumerate(embryo_ids):
+            self.positions[embryo_id] = start + offset
+        self.embryo_ids.extend(embryo_ids)
+
+    def add_record(self, record: Dict[str, Any]) -> bool:
+        """Add a conception record; records without trait sequences are skipped"""
+        sequences = record.get("genetic_data", {}).get("dna_information", {}).get("trait_sequences")
+        if not sequences:
+            return False
+        self.add(record["embryo_id"], sequences)
+        return True
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]]) -> "GenomeIndex":
+        index = cls()
+        for record in records:
+            index.add_record(record)
+        return index
+
+    @classmethod
+    def from_records_dir(cls, records_dir="conception_records") -> "GenomeIndex":
+        """Build an index from every conception record in a directory"""
+        def records():
+            for record_file in record_io.glob(records_dir, "conception_*"):
+                yield genome_store.expand_record(record_io.read(record_file), records_dir)
+        return cls.from_records(records())
+
+    def save(self, path):
+        """Persist the packed index as a compressed .npz file"""
+        np.savez_compressed(path, genomes=self.genomes[:len(self)],
+                            embryo_ids=np.array(self.embryo_ids),
+                            trait_names=np.array(self.trait_names))
+
+    @classmethod
+    def load(cls, path) -> "GenomeIndex":
+        data = np.load(path)
+        index = cls([str(name) for name in data["trait_names"]], capacity=1)
+        index.add_packed([str(i) for i in data["embryo_ids"]], data["genomes"])
+        return index
+
+    # -- queries -------------------------------------------------------
+
+    def _query_row(self, query) -> np.ndarray:
+        if isinstance(query, str):
+            return self.genomes[self.positions[query]]
+        if isinstance(query, np.ndarray):
+            return query.astype(np.uint16)
+        return pack_genome(query, self.trait_names)
+
+    def _weight_vector(self, weights: Optional[Dict[str, float]]) -> Optional[np.ndarray]:
+        """Per-trait weights; traits the mapping leaves out keep weight 1"""
+        if weights is None:
+            return None
+        vector = np.ones(len(self.trait_names))
+        for name, weight in weights.items():
+            if name not in self.trait_index:
+                raise ValueError(f"Unknown trait: {name}")
+            vector[self.trait_index[name]] = weight
+        return vector
+
+    def distances(self, query, weights: Dict[str, float] = None) -> np.ndarray:
+        """Distance from a query genome (embryo ID, trait_sequences or packed row) to everyone
+
+        weights scales individual traits, e.g. {"memory_capacity": 2} or 0
+        to ignore a trait; unlisted traits count once.
+        """
+        per_trait = symbol_mismatches(self.genomes[:len(self)], self._query_row(query))
+        vector = self._weight_vector(weights)
+        if vector is None:
+            return per_trait.sum(axis=1, dtype=np.int64)
+        return per_trait @ vector
+
+    def nearest(self, query, k: int = 10, weights: Dict[str, float] = None,
+                exclude_self: bool = True) -> List[Tuple[str, float]]:
+        """Top-k most similar embryos as (embryo_id, distance), closest first"""
+        distances = self.distances(query, weights).astype(float)
+        if exclude_self and isinstance(query, str) and query in self.positions:
+            distances[self.positions[query]] = np.inf
+        k = min(k, len(distances))
+        if k <= 0:
+            return []
+        candidates = np.argpartition(distances, k - 1)[:k]
+        candidates = candidates[np.argsort(distances[candidates], kind="stable")]
+        return [(self.embryo_ids[i], float(distances[i]))
+                for i in candidates if np.isfinite(distances[i])]
+
+    def within(self, query, radius: float, weights: Dict[str, float] = None,
+               exclude_self: bool = True) -> List[Tuple[str, float]]:
+        """Every embryo within `radius` of the query, closest first"""
+        distances = self.distances(query, weights)
+        hits = np.flatnonzero(distances <= radius)
+        hits = hits[np.argsort(distances[hits], kind="stable")]
+        skip = self.positions.get(query) if exclude_self and isinstance(query, str) else None
+        return [(self.embryo_ids[i], float(distances[i])) for i in hits if i != skip]
+
+    def near_duplicates(self, radius: int = 0) -> List[Tuple[str, str, int]]:
+        """All pairs differing in at most `radius` nucleotides
+
+        Pigeonhole filter: split the traits into radius + 1 blocks; two
+        genomes within the radius match exactly on at least one block, so
+        only rows sharing a block are compared.
+        """
+        n_traits = len(self.trait_names)
+        if radius >= n_traits:
+            raise ValueError(f"radius must be below {n_traits} for block filtering")
+        genomes = np.ascontiguousarray(self.genomes[:len(self)])
+        blocks = np.array_split(np.arange(n_traits), radius + 1)
+
+        pairs = set()
+        for block in blocks:
+            keys = np.ascontiguousarray(genomes[:, block]).view(
+                np.dtype((np.void, genomes.dtype.itemsize * len(block)))).ravel()
+            order = np.argsort(keys, kind="stable")
+            sorted_keys = keys[order]
+            boundaries = np.flatnonzero(sorted_keys[1:] != sorted_keys[:-1]) + 1
+            for group in np.split(order, boundaries):
+                if len(group) < 2:
+                    continue
+                group = np.sort(group)
+                for offset, i in enumerate(group[:-1]):
+                    others = group[offset + 1:]
+                    dist = symbol_mismatches(genomes[others], genomes[i]).sum(axis=1)
+                    for j in others[dist <= radius]:
+                        pairs.add((int(i), int(j)))
+
+        result = []
+        for i, j in sorted(pairs):
+            dist = int(symbol_mismatches(genomes[i], genomes[j]).sum())
+            result.append((self.embryo_ids[i], self.embryo_ids[j], dist))
+        return result
+
+    def diversity(self, sample_pairs: int = 100_000, seed: int = 0) -> Dict[str, Any]:
+        """Mean pairwise distance overall and per trait from random pairs"""
+        n = len(self)
+        if n < 2:
+            return {"mean_distance": 0.0, "per_trait": {}, "pairs": 0}
+        rng = np.random.default_rng(seed)
+        a = rng.integers(0, n, sample_pairs)
+        b = rng.integers(0, n, sample_pairs)
+        keep = a != b
+        per_trait = symbol_mismatches(self.genomes[a[keep]], self.genomes[b[keep]])
+        means = per_trait.mean(axis=0)
+        return {
+            "mean_distance": float(per_trait.sum(axis=1).mean()),
+            "per_trait": {name: float(means[i]) for i, name in enumerate(self.trait_names)},
+            "pairs": int(keep.sum())
+        }
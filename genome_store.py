@@ -0,0 +1,338 @@
+# genome_store.py
+"""Content-addressed storage for conception genetic data
+
+In content-addressed mode a conception record stores each block of its
+genetic data in the cheapest of three ways:
+
+- Blocks that recur across the population (specializations, mutation
+  rates) are stored once in an append-only pack file keyed by their
+  hash. A block goes to the pack when it is seen a second time, and
+  only if it is larger than the reference to it.
+- Per-child blocks (combined traits, capabilities, trait sequences) are
+  stored as edits against a parent's block when the edits are smaller
+  than the block, and inline otherwise.
+- Everything else is stored inline.
+
+Delta chains are capped at MAX_DELTA_CHAIN records, so decoding a block
+reads at most that many ancestors.
+
+    objects.pack   one canonical JSON object per line
+    objects.idx    "<hash> <offset> <length>" per object, append-only
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+import record_io
+
+ENCODING = "content-addressed"
+BLOCK_KEYS = ("combined_traits", "specializations", "potential_capabilities")
+DNA_BLOCK_KEYS = ("mutation_rates", "trait_sequences")
+# Blocks drawn from a small set of values, worth storing once in the pack
+SHARED_KEYS = ("specializations", "mutation_rates")
+# Blocks unique to each child, stored inline or as edits against a parent
+DELTA_KEYS = ("combined_traits", "potential_capabilities", "trait_sequences")
+MAX_DELTA_CHAIN = 8
+
+DIGEST_SIZE = 12
+# Bytes a hash reference takes in a record: the quoted hex digest
+REF_BYTES = 2 * DIGEST_SIZE + 2
+
+
+def canonical(obj) -> bytes:
+    return json.dumps(obj, sort_keys=True, separators=(",", ":")).encode()
+
+
+def object_hash(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=DIGEST_SIZE).hexdigest()
+
+
+class GenomeStore:
+    """Append-only, deduplicating object store with a decoded-object cache"""
+
+    def __init__(self, root, cache_size: int = 65536):
+        self.root = Path(root)
+        self.pack_file = self.root / "objects.pack"
+        self.index_file = self.root / "objects.idx"
+        self.index: Dict[str, Tuple[int, int]] = {}
+        self._index_read_to = 0
+        self._cache: "OrderedDict[Any, Any]" = OrderedDict()
+        # Hashes of shared blocks stored inline so far
+        self._sightings: "OrderedDict[str, None]" = OrderedDict()
+        self.cache_size = cache_size
+        self._lock = threading.RLock()
+        self._refresh_index()
+
+    # -- objects -------------------------------------------------------
+
+    def _refresh_index(self):
+        """Pick up objects appended by other processes since the last read"""
+        if not self.index_file.exists():
+            return
+        with open(self.index_file, "rb") as f:
+            f.seek(self._index_read_to)
+            data = f.read()
+        complete = data.rfind(b"\n") + 1
+        for line in data[:complete].splitlines():
+            digest, offset, length = line.split()
+            self.index[digest.decode()] = (int(offset), int(length))
+        self._index_read_to += complete
+
+    def _append(self, path: Path, data: bytes) -> int:
+        """Append bytes in one write and return the offset they landed at"""
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, data)
+            return os.lseek(fd, 0, os.SEEK_CUR) - len(data)
+        finally:
+            os.close(fd)
+
+    def put(self, obj) -> str:
+        """Store an object (deduplicated) and return its hash"""
+        data = canonical(obj)
+        digest = object_hash(data)
+        with self._lock:
+            if digest in self.index:
+                return digest
+            self.root.mkdir(parents=True, exist_ok=True)
+            offset = self._append(self.pack_file, data + b"\n")
+            self._append(self.index_file, f"{digest} {offset} {len(data)}\n".encode())
+            self.index[digest] = (offset, len(data))
+            self._remember(digest, obj)
+        return digest
+
+    def get(self, digest: str):
+        """Return a stored object; callers must not mutate it"""
+        with self._lock:
+            if digest in self._cache:
+                self._cache.move_to_end(digest)
+                return self._cache[digest]
+            if digest not in self.index:
+                self._refresh_index()
+            if digest not in self.index:
+                raise KeyError(f"Object {digest} not found in {self.pack_file}")
+            offset, length = self.index[digest]
+        with open(self.pack_file, "rb") as f:
+            f.seek(offset)
+            obj = json.loads(f.read(length))
+        with self._lock:
+            self._remember(digest, obj)
+        return obj
+
+    def _remember(self, digest: str, obj):
+        self._cache[digest] = obj
+        self._cache.move_to_end(digest)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    # -- genetic data --------------------------------------------------
+
+    def encode_genetic_data(self, genetic_data: Dict[str, Any],
+                            parents: Dict[str, Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Replace blocks with hashes or parent deltas where that is smaller
+
+        The encoded data keeps the shape of the original: a shared block
+        becomes its hash and a per-child block becomes a
+        [parent_id, depth, edits] delta. parents maps each parent's
+        embryo ID to its genetic data; their records must already be
+        stored next to this one.
+        """
+        parents = {parent_id: data for parent_id, data in (parents or {}).items() if data}
+        encoded = dict(genetic_data, encoding=ENCODING)
+        for key in BLOCK_KEYS:
+            if key in encoded:
+                encoded[key] = self._encode_value(None, key, encoded[key], {
+                    parent_id: data.get(key) for parent_id, data in parents.items()})
+
+        if "dna_information" in encoded:
+            dna = encoded["dna_information"] = dict(encoded["dna_information"])
+            for key in DNA_BLOCK_KEYS:
+                if key in dna:
+                    dna[key] = self._encode_value("dna_information", key, dna[key], {
+                        parent_id: data.get("dna_information", {}).get(key)
+                        for parent_id, data in parents.items()})
+        return encoded
+
+    def _encode_value(self, section: Optional[str], key: str, value, bases: Dict[str, Any]):
+        """Hash, parent delta or the block itself, whichever is smallest"""
+        size = len(canonical(value))
+        if key in SHARED_KEYS:
+            return self._share(value) if size > REF_BYTES else value
+        if key not in DELTA_KEYS:
+            return value
+
+        best = None
+        for parent_id, base in bases.items():
+            edits = _diff(base, value)
+            if edits is None:
+                continue
+            delta = [parent_id, 1, edits]
+            delta_size = len(canonical(delta))
+            if delta_size >= size or (best is not None and delta_size >= best[0]):
+                continue
+            try:
+                delta[1] = self._delta_depth(parent_id, section, key) + 1
+            except FileNotFoundError:
+                # Only parents stored here can be decoded against
+                continue
+            if delta[1] <= MAX_DELTA_CHAIN:
+                best = (delta_size, delta)
+        return best[1] if best else value
+
+    def _share(self, value):
+        """Hash of a block once it has been seen before, else the block itself
+
+        A block seen once may never recur, and storing it in the pack
+        would cost more than keeping it inline.
+        """
+        digest = object_hash(canonical(value))
+        with self._lock:
+            if digest in self.index:
+                return digest
+            if digest not in self._sightings:
+                self._sightings[digest] = None
+                while len(self._sightings) > self.cache_size:
+                    self._sightings.popitem(last=False)
+                return value
+        return self.put(value)
+
+    def _delta_depth(self, embryo_id: str, section: Optional[str], key: str) -> int:
+        """How many deltas lie between a stored embryo's block and its data"""
+        record = self._record(embryo_id)
+        if not is_encoded(record):
+            return 0
+        value = _section(record["genetic_data"], section)[key]
+        return value[1] if isinstance(value, list) else 0
+
+    def _record(self, embryo_id: str) -> Dict[str, Any]:
+        return record_io.read(self.root / f"conception_{embryo_id}.json")
+
+    def decode_genetic_data(self, encoded: Dict[str, Any]) -> Dict[str, Any]:
+        """Rebuild the full genetic_data dict from references"""
+        genetic_data = {key: _copy(value) for key, value in encoded.items() if key != "encoding"}
+        for key in BLOCK_KEYS:
+            if key in genetic_data:
+                genetic_data[key] = _copy(self._decode_value(None, key, genetic_data[key]))
+
+        dna = genetic_data.get("dna_information")
+        if dna is not None:
+            for key in DNA_BLOCK_KEYS:
+                if key in dna:
+                    dna[key] = _copy(self._decode_value("dna_information", key, dna[key]))
+            if "trait_sequences" in dna:
+                dna["trait_sequences"] = {name: list(sequence)
+                                          for name, sequence in dna["trait_sequences"].items()}
+        return genetic_data
+
+    def _decode_value(self, section: Optional[str], key: str, value):
+        """The block an encoded value stands for; callers must not mutate it"""
+        if key in SHARED_KEYS and isinstance(value, str):
+            return self.get(value)
+        if key in DELTA_KEYS and isinstance(value, list):
+            parent_id, _, edits = value
+            return _apply(self._block_of(parent_id, section, key), edits)
+        return value
+
+    def _block_of(self, embryo_id: str, section: Optional[str], key: str):
+        """One decoded block of a stored embryo; callers must not mutate it
+
+        Records are never rewritten, so decoded blocks are cached by ID.
+        """
+        cache_key = (embryo_id, section, key)
+        with self._lock:
+            if cache_key in self._cache:
+                self._cache.move_to_end(cache_key)
+                return self._cache[cache_key]
+        record = self._record(embryo_id)
+        value = _section(record["genetic_data"], section)[key]
+        if is_encoded(record):
+            value = self._decode_value(section, key, value)
+        with self._lock:
+            self._remember(cache_key, value)
+        return value
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "objects": len(self.index),
+            "pack_bytes": self.pack_file.stat().st_size if self.pack_file.exists() else 0,
+            "index_bytes": self.index_file.stat().st_size if self.index_file.exists() else 0
+        }
+
+
+def _section(genetic_data: Dict[str, Any], section: Optional[str]) -> Dict[str, Any]:
+    return genetic_data if section is None else genetic_data.get(section, {})
+
+
+def _diff(base, value) -> Optional[list]:
+    """Edits turning one dict into another with the same keys, or None"""
+    if not (isinstance(base, dict) and isinstance(value, dict)) or set(base) != set(value):
+        return None
+    # Values may be nested (trait sequences); edits replace them whole
+    return [[k, v] for k, v in sorted(value.items()) if base[k] != v]
+
+
+def _apply(base, edits):
+    result = dict(base)
+    for key, value in edits:
+        result[key] = value
+    return result
+
+
+def _copy(value):
+    if isinstance(value, dict):
+        return dict(value)
+    if isinstance(value, list):
+        return list(value)
+    return value
+
+
+_stores: Dict[str, GenomeStore] = {}
+_stores_lock = threading.Lock()
+
+
+def store_for(records_dir="conception_records") -> GenomeStore:
+    """Shared store kept next to the conception records of a directory"""
+    key = str(Path(records_dir).resolve())
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = GenomeStore(records_dir)
+        return _stores[key]
+
+
+def is_encoded(record: Dict[str, Any]) -> bool:
+    genetic_data = record.get("genetic_data")
+    return isinstance(genetic_data, dict) and genetic_data.get("encoding") == ENCODING
+
+
+def expand_record(record: Dict[str, Any], records_dir="conception_records") -> Dict[str, Any]:
+    """Return a record with content-addressed genetic data decoded in full"""
+    if not is_encoded(record):
+        return record
+    expanded = dict(record)
+    expanded["genetic_data"] = store_for(records_dir).decode_genetic_data(record["genetic_data"])
+    return expanded
+
+
+def walk_lineage(embryo_id: str, records_dir="conception_records", max_depth: int = None):
+    """Yield (depth, record) for an embryo and its ancestors, breadth first"""
+    records_dir = Path(records_dir)
+    seen = set()
+    frontier = deque([(0, embryo_id)])
+    while frontier:
+        depth, current = frontier.popleft()
+        if current in seen:
+            continue
+        seen.add(current)
+        record_file = records_dir / f"conception_{current}.json"
+        if not record_io.exists(record_file):
+            continue
+        record = expand_record(record_io.read(record_file), records_dir)
+        yield depth, record
+        parentage = record.get("parentage")
+        if parentage and (max_depth is None or depth < max_depth):
+            frontier.append((depth + 1, parentage["parent1_id"]))
+            frontier.append((depth + 1, parentage["parent2_id"]))
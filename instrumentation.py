@@ -0,0 +1,312 @@
+# instrumentation.py
+"""Opt-in timers, counters and profiling for conception and training runs
+
+Disabled by default: instrumented functions then cost one global flag
+check per call. Enable with EMBRYO_INSTRUMENT=1 (optionally with
+EMBRYO_INSTRUMENT_OUT=stats.json to export at exit) or programmatically:
+
+    with instrumentation.run("breeding", export_to="stats.json", profiler="sampling"):
+        ...
+
+Statistics live in the process that collects them. Pool workers of
+conceive_batch and genetics_server start with instrumentation matching
+the parent's and hand their statistics back with each result (drain()
+in the worker, merge() in the parent), so a run's totals include its
+workers. Other process pools are not covered unless they do the same.
+"""
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+_enabled = False
+_lock = threading.Lock()
+_timers: Dict[str, list] = {}
+_counters: Counter = Counter()
+_run: Dict[str, Any] = {"name": None, "started": None, "start_ns": None}
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset(run_name: str = None):
+    """Clear all collected statistics and start a new run"""
+    with _lock:
+        _timers.clear()
+        _counters.clear()
+        _run.update(name=run_name, started=datetime.now().isoformat(),
+                    start_ns=time.perf_counter_ns())
+
+
+def record(name: str, elapsed_ns: int):
+    """Add one timing sample to a named timer"""
+    with _lock:
+        stats = _timers.get(name)
+        if stats is None:
+            # count, total, min, max
+            _timers[name] = [1, elapsed_ns, elapsed_ns, elapsed_ns]
+        else:
+            stats[0] += 1
+            stats[1] += elapsed_ns
+            if elapsed_ns < stats[2]:
+                stats[2] = elapsed_ns
+            if elapsed_ns > stats[3]:
+                stats[3] = elapsed_ns
+
+
+def drain() -> Optional[Dict[str, Any]]:
+    """Take and clear the raw statistics collected so far; None when disabled"""
+    if not _enabled:
+        return None
+    with _lock:
+        data = {"timers": {name: list(stats) for name, stats in _timers.items()},
+                "counters": dict(_counters)}
+        _timers.clear()
+        _counters.clear()
+    return data
+
+
+def merge(data: Optional[Dict[str, Any]]):
+    """Fold statistics drained in another process into the current run"""
+    if not data:
+        return
+    with _lock:
+        for name, (n, total, low, high) in data["timers"].items():
+            stats = _timers.get(name)
+            if stats is None:
+                _timers[name] = [n, total, low, high]
+            else:
+                stats[0] += n
+                stats[1] += total
+                stats[2] = min(stats[2], low)
+                stats[3] = max(stats[3], high)
+        _counters.update(data["counters"])
+
+
+def init_worker(enabled: bool):
+    """Start a pool worker with empty statistics, instrumented like its parent"""
+    reset(_run["name"])
+    if enabled:
+        enable()
+    else:
+        disable()
+
+
+def call_and_drain(fn, *args):
+    """Run fn in a pool worker and return (result, its statistics)"""
+    return fn(*args), drain()
+
+
+def count(name: str, n: int = 1):
+    """Increment a named counter"""
+    if _enabled:
+        with _lock:
+            _counters[name] += n
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, time.perf_counter_ns() - self.start)
+        return False
+
+
+def timer(name: str):
+    """Context manager timing a block under `name`"""
+    return _Timer(name) if _enabled else _NULL_TIMER
+
+
+def instrumented(name: str = None):
+    """Decorator timing every call of a function when instrumentation is on"""
+    def decorator(fn):
+        timer_name = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(timer_name, time.perf_counter_ns() - start)
+        return wrapper
+    return decorator
+
+
+def stats() -> Dict[str, Any]:
+    """Return the current run's aggregated statistics"""
+    with _lock:
+        timers = {
+            name: {
+                "count": n,
+                "total_ms": total / 1e6,
+                "mean_us": total / n / 1e3,
+                "min_us": low / 1e3,
+                "max_us": high / 1e3
+            }
+            for name, (n, total, low, high) in sorted(_timers.items())
+        }
+        duration = None
+        if _run["start_ns"] is not None:
+            duration = (time.perf_counter_ns() - _run["start_ns"]) / 1e9
+        return {
+            "run": _run["name"],
+            "started": _run["started"],
+            "duration_s": duration,
+            "timers": timers,
+            "counters": dict(sorted(_counters.items()))
+        }
+
+
+def export_stats(path, extra: Dict[str, Any] = None):
+    """Write the current run's statistics as JSON"""
+    data = stats()
+    if extra:
+        data.update(extra)
+    Path(path).write_text(json.dumps(data, indent=2))
+    return data
+
+
+class SamplingProfiler:
+    """Low-overhead statistical profiler sampling one thread's stack"""
+
+    def __init__(self, interval: float = 0.005, thread_id: int = None, max_depth: int = 64):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.max_depth = max_depth
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample_loop, name="sampling-profiler",
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        return self
+
+    def _sample_loop(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                code = frame.f_code
+                stack.append(f"{Path(code.co_filename).name}:{code.co_name}")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def top_functions(self, limit: int = 20) -> Dict[str, Dict[str, int]]:
+        """Self and inclusive sample counts of the busiest functions"""
+        self_counts: Counter = Counter()
+        inclusive: Counter = Counter()
+        for stack, n in self.stacks.items():
+            frames = stack.split(";")
+            self_counts[frames[-1]] += n
+            for frame in set(frames):
+                inclusive[frame] += n
+        return {
+            name: {"self": n, "inclusive": inclusive[name]}
+            for name, n in self_counts.most_common(limit)
+        }
+
+    def write_collapsed(self, path):
+        """Write stacks in the collapsed format used by flame graph tools"""
+        lines = (f"{stack} {n}" for stack, n in self.stacks.most_common())
+        Path(path).write_text("\n".join(lines) + "\n")
+
+
+@contextmanager
+def run(name: str, export_to=None, profiler: str = None, interval: float = 0.005):
+    """Enable instrumentation for a block and aggregate its statistics
+
+    `profiler` may be "sampling" (stack samples, written next to the stats
+    file as .collapsed) or "cprofile" (deterministic, written as .prof).
+    """
+    if profiler not in (None, "sampling", "cprofile"):
+        raise ValueError(f"Unknown profiler: {profiler}")
+    was_enabled = _enabled
+    reset(name)
+    enable()
+
+    sampler = cprofiler = None
+    try:
+        if profiler == "sampling":
+            sampler = SamplingProfiler(interval).start()
+        elif profiler == "cprofile":
+            import cProfile
+            cprofiler = cProfile.Profile()
+            cprofiler.enable()
+        yield
+    finally:
+        extra = {}
+        if sampler is not None:
+            sampler.stop()
+            extra["profile"] = {"samples": sampler.samples,
+                                "top_functions": sampler.top_functions()}
+            if export_to:
+                sampler.write_collapsed(Path(export_to).with_suffix(".collapsed"))
+        if cprofiler is not None:
+            cprofiler.disable()
+            if export_to:
+                cprofiler.dump_stats(str(Path(export_to).with_suffix(".prof")))
+        if not was_enabled:
+            disable()
+        if export_to:
+            export_stats(export_to, extra)
+
+
+if os.environ.get("EMBRYO_INSTRUMENT", "").lower() in ("1", "true", "yes"):
+    reset(os.environ.get("EMBRYO_INSTRUMENT_RUN", "default"))
+    enable()
+    if os.environ.get("EMBRYO_INSTRUMENT_OUT"):
+        atexit.register(export_stats, os.environ["EMBRYO_INSTRUMENT_OUT"])
@@ -0,0 +1,211 @@
+# live_charts.py
+import time
+from typing import List, Tuple
+
+import numpy as np
+
+
+class MinMaxDecimator:
+    """Streaming min/max decimation of a series into a bounded number of buckets
+
+    Each bucket keeps the lowest and highest sample it has seen. When the
+    bucket count exceeds twice the target, neighbouring buckets are merged
+    and the bucket size doubles, so appends stay O(1) amortized and the
+    plotted point count stays bounded no matter how long the history gets.
+    """
+
+    def __init__(self, n_buckets: int = 800):
+        self.n_buckets = max(1, int(n_buckets))
+        self.clear()
+
+    def clear(self):
+        self.bucket_size = 1
+        self.count = 0
+        self.x_start = None
+        # Each bucket is [x_min, y_min, x_max, y_max, n]
+        self.buckets: List[list] = []
+
+    def add(self, x: float, y: float):
+        """Append one sample"""
+        if self.count == 0:
+            self.x_start = x
+        self.count += 1
+        if self.buckets and self.buckets[-1][4] < self.bucket_size:
+            bucket = self.buckets[-1]
+            if y < bucket[1]:
+                bucket[0], bucket[1] = x, y
+            if y > bucket[3]:
+                bucket[2], bucket[3] = x, y
+            bucket[4] += 1
+            return
+
+        self.buckets.append([x, y, x, y, 1])
+        if len(self.buckets) > 2 * self.n_buckets:
+            self._merge_pairs()
+
+    def extend(self, xs, ys):
+        """Append many samples, decimating the bulk of them with NumPy"""
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        if len(ys) == 0:
+            return
+        if self.count == 0:
+            self.x_start = float(xs[0])
+
+        # Grow the bucket size until the new data fits the budget; merging
+        # can leave the last bucket partly filled, so this comes first
+        while (len(self.buckets) + len(ys) / self.bucket_size) > 2 * self.n_buckets:
+            self._merge_pairs()
+
+        # Top up a partially filled bucket sample by sample, so every
+        # bucket but the last holds exactly bucket_size samples
+        start = 0
+        while (start < len(ys) and self.buckets
+               and self.buckets[-1][4] < self.bucket_size):
+            self.add(xs[start], ys[start])
+            start += 1
+        xs, ys = xs[start:], ys[start:]
+
+        size = self.bucket_size
+        full = (len(ys) // size) * size
+        if full:
+            shaped_y = ys[:full].reshape(-1, size)
+            shaped_x = xs[:full].reshape(-1, size)
+            rows = np.arange(shaped_y.shape[0])
+            i_min = shaped_y.argmin(axis=1)
+            i_max = shaped_y.argmax(axis=1)
+            self.buckets.extend(
+                [float(a), float(b), float(c), float(d), size]
+                for a, b, c, d in zip(shaped_x[rows, i_min], shaped_y[rows, i_min],
+                                      shaped_x[rows, i_max], shaped_y[rows, i_max])
+            )
+            self.count += full
+        for x, y in zip(xs[full:], ys[full:]):
+            self.add(float(x), float(y))
+
+    def _merge_pairs(self):
+        merged = []
+        for i in range(0, len(self.buckets), 2):
+            first = self.buckets[i]
+            if i + 1 == len(self.buckets):
+                merged.append(first)
+                continue
+            second = self.buckets[i + 1]
+            low = first if first[1] <= second[1] else second
+            high = first if first[3] >= second[3] else second
+            merged.append([low[0], low[1], high[2], high[3], first[4] + second[4]])
+        self.buckets = merged
+        self.bucket_size *= 2
+
+    def points(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the decimated series in x order"""
+        xs, ys = [], []
+        for x_min, y_min, x_max, y_max, n in self.buckets:
+            if n == 1 or x_min == x_max:
+                xs.append(x_min)
+                ys.append(y_min)
+            elif x_min < x_max:
+                xs.extend((x_min, x_max))
+                ys.extend((y_min, y_max))
+            else:
+                xs.extend((x_max, x_min))
+                ys.extend((y_max, y_min))
+        return np.asarray(xs), np.asarray(ys)
+
+    def bounds(self):
+        """Return (x_min, x_max, y_min, y_max) of everything seen so far"""
+        if not self.buckets:
+            return None
+        last = self.buckets[-1]
+        return (self.x_start, max(last[0], last[2]),
+                min(b[1] for b in self.buckets), max(b[3] for b in self.buckets))
+
+
+class StreamingLineChart:
+    """Line chart fed by appends, redrawn with blitting at a capped rate"""
+
+    def __init__(self, ax, canvas, n_buckets: int = None, max_fps: float = 10.0,
+                 headroom: float = 0.25, **line_kwargs):
+        self.ax = ax
+        self.canvas = canvas
+        self.headroom = headroom
+        self.min_interval = 1.0 / max_fps if max_fps else 0.0
+
+        if n_buckets is None:
+            # One bucket per horizontal pixel of the axes
+            n_buckets = int(ax.get_window_extent().width) or 800
+        self.decimator = MinMaxDecimator(n_buckets)
+
+        self.line, = ax.plot([], [], animated=True, **line_kwargs)
+        self._background = None
+        self._last_draw = 0.0
+        self._pending = None
+        self._needs_full_draw = True
+        self.canvas.mpl_connect('draw_event', self._on_draw)
+
+    def reset(self, ys, xs=None):
+        """Replace the whole series"""
+        self.decimator.clear()
+        self._needs_full_draw = True
+        self.extend(ys, xs)
+
+    def extend(self, ys, xs=None):
+        """Append new samples and schedule a redraw"""
+        if xs is None:
+            xs = np.arange(self.decimator.count, self.decimator.count + len(ys))
+        self.decimator.extend(xs, ys)
+        self.request_redraw()
+
+    def append(self, y, x=None):
+        if x is None:
+            x = self.decimator.count
+        self.decimator.add(float(x), float(y))
+        self.request_redraw()
+
+    def request_redraw(self):
+        """Redraw now or at the next allowed frame, coalescing requests"""
+        if self._pending is not None:
+            return
+        wait = self.min_interval - (time.monotonic() - self._last_draw)
+        if wait <= 0:
+            self._redraw()
+        else:
+            widget = self.canvas.get_tk_widget()
+            self._pending = widget.after(int(wait * 1000), self._redraw)
+
+    def _redraw(self):
+        self._pending = None
+        self._last_draw = time.monotonic()
+        self.line.set_data(*self.decimator.points())
+
+        if self._update_limits() or self._needs_full_draw or self._background is None:
+            self._needs_full_draw = False
+            # The draw event recaptures the background and blits the line
+            self.canvas.draw_idle()
+            return
+
+        self.canvas.restore_region(self._background)
+        self.ax.draw_artist(self.line)
+        self.canvas.blit(self.ax.bbox)
+
+    def _update_limits(self) -> bool:
+        """Grow the view with headroom when data leaves it; True if it changed"""
+        bounds = self.decimator.bounds()
+        if bounds is None:
+            return False
+        x_min, x_max, y_min, y_max = bounds
+        (vx0, vx1), (vy0, vy1) = self.ax.get_xlim(), self.ax.get_ylim()
+        if vx0 <= x_min and x_max <= vx1 and vy0 <= y_min and y_max <= vy1:
+            return False
+
+        x_span = max(x_max - x_min, 1.0)
+        y_span = max(y_max - y_min, 1e-6)
+        self.ax.set_xlim(x_min, x_max + x_span * self.headroom)
+        self.ax.set_ylim(y_min - y_span * self.headroom / 2,
+                         y_max + y_span * self.headroom / 2)
+        return True
+
+    def _on_draw(self, event):
+        self._background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.ax.draw_artist(self.line)
+        self.canvas.blit(self.ax.bbox)
@@ -0,0 +1,332 @@
+# population_analytics.py
+"""Incremental population genetics statistics
+
+Statistics are kept per generation and updated one conception record at
+a time, so queries never rescan the record store:
+
+    analytics = PopulationAnalytics()
+    analytics.attach()                   # follow conceptions in this process
+    analytics.ingest_records_dir()       # or catch up from existing records
+    analytics.heterozygosity(generation=3)
+
+Allele frequencies come from per-position nucleotide count tables. Each
+trait also keeps the running sum of squared counts, which makes expected
+heterozygosity (1 - sum of squared allele frequencies) an O(1) lookup.
+Trait and capability means and variances use Welford's streaming update.
+
+Duplicate records are recognised by the IDs of the last max_seen
+embryos observed; ingest_records_dir also skips record files stamped
+well before its previous pass over the directory.
+"""
+import os
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+import embryo_services
+import genome_store
+import record_io
+
+ALLELES = 4
+SEQUENCE_LENGTH = 8
+MAX_SEEN = int(os.environ.get("EMBRYO_ANALYTICS_MAX_SEEN", 1_000_000))
+# A record keeps the mtime of its temporary file, so it can land in the
+# directory after newer ones; files this close to the newest are rechecked
+INGEST_WINDOW_NS = 60 * 10**9
+
+
+class RunningStats:
+    """Streaming mean and variance (Welford)"""
+
+    __slots__ = ("n", "mean", "m2", "low", "high")
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.low = None
+        self.high = None
+
+    def add(self, value: float):
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (value - self.mean)
+        if self.low is None or value < self.low:
+            self.low = value
+        if self.high is None or value > self.high:
+            self.high = value
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        return {"n": self.n, "mean": self.mean, "variance": self.variance,
+                "min": self.low, "max": self.high}
+
+    def to_list(self) -> list:
+        return [self.n, self.mean, self.m2, self.low, self.high]
+
+    @classmethod
+    def from_list(cls, values: list) -> "RunningStats":
+        stats = cls()
+        stats.n, stats.mean, stats.m2, stats.low, stats.high = values
+        return stats
+
+
+class GenerationStats:
+    """Count tables and running moments for one generation"""
+
+    def __init__(self, trait_names: List[str]):
+        self.count = 0
+        self.genotyped = 0
+        # allele_counts[trait][position][nucleotide]
+        self.allele_counts = {name: [[0] * ALLELES for _ in range(SEQUENCE_LENGTH)]
+                              for name in trait_names}
+        # Sum over positions of the squared allele counts, per trait
+        self.squared_counts = {name: 0 for name in trait_names}
+        self.traits: Dict[str, RunningStats] = {}
+        self.capabilities: Dict[str, RunningStats] = {}
+        self.specializations: Counter = Counter()
+
+    def observe(self, genetic_data: Dict[str, Any]):
+        self.count += 1
+        for name, value in genetic_data.get("combined_traits", {}).items():
+            self.traits.setdefault(name, RunningStats()).add(value)
+        for name, value in genetic_data.get("potential_capabilities", {}).items():
+            self.capabilities.setdefault(name, RunningStats()).add(value)
+        self.specializations.update(set(genetic_data.get("specializations", ())))
+
+        sequences = genetic_data.get("dna_information", {}).get("trait_sequences")
+        if not sequences:
+            return
+        self.genotyped += 1
+        for name, sequence in sequences.items():
+            positions = self.allele_counts.get(name)
+            if positions is None:
+                continue
+            squared = 0
+            for counts, allele in zip(positions, sequence):
+                # (c + 1)^2 - c^2 keeps the sum of squares current
+                squared += 2 * counts[allele] + 1
+                counts[allele] += 1
+            self.squared_counts[name] += squared
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "genotyped": self.genotyped,
+            "allele_counts": self.allele_counts,
+            "squared_counts": self.squared_counts,
+            "traits": {name: s.to_list() for name, s in self.traits.items()},
+            "capabilities": {name: s.to_list() for name, s in self.capabilities.items()},
+            "specializations": dict(self.specializations)
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "GenerationStats":
+        stats = cls([])
+        stats.count = data["count"]
+        stats.genotyped = data["genotyped"]
+        stats.allele_counts = data["allele_counts"]
+        stats.squared_counts = data["squared_counts"]
+        stats.traits = {n: RunningStats.from_list(v) for n, v in data["traits"].items()}
+        stats.capabilities = {n: RunningStats.from_list(v)
+                              for n, v in data["capabilities"].items()}
+        stats.specializations = Counter(data["specializations"])
+        return stats
+
+
+class PopulationAnalytics:
+    """Per-generation allele frequencies, diversity, trait moments and drift"""
+
+    def __init__(self, trait_names: List[str] = None, max_seen: int = None):
+        self.trait_names = list(trait_names or embryo_services.genetics().TRAIT_NAMES)
+        self.generations: Dict[int, GenerationStats] = {}
+        # Recently observed embryo IDs, oldest first
+        self.seen: Dict[str, None] = {}
+        self.max_seen = MAX_SEEN if max_seen is None else max_seen
+        # records directory -> (newest record mtime in ns, mtimes of the
+        # records ingested within INGEST_WINDOW_NS of it by ID)
+        self.ingested_to: Dict[str, Tuple[int, Dict[str, int]]] = {}
+        self._genetics = None
+
+    # -- updates -------------------------------------------------------
+
+    def observe(self, record: Dict[str, Any]) -> bool:
+        """Fold one expanded conception record in; duplicates are ignored"""
+        embryo_id = record.get("embryo_id")
+        if embryo_id in self.seen:
+            return False
+        genetic_data = record.get("genetic_data") or {}
+        if genome_store.is_encoded(record):
+            raise ValueError("Expand content-addressed records before observing them")
+        self.seen[embryo_id] = None
+        if len(self.seen) > self.max_seen:
+            del self.seen[next(iter(self.seen))]
+        self._generation(self.generation_of(genetic_data)).observe(genetic_data)
+        return True
+
+    @staticmethod
+    def generation_of(genetic_data: Dict[str, Any]) -> int:
+        return genetic_data.get("dna_information", {}).get("generation", 0)
+
+    def _generation(self, generation: int) -> GenerationStats:
+        stats = self.generations.get(generation)
+        if stats is None:
+            stats = self.generations[generation] = GenerationStats(self.trait_names)
+        return stats
+
+    def attach(self, genetics=None):
+        """Observe every conception record the genetics module creates from now on"""
+        self._genetics = genetics or embryo_services.genetics()
+        self._genetics.add_conception_listener(self.observe)
+
+    def detach(self):
+        if self._genetics is not None:
+            self._genetics.remove_conception_listener(self.observe)
+            self._genetics = None
+
+    def ingest(self, records: Iterable[Dict[str, Any]]) -> int:
+        return sum(1 for record in records if self.observe(record))
+
+    def ingest_records_dir(self, records_dir="conception_records") -> int:
+        """Catch up on records in a directory that have not been observed yet
+
+        Files stamped more than INGEST_WINDOW_NS before the newest one of
+        the previous pass are skipped unread; newer ones are told apart
+        by ID and mtime, so a record that landed late is still read.
+        """
+        key = str(Path(records_dir).resolve())
+        since, recent = self.ingested_to.get(key, (0, {}))
+        cutoff = since - INGEST_WINDOW_NS
+
+        def records():
+            newest, stamps = since, dict(recent)
+            for record_file in record_io.glob(records_dir, "conception_*"):
+                try:
+                    mtime = record_file.stat().st_mtime_ns
+                except FileNotFoundError:
+                    continue
+                embryo_id = record_file.stem[len("conception_"):]
+                if mtime < cutoff or recent.get(embryo_id) == mtime:
+                    continue
+                newest = max(newest, mtime)
+                stamps[embryo_id] = mtime
+                if embryo_id in self.seen:
+                    continue
+                yield genome_store.expand_record(record_io.read(record_file), records_dir)
+            self.ingested_to[key] = (newest, {
+                embryo_id: mtime for embryo_id, mtime in stamps.items()
+                if mtime >= newest - INGEST_WINDOW_NS})
+        return self.ingest(records())
+
+    # -- queries -------------------------------------------------------
+
+    def _stats(self, generation: int) -> GenerationStats:
+        if generation not in self.generations:
+            raise KeyError(f"No embryos observed in generation {generation}")
+        return self.generations[generation]
+
+    def population_size(self, generation: int = None) -> int:
+        if generation is None:
+            return sum(stats.count for stats in self.generations.values())
+        return self._stats(generation).count
+
+    def _check_trait(self, trait: str):
+        if trait not in self.trait_names:
+            raise ValueError(f"Unknown trait: {trait!r}")
+
+    def allele_frequencies(self, generation: int, trait: str) -> List[List[float]]:
+        """Frequency of each nucleotide (0-3) at every position of a trait"""
+        self._check_trait(trait)
+        stats = self._stats(generation)
+        n = stats.genotyped or 1
+        return [[c / n for c in counts] for counts in stats.allele_counts[trait]]
+
+    def heterozygosity(self, generation: int, trait: str = None,
+                       position: int = None) -> float:
+        """Expected heterozygosity, averaged over positions and, without a trait, traits"""
+        if trait is not None:
+            self._check_trait(trait)
+        if position is not None:
+            if trait is None:
+                raise ValueError("A position needs a trait")
+            if not 0 <= position < SEQUENCE_LENGTH:
+                raise ValueError(f"Position must be in 0..{SEQUENCE_LENGTH - 1}, not {position}")
+        stats = self._stats(generation)
+        n = stats.genotyped
+        if not n:
+            return 0.0
+        if position is not None:
+            counts = stats.allele_counts[trait][position]
+            return 1.0 - sum(c * c for c in counts) / (n * n)
+        traits = [trait] if trait else self.trait_names
+        squared = sum(stats.squared_counts[name] for name in traits)
+        return 1.0 - squared / (n * n * SEQUENCE_LENGTH * len(traits))
+
+    def trait_summary(self, generation: int) -> Dict[str, Dict[str, Any]]:
+        return {name: s.summary() for name, s in self._stats(generation).traits.items()}
+
+    def capability_summary(self, generation: int) -> Dict[str, Dict[str, Any]]:
+        return {name: s.summary() for name, s in self._stats(generation).capabilities.items()}
+
+    def specialization_prevalence(self, generation: int) -> Dict[str, float]:
+        """Share of the generation carrying each specialization"""
+        stats = self._stats(generation)
+        return {name: n / stats.count for name, n in stats.specializations.most_common()}
+
+    def drift(self, from_generation: int, to_generation: int) -> Dict[str, float]:
+        """Mean absolute allele-frequency change per trait between two generations"""
+        result = {}
+        for name in self.trait_names:
+            before = self.allele_frequencies(from_generation, name)
+            after = self.allele_frequencies(to_generation, name)
+            change = sum(abs(a - b) for pa, pb in zip(before, after) for a, b in zip(pa, pb))
+            # Each position's frequency vector can move by at most 2 in total
+            result[name] = change / (2 * SEQUENCE_LENGTH)
+        return result
+
+    def summary(self, generation: int = None) -> Dict[str, Any]:
+        """Dashboard view of one generation, or headline numbers for all of them"""
+        if generation is None:
+            return {
+                "population": self.population_size(),
+                "generations": {
+                    g: {"count": s.count, "heterozygosity": self.heterozygosity(g)}
+                    for g, s in sorted(self.generations.items())
+                }
+            }
+        return {
+            "generation": generation,
+            "count": self._stats(generation).count,
+            "heterozygosity": self.heterozygosity(generation),
+            "traits": self.trait_summary(generation),
+            "capabilities": self.capability_summary(generation),
+            "specializations": self.specialization_prevalence(generation)
+        }
+
+    # -- persistence ---------------------------------------------------
+
+    def save(self, path):
+        """Write a snapshot that can be resumed without rescanning records"""
+        data = {
+            "trait_names": self.trait_names,
+            "seen": list(self.seen),
+            "max_seen": self.max_seen,
+            "ingested_to": self.ingested_to,
+            "generations": {str(g): s.to_dict() for g, s in self.generations.items()}
+        }
+        record_io.write(path, data, "compact")
+
+    @classmethod
+    def load(cls, path) -> "PopulationAnalytics":
+        data = record_io.read(path)
+        analytics = cls(data["trait_names"], data.get("max_seen"))
+        analytics.seen = dict.fromkeys(data["seen"][-analytics.max_seen:])
+        analytics.ingested_to = {key: (mtime, dict(stamps)) for key, (mtime, stamps)
+                                 in data.get("ingested_to", {}).items()}
+        analytics.generations = {int(g): GenerationStats.from_dict(s)
+                                 for g, s in data["generations"].items()}
+        return analytics
@@ -0,0 +1,371 @@
+# population_store.py
+"""Population container that spills cold generations to disk
+
+Evolutionary runs keep every embryo's genetic data around, which stops
+fitting in memory for large populations. SpillingPopulation holds
+genetic data within a memory budget: the newest generation, pinned
+generations and pinned embryos (e.g. selected parents) stay in memory,
+and the oldest other generations are appended to a segment file that is
+read back through mmap. Lookups and iteration work the same wherever a
+record lives:
+
+    population = SpillingPopulation(memory_budget=512 * 1024 * 1024)
+    for embryo_id, genetic_data in offspring:
+        population.add(embryo_id, genetic_data)
+    population.pin_embryos(parent_ids)
+    population[parent_ids[0]]["combined_traits"]
+
+Memory use is the heap size of resident records, which is several
+times their encoded size. Walking every record would cost more than
+storing it, so the ratio of heap size to compact-encoded size is
+measured on the first SIZE_SAMPLES records, and later records are
+sized by their encoded length times that ratio. What must stay in
+memory is never spilled, so a newest generation (plus pins) larger
+than the budget exceeds it; a warning is printed once per
+generation when that happens. Spilled records are appended to a single
+segment file whose record offsets stay in memory; it is scratch data
+and is removed by close().
+"""
+import mmap
+import os
+import shutil
+import sys
+import tempfile
+from array import array
+from pathlib import Path
+from typing import Dict, List, Any, Iterator, Optional, Set, Tuple
+
+import record_io
+
+MEMORY_BUDGET = int(os.environ.get("EMBRYO_POPULATION_MEMORY", 256 * 1024 * 1024))
+SEGMENT_FORMAT = "compact"
+# Records whose heap size is measured to calibrate the others
+SIZE_SAMPLES = 32
+
+
+def deep_size(obj) -> int:
+    """Heap bytes of an object and everything it holds, each object counted once
+
+    Dict keys are left out: the decoders cache them, so records share
+    one copy of each key name.
+    """
+    seen = set()
+    stack = [obj]
+    total = 0
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set)):
+            stack.extend(item)
+    return total
+
+
+class _Segment:
+    """Append-only file of encoded records, read through one mmap"""
+
+    def __init__(self, path: Path, fmt: str):
+        self.path = path
+        self.fmt = fmt
+        self.offsets = array("Q", [0])
+        self._map = None
+        path.write_bytes(b"")
+
+    @property
+    def size(self) -> int:
+        return self.offsets[-1]
+
+    def append(self, records: Dict[str, Dict[str, Any]]) -> int:
+        """Write records after the existing ones and return the first slot"""
+        first = len(self.offsets) - 1
+        self._unmap()
+        with open(self.path, "ab") as f:
+            for genetic_data in records.values():
+                data = record_io.dumps(genetic_data, self.fmt)
+                f.write(data)
+                self.offsets.append(self.offsets[-1] + len(data))
+        if self.size:
+            # The map keeps its own handle; no file object stays open
+            with open(self.path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return first
+
+    def get(self, slot: int) -> Dict[str, Any]:
+        return record_io.loads(self._map[self.offsets[slot]:self.offsets[slot + 1]])
+
+    def _unmap(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def close(self):
+        self._unmap()
+
+
+class _Generation:
+    """Resident records of one generation plus the segment slots it spilled to"""
+
+    def __init__(self):
+        self.resident: Dict[str, Dict[str, Any]] = {}
+        self.sizes: Dict[str, int] = {}
+        self.resident_bytes = 0
+        # embryo ID -> slot in the population's segment
+        self.spilled: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.resident) + len(self.spilled)
+
+
+class SpillingPopulation:
+    """Genetic data by embryo ID within a memory budget"""
+
+    def __init__(self, directory=None, memory_budget: int = None,
+                 segment_format: str = SEGMENT_FORMAT):
+        self.memory_budget = MEMORY_BUDGET if memory_budget is None else memory_budget
+        self.segment_format = segment_format
+        self._owns_directory = directory is None
+        self.directory = Path(tempfile.mkdtemp(prefix="population_")) \
+            if directory is None else Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.generations: Dict[int, _Generation] = {}
+        self.generation_of: Dict[str, int] = {}
+        self.pinned_generations: Set[int] = set()
+        # Embryos kept in memory even when their generation spills
+        self.pinned: Dict[str, Dict[str, Any]] = {}
+        self.pinned_sizes: Dict[str, int] = {}
+        self.resident_bytes = 0
+        self.segment: Optional[_Segment] = None
+        # Newest generation when the last spill could not get under budget
+        self._full_generation: Optional[int] = None
+        self.spill_stats = {"segments": 0, "records": 0, "bytes": 0}
+        # Heap bytes per compact-encoded byte, from the records sampled so far
+        self.size_ratio = None
+        self._sampled = [0, 0, 0]  # records, heap bytes, encoded bytes
+
+    # -- updates -------------------------------------------------------
+
+    def record_size(self, genetic_data: Dict[str, Any]) -> int:
+        """Estimated heap bytes of one record's genetic data"""
+        encoded = len(record_io.dumps(genetic_data, "compact"))
+        if self._sampled[0] < SIZE_SAMPLES:
+            self._sampled[0] += 1
+            self._sampled[1] += deep_size(genetic_data)
+            self._sampled[2] += encoded
+            self.size_ratio = self._sampled[1] / self._sampled[2]
+        return int(encoded * self.size_ratio)
+
+    def add(self, embryo_id: str, genetic_data: Dict[str, Any], generation: int = None):
+        """Store (or replace) an embryo's genetic data, spilling if over budget"""
+        if generation is None:
+            generation = genetic_data.get("dna_information", {}).get("generation", 0)
+        was_pinned = embryo_id in self.pinned
+        if embryo_id in self.generation_of:
+            self.discard(embryo_id)
+        size = self.record_size(genetic_data)
+        self.generation_of[embryo_id] = generation
+        gen = self.generations.setdefault(generation, _Generation())
+        if was_pinned:
+            self.pinned[embryo_id] = genetic_data
+            self.pinned_sizes[embryo_id] = size
+        else:
+            gen.resident[embryo_id] = genetic_data
+            gen.sizes[embryo_id] = size
+            gen.resident_bytes += size
+        self.resident_bytes += size
+        # Growing the generation that could not be spilled leaves nothing new to spill
+        if self.resident_bytes > self.memory_budget and generation != self._full_generation:
+            self.spill()
+
+    def extend(self, items, generation: int = None):
+        for embryo_id, genetic_data in items:
+            self.add(embryo_id, genetic_data, generation)
+
+    def discard(self, embryo_id: str):
+        """Forget an embryo; spilled bytes are reclaimed when the population closes"""
+        generation = self.generation_of.pop(embryo_id, None)
+        if generation is None:
+            return
+        gen = self.generations[generation]
+        if embryo_id in gen.resident:
+            del gen.resident[embryo_id]
+            size = gen.sizes.pop(embryo_id)
+            gen.resident_bytes -= size
+            self.resident_bytes -= size
+        gen.spilled.pop(embryo_id, None)
+        if embryo_id in self.pinned:
+            del self.pinned[embryo_id]
+            self.resident_bytes -= self.pinned_sizes.pop(embryo_id)
+
+    # -- residency -----------------------------------------------------
+
+    @property
+    def current_generation(self) -> Optional[int]:
+        return max(self.generations) if self.generations else None
+
+    def pin_generation(self, generation: int):
+        """Keep a generation's resident records in memory"""
+        self.pinned_generations.add(generation)
+
+    def unpin_generation(self, generation: int):
+        self.pinned_generations.discard(generation)
+        if self.resident_bytes > self.memory_budget:
+            self.spill()
+
+    def pin_embryos(self, embryo_ids):
+        """Hold embryos in memory, reading them back if they were spilled"""
+        for embryo_id in embryo_ids:
+            if embryo_id in self.pinned:
+                continue
+            genetic_data = self[embryo_id]
+            gen = self.generations[self.generation_of[embryo_id]]
+            if embryo_id in gen.resident:
+                del gen.resident[embryo_id]
+                size = gen.sizes.pop(embryo_id)
+                gen.resident_bytes -= size
+            else:
+                del gen.spilled[embryo_id]
+                size = self.record_size(genetic_data)
+                self.resident_bytes += size
+            self.pinned[embryo_id] = genetic_data
+            self.pinned_sizes[embryo_id] = size
+        if self.resident_bytes > self.memory_budget:
+            self.spill()
+
+    def unpin_embryos(self, embryo_ids=None):
+        """Return pinned embryos (all of them by default) to their generations"""
+        embryo_ids = list(self.pinned) if embryo_ids is None else embryo_ids
+        for embryo_id in embryo_ids:
+            if embryo_id not in self.pinned:
+                continue
+            gen = self.generations[self.generation_of[embryo_id]]
+            gen.resident[embryo_id] = self.pinned.pop(embryo_id)
+            gen.sizes[embryo_id] = size = self.pinned_sizes.pop(embryo_id)
+            gen.resident_bytes += size
+        if self.resident_bytes > self.memory_budget:
+            self.spill()
+
+    def spill(self, target: int = None) -> int:
+        """Spill the oldest unpinned generations until resident bytes fit the target
+
+        The newest generation and pinned records are never spilled, so
+        resident bytes can stay above the target.
+        """
+        target = self.memory_budget if target is None else target
+        current = self.current_generation
+        spilled = 0
+        for generation in sorted(self.generations):
+            if self.resident_bytes <= target:
+                break
+            gen = self.generations[generation]
+            if generation == current or generation in self.pinned_generations \
+                    or not gen.resident:
+                continue
+            if self.segment is None:
+                self.segment = _Segment(self.directory / "population.seg", self.segment_format)
+            size = self.segment.size
+            first = self.segment.append(gen.resident)
+            for slot, embryo_id in enumerate(gen.resident, first):
+                gen.spilled[embryo_id] = slot
+            self.resident_bytes -= gen.resident_bytes
+            self.spill_stats["segments"] += 1
+            self.spill_stats["records"] += len(gen.resident)
+            self.spill_stats["bytes"] += self.segment.size - size
+            spilled += len(gen.resident)
+            gen.resident, gen.sizes, gen.resident_bytes = {}, {}, 0
+
+        over = self.resident_bytes > target
+        if over and self.resident_bytes > self.memory_budget \
+                and self._full_generation != current:
+            print(f"Warning: {self.resident_bytes} bytes must stay in memory, over the "
+                  f"budget of {self.memory_budget}; generation {current} and pinned "
+                  f"records are not spilled")
+        self._full_generation = current if over else None
+        return spilled
+
+    def is_resident(self, embryo_id: str) -> bool:
+        if embryo_id in self.pinned:
+            return True
+        return embryo_id in self.generations[self.generation_of[embryo_id]].resident
+
+    # -- access --------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self.generation_of)
+
+    def __contains__(self, embryo_id: str) -> bool:
+        return embryo_id in self.generation_of
+
+    def __getitem__(self, embryo_id: str) -> Dict[str, Any]:
+        """Genetic data for an embryo; spilled records are decoded on every access"""
+        genetic_data = self.pinned.get(embryo_id)
+        if genetic_data is not None:
+            return genetic_data
+        gen = self.generations[self.generation_of[embryo_id]]
+        genetic_data = gen.resident.get(embryo_id)
+        if genetic_data is not None:
+            return genetic_data
+        return self.segment.get(gen.spilled[embryo_id])
+
+    def get(self, embryo_id: str, default=None):
+        return self[embryo_id] if embryo_id in self.generation_of else default
+
+    def ids(self, generation: int = None) -> List[str]:
+        if generation is None:
+            return list(self.generation_of)
+        return [embryo_id for embryo_id, g in self.generation_of.items() if g == generation]
+
+    def generation(self, generation: int) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """(embryo ID, genetic data) for one generation, segments read sequentially"""
+        gen = self.generations.get(generation)
+        if gen is None:
+            return
+        by_slot = sorted(gen.spilled.items(), key=lambda item: item[1])
+        for embryo_id, slot in by_slot:
+            yield embryo_id, self.segment.get(slot)
+        for embryo_id, genetic_data in list(gen.resident.items()):
+            yield embryo_id, genetic_data
+        for embryo_id, genetic_data in list(self.pinned.items()):
+            if self.generation_of[embryo_id] == generation:
+                yield embryo_id, genetic_data
+
+    def items(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        for generation in sorted(self.generations):
+            yield from self.generation(generation)
+
+    def __iter__(self) -> Iterator[str]:
+        return (embryo_id for embryo_id, _ in self.items())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "embryos": len(self),
+            "generations": len(self.generations),
+            "resident_bytes": self.resident_bytes,
+            "memory_budget": self.memory_budget,
+            "size_ratio": self.size_ratio,
+            "pinned_embryos": len(self.pinned),
+            "spilled_embryos": sum(len(g.spilled) for g in self.generations.values()),
+            **{f"spilled_{key}": value for key, value in self.spill_stats.items()}
+        }
+
+    # -- lifecycle -----------------------------------------------------
+
+    def close(self):
+        """Close and delete the segment file"""
+        if self.segment is not None:
+            self.segment.close()
+            self.segment.path.unlink(missing_ok=True)
+            self.segment = None
+        for gen in self.generations.values():
+            gen.spilled = {}
+        if self._owns_directory:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,375 @@
+# population_table.py
+"""Shared-memory population table for multi-process workers
+
+One writer loads conception data once into a fixed-capacity block of
+shared memory (or a memory-mapped file); worker processes attach by name
+and read NumPy views of the columns without copying:
+
+    table = PopulationTable.create(capacity=200_000)
+    table.extend_records(records)                       # writer
+    pool = multiprocessing.Pool(initializer=attach_worker, initargs=(table.handle,))
+
+    table = worker_table()                              # in a worker
+    table.traits[:, table.trait_index["processing_speed"]]
+
+Layout: a fixed header, the column names as JSON, then the columns
+(embryo IDs, generation, combined traits, potential capabilities, a
+specialization bitmask, growth rate, packed 2-bit trait sequences and
+flags marking which optional fields a row has). Rows are written before
+the row count in the header is advanced, so readers only ever see
+complete rows; there must be a single writer.
+"""
+import json
+import mmap
+import struct
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+import numpy as np
+
+import embryo_services
+import genome_store
+import record_io
+from genome_index import pack_genome, unpack_sequence
+
+MAGIC = b"EMBPOP02"
+# magic, capacity, id width, metadata length; the row count follows separately
+HEADER = struct.Struct("<8sQII")
+COUNT_OFFSET = 32
+METADATA_OFFSET = 64
+ALIGN = 64
+ID_WIDTH = 16
+# Row flags
+HAS_SEQUENCES = 1
+HAS_GROWTH_RATE = 2
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGN) * ALIGN
+
+
+def _column_layout(capacity: int, n_traits: int, n_capabilities: int, id_width: int,
+                   start: int) -> Tuple[Dict[str, Tuple[int, np.dtype, tuple]], int]:
+    columns = [
+        ("embryo_ids", np.dtype(f"S{id_width}"), (capacity,)),
+        ("generations", np.dtype(np.int32), (capacity,)),
+        ("traits", np.dtype(np.float64), (capacity, n_traits)),
+        ("capabilities", np.dtype(np.float64), (capacity, n_capabilities)),
+        ("specializations", np.dtype(np.uint32), (capacity,)),
+        ("growth_rates", np.dtype(np.float64), (capacity,)),
+        ("sequences", np.dtype(np.uint16), (capacity, n_traits)),
+        ("flags", np.dtype(np.uint8), (capacity,)),
+    ]
+    layout = {}
+    offset = _aligned(start)
+    for name, dtype, shape in columns:
+        layout[name] = (offset, dtype, shape)
+        offset = _aligned(offset + dtype.itemsize * int(np.prod(shape)))
+    return layout, offset
+
+
+class PopulationTable:
+    """Columnar population data in shared memory; one writer, many readers"""
+
+    def __init__(self, buffer, owner, metadata: Dict[str, Any], capacity: int,
+                 id_width: int, writable: bool, path=None):
+        self._buffer = buffer
+        self._owner = owner
+        self._path = str(path) if path is not None else None
+        self.writable = writable
+        self.capacity = capacity
+        self.trait_names: List[str] = metadata["trait_names"]
+        self.capability_names: List[str] = metadata["capability_names"]
+        self.specialization_names: List[str] = metadata["specialization_names"]
+        self.trait_index = {name: i for i, name in enumerate(self.trait_names)}
+        self.capability_index = {name: i for i, name in enumerate(self.capability_names)}
+        self.specialization_bits = {name: 1 << i
+                                    for i, name in enumerate(self.specialization_names)}
+
+        self._count = np.ndarray((1,), dtype=np.uint64, buffer=buffer, offset=COUNT_OFFSET)
+        metadata_length = HEADER.unpack_from(buffer, 0)[3]
+        layout, _ = _column_layout(capacity, len(self.trait_names), len(self.capability_names),
+                                   id_width, METADATA_OFFSET + metadata_length)
+        self._columns = {}
+        for name, (offset, dtype, shape) in layout.items():
+            column = np.ndarray(shape, dtype=dtype, buffer=buffer, offset=offset)
+            column.flags.writeable = writable
+            self._columns[name] = column
+        self._positions: Dict[str, int] = {}
+        self._positions_upto = 0
+
+    # -- creation and attachment ----------------------------------------
+
+    @staticmethod
+    def _metadata(trait_names, capability_names, specialization_names) -> Dict[str, Any]:
+        genetics = embryo_services.genetics()
+        specialization_names = list(specialization_names or genetics.SPECIALIZATIONS)
+        if len(specialization_names) > 32:
+            raise ValueError("At most 32 specializations fit the bitmask")
+        return {
+            "trait_names": list(trait_names or genetics.TRAIT_NAMES),
+            "capability_names": list(capability_names or genetics.CAPABILITIES),
+            "specialization_names": specialization_names
+        }
+
+    @classmethod
+    def create(cls, capacity: int, name: str = None, path=None, trait_names: List[str] = None,
+               capability_names: List[str] = None,
+               specialization_names: List[str] = None) -> "PopulationTable":
+        """Allocate an empty table in shared memory, or in a file if `path` is given"""
+        metadata = cls._metadata(trait_names, capability_names, specialization_names)
+        encoded = json.dumps(metadata).encode()
+        _, size = _column_layout(capacity, len(metadata["trait_names"]),
+                                 len(metadata["capability_names"]), ID_WIDTH,
+                                 METADATA_OFFSET + len(encoded))
+
+        if path is not None:
+            with open(path, "w+b") as f:
+                f.truncate(size)
+                buffer = owner = mmap.mmap(f.fileno(), size)
+        else:
+            owner = shared_memory.SharedMemory(name=name, create=True, size=size)
+            buffer = owner.buf
+
+        HEADER.pack_into(buffer, 0, MAGIC, capacity, ID_WIDTH, len(encoded))
+        struct.pack_into("<Q", buffer, COUNT_OFFSET, 0)
+        buffer[METADATA_OFFSET:METADATA_OFFSET + len(encoded)] = encoded
+        return cls(buffer, owner, metadata, capacity, ID_WIDTH, writable=True, path=path)
+
+    @classmethod
+    def attach(cls, name: str = None, path=None) -> "PopulationTable":
+        """Open an existing table read-only, without copying it"""
+        if path is not None:
+            with open(path, "rb") as f:
+                buffer = owner = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            owner = _attach_shared_memory(name)
+            buffer = owner.buf
+        magic, capacity, id_width, metadata_length = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Not a population table: {name or path}")
+        metadata = json.loads(bytes(buffer[METADATA_OFFSET:METADATA_OFFSET + metadata_length]))
+        return cls(buffer, owner, metadata, capacity, id_width, writable=False, path=path)
+
+    @property
+    def handle(self) -> Tuple[str, str]:
+        """Picklable reference workers pass to attach_worker or open_handle"""
+        if isinstance(self._owner, shared_memory.SharedMemory):
+            return ("shm", self._owner.name)
+        return ("file", self._path)
+
+    @classmethod
+    def open_handle(cls, handle: Tuple[str, str]) -> "PopulationTable":
+        kind, location = handle
+        return cls.attach(name=location) if kind == "shm" else cls.attach(path=location)
+
+    @classmethod
+    def from_records_dir(cls, records_dir="conception_records", capacity: int = None,
+                         reserve: int = 0, **kwargs) -> "PopulationTable":
+        """Create a table holding every conception record in a directory
+
+        reserve leaves room for that many rows appended later.
+        """
+        record_files = sorted(record_io.glob(records_dir, "conception_*"))
+        table = cls.create(capacity or max(1, len(record_files) + reserve), **kwargs)
+
+        def records():
+            for record_file in record_files:
+                yield genome_store.expand_record(record_io.read(record_file), records_dir)
+        table.extend_records(records())
+        return table
+
+    def close(self):
+        """Release this process's views; the data stays for other processes
+
+        Column arrays handed out earlier must be dropped first.
+        """
+        self._columns.clear()
+        self._count = None
+        self._buffer = None
+        self._owner.close()
+
+    def unlink(self):
+        """Free the shared memory block once every process has closed it"""
+        if isinstance(self._owner, shared_memory.SharedMemory):
+            self._owner.unlink()
+        elif self._path is not None:
+            Path(self._path).unlink(missing_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    # -- writing ---------------------------------------------------------
+
+    def append(self, embryo_id: str, genetic_data: Dict[str, Any]) -> int:
+        """Write one embryo and publish it to readers; returns its row"""
+        if not self.writable:
+            raise PermissionError("Population table is attached read-only")
+        row = len(self)
+        if row >= self.capacity:
+            raise ValueError(f"Population table is full ({self.capacity} rows)")
+        encoded_id = embryo_id.encode()
+        if len(encoded_id) > self._columns["embryo_ids"].dtype.itemsize:
+            raise ValueError(f"Embryo ID too long for the table: {embryo_id}")
+
+        dna = genetic_data.get("dna_information", {})
+        traits = genetic_data["combined_traits"]
+        capabilities = genetic_data["potential_capabilities"]
+        mask = 0
+        for specialization in genetic_data.get("specializations", ()):
+            if specialization not in self.specialization_bits:
+                raise ValueError(f"Unknown specialization: {specialization}")
+            mask |= self.specialization_bits[specialization]
+
+        columns = self._columns
+        columns["embryo_ids"][row] = encoded_id
+        columns["generations"][row] = dna.get("generation", 0)
+        columns["traits"][row] = [traits[name] for name in self.trait_names]
+        columns["capabilities"][row] = [capabilities[name] for name in self.capability_names]
+        columns["specializations"][row] = mask
+        flags = 0
+        growth_rate = genetic_data.get("growth_rate")
+        columns["growth_rates"][row] = growth_rate if growth_rate is not None else 0
+        if growth_rate is not None:
+            flags |= HAS_GROWTH_RATE
+        sequences = dna.get("trait_sequences")
+        columns["sequences"][row] = (pack_genome(sequences, self.trait_names)
+                                     if sequences else 0)
+        if sequences:
+            flags |= HAS_SEQUENCES
+        columns["flags"][row] = flags
+        # Publish only after the row is complete
+        self._count[0] = row + 1
+        return row
+
+    def append_record(self, record: Dict[str, Any]) -> int:
+        return self.append(record["embryo_id"], record["genetic_data"])
+
+    def extend_records(self, records: Iterable[Dict[str, Any]]) -> int:
+        added = 0
+        for record in records:
+            self.append_record(record)
+            added += 1
+        return added
+
+    # -- reading ---------------------------------------------------------
+
+    def __len__(self):
+        return int(self._count[0])
+
+    def _column(self, name: str) -> np.ndarray:
+        return self._columns[name][:len(self)]
+
+    @property
+    def embryo_ids(self) -> np.ndarray:
+        return self._column("embryo_ids")
+
+    @property
+    def generations(self) -> np.ndarray:
+        return self._column("generations")
+
+    @property
+    def traits(self) -> np.ndarray:
+        return self._column("traits")
+
+    @property
+    def capabilities(self) -> np.ndarray:
+        return self._column("capabilities")
+
+    @property
+    def specializations(self) -> np.ndarray:
+        return self._column("specializations")
+
+    @property
+    def growth_rates(self) -> np.ndarray:
+        return self._column("growth_rates")
+
+    @property
+    def sequences(self) -> np.ndarray:
+        """Packed trait sequences; rows without HAS_SEQUENCES in flags are zero"""
+        return self._column("sequences")
+
+    @property
+    def flags(self) -> np.ndarray:
+        return self._column("flags")
+
+    def with_specialization(self, name: str) -> np.ndarray:
+        """Row indices of embryos carrying a specialization"""
+        return np.flatnonzero(self.specializations & self.specialization_bits[name])
+
+    def position(self, embryo_id: str) -> Optional[int]:
+        """Row of an embryo; the ID lookup grows as rows are published"""
+        count = len(self)
+        if self._positions_upto < count:
+            new_ids = self._columns["embryo_ids"][self._positions_upto:count]
+            for offset, raw in enumerate(new_ids):
+                self._positions[raw.decode()] = self._positions_upto + offset
+            self._positions_upto = count
+        return self._positions.get(embryo_id)
+
+    def genetic_data(self, embryo_id: str) -> Optional[Dict[str, Any]]:
+        """Rebuild the fields breeding needs from a row, without touching disk
+
+        Optional fields the embryo's record did not have are left out.
+        """
+        row = self.position(embryo_id)
+        if row is None:
+            return None
+        mask = int(self._columns["specializations"][row])
+        flags = int(self._columns["flags"][row])
+        dna = {"generation": int(self._columns["generations"][row])}
+        if flags & HAS_SEQUENCES:
+            dna["trait_sequences"] = {
+                name: unpack_sequence(int(word))
+                for name, word in zip(self.trait_names, self._columns["sequences"][row])
+            }
+        genetic_data = {
+            "combined_traits": dict(zip(self.trait_names,
+                                        self._columns["traits"][row].tolist())),
+            "specializations": [name for name, bit in self.specialization_bits.items()
+                                if mask & bit],
+            "potential_capabilities": dict(zip(self.capability_names,
+                                               self._columns["capabilities"][row].tolist())),
+            "dna_information": dna
+        }
+        if flags & HAS_GROWTH_RATE:
+            genetic_data["growth_rate"] = float(self._columns["growth_rates"][row])
+        return genetic_data
+
+
+def _attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """Attach without registering the block for cleanup by this process"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+    # Before Python 3.13 every attach is registered with the resource
+    # tracker, which unlinks the block when the attaching process exits,
+    # under the creator's feet
+    from multiprocessing import resource_tracker
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args, **kwargs: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+_worker_table: Optional[PopulationTable] = None
+
+
+def attach_worker(handle: Tuple[str, str]):
+    """Pool initializer: attach this worker to a table once"""
+    global _worker_table
+    _worker_table = PopulationTable.open_handle(handle)
+
+
+def worker_table() -> PopulationTable:
+    if _worker_table is None:
+        raise RuntimeError("attach_worker has not run in this process")
+    return _worker_table
@@ -0,0 +1,203 @@
+# readiness_tracker.py
+"""Incremental program readiness across many embryos
+
+An embryo is ready for a program when its development stage and each of
+the program's neural metrics reach the program's thresholds (the rules of
+EmbryoSchool._assess_program_readiness). The tracker indexes every
+threshold by the value it tests and keeps, per embryo and program, the
+number of conditions still unmet. When a watched embryo learns or
+develops, only values that changed are compared, and only thresholds
+they crossed are re-checked:
+
+    tracker = ReadinessTracker(school)
+    tracker.add_listener(lambda event: print(event))
+    tracker.watch(embryo)
+    school.train_embryo(embryo, "basic_cognition")   # may emit ReadinessEvents
+
+Thresholds are re-indexed whenever the school loads programs or
+recompiles one after an in-place edit. Programs added to the school's
+dict directly are picked up by the next query.
+"""
+import threading
+from bisect import bisect_right
+from collections import namedtuple
+from typing import Callable, Dict, List, Set, Tuple
+
+import status_tracking
+
+ReadinessEvent = namedtuple("ReadinessEvent", ["embryo_id", "program", "ready"])
+
+STAGE_FIELD = "development_stage"
+
+
+class _EmbryoState:
+    __slots__ = ("embryo", "values", "unmet", "ready")
+
+    def __init__(self, embryo):
+        self.embryo = embryo
+        self.values: Dict[str, float] = {}
+        self.unmet: Dict[str, int] = {}
+        self.ready: Set[str] = set()
+
+
+class ReadinessTracker:
+    """Keeps every watched embryo's set of ready programs current"""
+
+    def __init__(self, school):
+        self.school = school
+        self.embryos: Dict[str, _EmbryoState] = {}
+        self.ready_by_program: Dict[str, Set[str]] = {}
+        self._listeners: List[Callable[[ReadinessEvent], None]] = []
+        self._lock = threading.RLock()
+        self.rebuild()
+        school.add_program_listener(self._on_programs_changed)
+
+    def close(self):
+        """Stop following the school's programs and every watched embryo"""
+        self.school.remove_program_listener(self._on_programs_changed)
+        with self._lock:
+            for embryo_id in list(self.embryos):
+                self.unwatch(embryo_id)
+
+    # -- thresholds ----------------------------------------------------
+
+    def _conditions(self) -> Dict[str, List[Tuple[str, float]]]:
+        """program -> [(field, threshold)] from the school's compiled programs"""
+        return {
+            name: [(STAGE_FIELD, plan.required_stage)]
+            + [(metric, plan.metric_threshold) for metric in plan.metrics]
+            for name, plan in self.school.compiled_programs().items()
+        }
+
+    def rebuild(self):
+        """Re-index thresholds after training programs change and re-check everyone"""
+        with self._lock:
+            self.conditions = self._conditions()
+            # field -> sorted thresholds and the program behind each
+            index: Dict[str, List[Tuple[float, str]]] = {}
+            for program, fields in self.conditions.items():
+                for field, threshold in fields:
+                    index.setdefault(field, []).append((threshold, program))
+            self.thresholds = {}
+            for field, entries in index.items():
+                entries.sort()
+                self.thresholds[field] = ([t for t, _ in entries], [p for _, p in entries])
+            self.ready_by_program = {program: set() for program in self.conditions}
+            for embryo_id, state in self.embryos.items():
+                self._evaluate(embryo_id, state, announce=True)
+
+    def _on_programs_changed(self, program_names: List[str]):
+        self.rebuild()
+
+    def _refresh(self):
+        """Rebuild if programs were added or removed since the last index"""
+        if self.school.compiled_programs().keys() != self.conditions.keys():
+            self.rebuild()
+
+    # -- embryos -------------------------------------------------------
+
+    def watch(self, embryo, announce: bool = False):
+        """Track an embryo; a reloaded embryo with the same ID replaces the old one"""
+        with self._lock:
+            embryo_id = embryo.embryo_id
+            previous = self.embryos.get(embryo_id)
+            if previous is not None and previous.embryo is embryo:
+                return
+            if previous is not None:
+                status_tracking.remove_listener(previous.embryo, self._on_status_change)
+            state = _EmbryoState(embryo)
+            if previous is not None:
+                state.ready = previous.ready
+            self.embryos[embryo_id] = state
+            status_tracking.add_listener(embryo, self._on_status_change)
+            self._evaluate(embryo_id, state, announce=announce or previous is not None)
+
+    def unwatch(self, embryo_id: str):
+        with self._lock:
+            state = self.embryos.pop(embryo_id, None)
+            if state is None:
+                return
+            status_tracking.remove_listener(state.embryo, self._on_status_change)
+            for program in state.ready:
+                self.ready_by_program.get(program, set()).discard(embryo_id)
+
+    def _current_values(self, embryo) -> Dict[str, float]:
+        status = self.school.cached_status(embryo)
+        neural = status["neural_connections"]
+        values = {field: neural.get(field, 0) for field in self.thresholds if field != STAGE_FIELD}
+        values[STAGE_FIELD] = status[STAGE_FIELD]
+        return values
+
+    def _evaluate(self, embryo_id: str, state: _EmbryoState, announce: bool):
+        """Full check of one embryo, used when it is first seen"""
+        state.values = self._current_values(state.embryo)
+        state.unmet = {
+            program: sum(1 for field, threshold in fields if state.values[field] < threshold)
+            for program, fields in self.conditions.items()
+        }
+        ready = {program for program, unmet in state.unmet.items() if unmet == 0}
+        events = []
+        if announce:
+            events += [ReadinessEvent(embryo_id, p, True) for p in sorted(ready - state.ready)]
+            events += [ReadinessEvent(embryo_id, p, False) for p in sorted(state.ready - ready)]
+        for program in state.ready - ready:
+            # Programs removed since the last index have no set any more
+            self.ready_by_program.get(program, set()).discard(embryo_id)
+        for program in ready:
+            self.ready_by_program[program].add(embryo_id)
+        state.ready = ready
+        self._emit(events)
+
+    def _on_status_change(self, embryo, reason: str):
+        with self._lock:
+            state = self.embryos.get(embryo.embryo_id)
+            if state is None or state.embryo is not embryo:
+                return
+            events = []
+            for field, value in self._current_values(embryo).items():
+                old = state.values.get(field, 0)
+                if value == old:
+                    continue
+                state.values[field] = value
+                thresholds, programs = self.thresholds[field]
+                # Only thresholds between the old and new value flip
+                low, high = (old, value) if value > old else (value, old)
+                delta = -1 if value > old else 1
+                for i in range(bisect_right(thresholds, low), bisect_right(thresholds, high)):
+                    program = programs[i]
+                    state.unmet[program] += delta
+                    if state.unmet[program] == 0:
+                        state.ready.add(program)
+                        self.ready_by_program[program].add(embryo.embryo_id)
+                        events.append(ReadinessEvent(embryo.embryo_id, program, True))
+                    elif delta > 0 and state.unmet[program] == 1:
+                        state.ready.discard(program)
+                        self.ready_by_program[program].discard(embryo.embryo_id)
+                        events.append(ReadinessEvent(embryo.embryo_id, program, False))
+        self._emit(events)
+
+    # -- queries and events --------------------------------------------
+
+    def ready_programs(self, embryo_id: str) -> Set[str]:
+        with self._lock:
+            self._refresh()
+            return set(self.embryos[embryo_id].ready)
+
+    def ready_embryos(self, program: str) -> Set[str]:
+        with self._lock:
+            self._refresh()
+            return set(self.ready_by_program[program])
+
+    def add_listener(self, listener: Callable[[ReadinessEvent], None]):
+        """Call listener(event) whenever an embryo becomes ready or stops being ready"""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[ReadinessEvent], None]):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _emit(self, events: List[ReadinessEvent]):
+        for event in events:
+            for listener in list(self._listeners):
+                listener(event)
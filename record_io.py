@@ -0,0 +1,178 @@
+# record_io.py
+"""Serialization for persisted records
+
+Formats, chosen with EMBRYO_RECORD_FORMAT or per call:
+
+    compact   JSON without whitespace (default)
+    json      indented JSON, as records used to be written
+    binary    compact JSON compressed with zlib behind a short header
+
+orjson is used for encoding and parsing when it is installed; records
+holding NaN or Infinity are always encoded by the stdlib, which writes
+them as NaN/Infinity tokens in every format. read() and loads() detect
+the format from the data, so files written in any format, including old
+indented records, load the same way.
+
+Binary records are stored with a .bin suffix instead of .json. Callers
+keep naming records "name.json": write() stores them under the suffix of
+the format and removes the copy in the other format, read(), locate()
+and exists() find either one, and glob() lists both.
+"""
+import json
+import math
+import os
+import threading
+import zlib
+from pathlib import Path
+from typing import Any, Iterator
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+FORMATS = ("compact", "json", "binary")
+RECORD_FORMAT = os.environ.get("EMBRYO_RECORD_FORMAT", "compact")
+
+# Magic, format version and codec precede the compressed payload
+BINARY_MAGIC = b"\x89EMB"
+BINARY_VERSION = 1
+CODEC_ZLIB = 1
+COMPRESSION_LEVEL = 6
+
+# File suffix of each format
+SUFFIXES = {"compact": ".json", "json": ".json", "binary": ".bin"}
+RECORD_SUFFIXES = (".json", ".bin")
+
+
+def _non_finite(obj) -> bool:
+    """True if a float anywhere in the record is NaN or infinite"""
+    if isinstance(obj, float):
+        return not math.isfinite(obj)
+    if isinstance(obj, dict):
+        return any(_non_finite(value) for value in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return any(_non_finite(value) for value in obj)
+    return False
+
+
+def _compact(obj) -> bytes:
+    if orjson is not None:
+        try:
+            data = orjson.dumps(obj)
+        except TypeError:
+            pass
+        else:
+            # orjson writes NaN and Infinity as null; only records with a
+            # null can be affected
+            if b"null" not in data or not _non_finite(obj):
+                return data
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def _parse(data: bytes):
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # The stdlib parser also accepts NaN and Infinity
+            pass
+    return json.loads(data)
+
+
+def dumps(obj, fmt: str = None) -> bytes:
+    """Encode a record in the given format (default RECORD_FORMAT)"""
+    fmt = fmt or RECORD_FORMAT
+    if fmt == "compact":
+        return _compact(obj)
+    if fmt == "json":
+        return json.dumps(obj, indent=2).encode()
+    if fmt == "binary":
+        header = BINARY_MAGIC + bytes((BINARY_VERSION, CODEC_ZLIB))
+        return header + zlib.compress(_compact(obj), COMPRESSION_LEVEL)
+    raise ValueError(f"Unknown record format: {fmt}")
+
+
+def is_binary(data: bytes) -> bool:
+    return data[:len(BINARY_MAGIC)] == BINARY_MAGIC
+
+
+def loads(data) -> Any:
+    """Decode a record in any supported format"""
+    if isinstance(data, str):
+        return _parse(data.encode())
+    if is_binary(data):
+        version, codec = data[len(BINARY_MAGIC)], data[len(BINARY_MAGIC) + 1]
+        if version != BINARY_VERSION or codec != CODEC_ZLIB:
+            raise ValueError(f"Unsupported binary record (version {version}, codec {codec})")
+        return _parse(zlib.decompress(data[len(BINARY_MAGIC) + 2:]))
+    return _parse(data)
+
+
+def path_for(path, fmt: str = None) -> Path:
+    """File that holds the record named `path` when written in a format"""
+    path = Path(path)
+    fmt = fmt or RECORD_FORMAT
+    if fmt not in SUFFIXES:
+        raise ValueError(f"Unknown record format: {fmt}")
+    if path.suffix in RECORD_SUFFIXES:
+        return path.with_suffix(SUFFIXES[fmt])
+    return path
+
+
+def locate(path) -> Path:
+    """The existing file holding the record named `path`, in whichever format"""
+    path = Path(path)
+    if path.suffix not in RECORD_SUFFIXES or path.exists():
+        return path
+    for suffix in RECORD_SUFFIXES:
+        candidate = path.with_suffix(suffix)
+        if candidate.exists():
+            return candidate
+    return path
+
+
+def exists(path) -> bool:
+    return locate(path).exists()
+
+
+def glob(directory, pattern: str) -> Iterator[Path]:
+    """Record files in a directory whose name without suffix matches `pattern`"""
+    for suffix in RECORD_SUFFIXES:
+        yield from Path(directory).glob(pattern + suffix)
+
+
+def write(path, obj, fmt: str = None, exclusive: bool = False) -> Path:
+    """Write a record atomically, so readers never see a partial file
+
+    Returns the file written, whose suffix follows the format. With
+    exclusive, FileExistsError is raised instead of replacing a record
+    that already exists in any format.
+    """
+    fmt = fmt or RECORD_FORMAT
+    data = dumps(obj, fmt)
+    path = path_for(path, fmt)
+    if exclusive and exists(path):
+        raise FileExistsError(f"Record already exists: {locate(path)}")
+    temp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        temp.write_bytes(data)
+        if exclusive:
+            # Linking fails if another writer created the record meanwhile
+            os.link(temp, path)
+            temp.unlink()
+        else:
+            os.replace(temp, path)
+    except BaseException:
+        temp.unlink(missing_ok=True)
+        raise
+    if path.suffix in RECORD_SUFFIXES and not exclusive:
+        for suffix in RECORD_SUFFIXES:
+            if suffix != path.suffix:
+                path.with_suffix(suffix).unlink(missing_ok=True)
+    return path
+
+
+def read(path) -> Any:
+    with open(locate(path), "rb") as f:
+        return loads(f.read())
@@ -0,0 +1,137 @@
+# status_tracking.py
+"""Status versions and per-state caches for embryos
+
+Embryo files define their own classes, so tracking is added per
+instance: track() swaps the embryo's class for a subclass whose
+learn_from_experience and develop bump a status version and notify
+listeners. Anything derived from get_status() can then be cached on the
+embryo under that version and reused until the state changes:
+
+    version = status_tracking.track(embryo)
+    cache = status_tracking.state_cache(embryo)   # cleared on every change
+
+Copies and pickles of a tracked embryo keep the version and cache (they
+describe the same state) but never the listeners. Listeners run only
+after a method returns; a method that raises still invalidates the cache.
+"""
+import weakref
+from typing import Dict, Any, Callable
+
+VERSION_ATTR = "_status_version"
+CACHE_ATTR = "_status_cache"
+LISTENERS_ATTR = "_status_listeners"
+
+# Methods known to change an embryo's status
+MUTATING_METHODS = ("learn_from_experience", "develop")
+
+# Base class -> weak reference to its tracked subclass. Neither class is
+# kept alive here, so classes of reloaded embryo files can be collected.
+_tracked_classes: "weakref.WeakKeyDictionary[type, weakref.ref]" = weakref.WeakKeyDictionary()
+
+
+def _rebuild(base: type, state: Dict[str, Any]):
+    embryo = base.__new__(base)
+    embryo.__dict__.update(state)
+    track(embryo)
+    return embryo
+
+
+def _tracked_class(base: type) -> type:
+    ref = _tracked_classes.get(base)
+    tracked = ref() if ref is not None else None
+    if tracked is not None:
+        return tracked
+
+    namespace = {"__slots__": (), "_status_base": base}
+    for name in MUTATING_METHODS:
+        method = getattr(base, name, None)
+        if method is not None:
+            namespace[name] = _versioned(method, name)
+
+    def __reduce_ex__(self, protocol):
+        return _rebuild, (base, copyable_state(self))
+
+    namespace["__reduce_ex__"] = __reduce_ex__
+    tracked = type(base.__name__, (base,), namespace)
+    tracked.__qualname__ = base.__qualname__
+    tracked.__module__ = base.__module__
+    _tracked_classes[base] = weakref.ref(tracked)
+    return tracked
+
+
+def _versioned(method: Callable, reason: str) -> Callable:
+    def wrapper(self, *args, **kwargs):
+        try:
+            result = method(self, *args, **kwargs)
+        except BaseException:
+            # The state may be half changed, but listeners must not run
+            # and hide the error
+            _invalidate(self)
+            raise
+        mark_changed(self, reason)
+        return result
+    wrapper.__name__ = method.__name__
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+
+def is_tracked(embryo) -> bool:
+    return "_status_base" in vars(type(embryo))
+
+
+def track(embryo) -> int:
+    """Start versioning an embryo's status; safe to call repeatedly"""
+    if not is_tracked(embryo):
+        embryo.__class__ = _tracked_class(type(embryo))
+        embryo.__dict__.setdefault(VERSION_ATTR, 0)
+        embryo.__dict__.setdefault(CACHE_ATTR, {})
+        embryo.__dict__[LISTENERS_ATTR] = []
+    return embryo.__dict__[VERSION_ATTR]
+
+
+def version(embryo) -> int:
+    return track(embryo)
+
+
+def _invalidate(embryo):
+    track(embryo)
+    state = embryo.__dict__
+    state[VERSION_ATTR] += 1
+    state[CACHE_ATTR] = {}
+
+
+def mark_changed(embryo, reason: str = "external"):
+    """Invalidate cached state, e.g. after editing an embryo's attributes directly"""
+    _invalidate(embryo)
+    # The change has happened; a failing listener must not undo or hide it
+    for listener in list(embryo.__dict__[LISTENERS_ATTR]):
+        try:
+            listener(embryo, reason)
+        except Exception as e:
+            print(f"Warning: Status listener failed for {getattr(embryo, 'embryo_id', embryo)}: "
+                  f"{type(e).__name__}: {e}")
+
+
+def state_cache(embryo) -> Dict[str, Any]:
+    """Scratch dict valid only for the embryo's current status version"""
+    track(embryo)
+    return embryo.__dict__[CACHE_ATTR]
+
+
+def add_listener(embryo, listener: Callable):
+    """Call listener(embryo, reason) after every status change"""
+    track(embryo)
+    listeners = embryo.__dict__[LISTENERS_ATTR]
+    if listener not in listeners:
+        listeners.append(listener)
+
+
+def remove_listener(embryo, listener: Callable):
+    listeners = embryo.__dict__.get(LISTENERS_ATTR, [])
+    if listener in listeners:
+        listeners.remove(listener)
+
+
+def copyable_state(embryo) -> Dict[str, Any]:
+    """The embryo's attributes without its listeners"""
+    return {k: v for k, v in embryo.__dict__.items() if k != LISTENERS_ATTR}
@@ -0,0 +1,28 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+for path in (REPO_DIR, REPO_DIR / "benchmarks"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+import embryo_services
+
+
+@pytest.fixture
+def genetics():
+    return embryo_services.genetics()
+
+
+@pytest.fixture
+def school_module():
+    return embryo_services.school_module()
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Run the test inside an empty directory, as the tools run in a data directory"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
@@ -0,0 +1,56 @@
+import random
+
+import conceive_batch
+import record_io
+
+
+def _conceive(records_dir, seed=3):
+    tasks = [(i, None, None) for i in range(3)]
+    results = list(conceive_batch.conceive_many(tasks, seed=seed, records_dir=records_dir))
+    return [record_io.read(records_dir / f"conception_{r['embryo_id']}.json")["genetic_data"]
+            for r in results]
+
+
+def test_seeded_conception_is_reproducible(tmp_path):
+    assert _conceive(tmp_path / "a") == _conceive(tmp_path / "b")
+    assert _conceive(tmp_path / "c", seed=4) != _conceive(tmp_path / "d")
+
+
+def test_seed_leaves_global_random_alone(tmp_path):
+    random.seed(1)
+    expected = random.random()
+    random.seed(1)
+    _conceive(tmp_path / "a")
+    assert random.random() == expected
+
+
+def _conceive_pairs(records_dir, pairs, seed=3):
+    tasks = [(i, p1, p2) for i, (p1, p2) in enumerate(pairs)]
+    return list(conceive_batch.conceive_many(tasks, seed=seed, records_dir=records_dir))
+
+
+def test_pairs_runs_do_not_reuse_ids(tmp_path):
+    parents = [r["embryo_id"] for r in conceive_batch.conceive_many(
+        [(i, None, None) for i in range(4)], seed=3, records_dir=tmp_path)]
+    first = _conceive_pairs(tmp_path, [parents[:2]])
+    second = _conceive_pairs(tmp_path, [parents[2:]])
+    ids = {r["embryo_id"] for r in first + second}
+    assert len(ids) == 2 and not ids & set(parents)
+    assert not any("error" in r for r in first + second)
+
+
+def test_existing_records_are_not_overwritten(tmp_path):
+    first = _conceive(tmp_path)
+    results = list(conceive_batch.conceive_many([(i, None, None) for i in range(3)],
+                                                seed=3, records_dir=tmp_path))
+    assert all(r["error"].startswith("FileExistsError") for r in results)
+    assert [record_io.read(tmp_path / f"conception_{r['embryo_id']}.json")["genetic_data"]
+            for r in results] == first
+
+
+def test_generated_ids_skip_taken_ones(genetics, tmp_path, monkeypatch):
+    taken = genetics.conceive_embryo(records_dir=tmp_path)
+    ids = iter([taken, "fresh"])
+    monkeypatch.setattr(genetics.uuid, "uuid4", lambda: next(ids))
+    assert genetics.conceive_embryo(records_dir=tmp_path) == "fresh"
+    assert len(list(tmp_path.glob("conception_*"))) == 2
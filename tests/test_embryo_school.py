@@ -0,0 +1,69 @@
+import threading
+
+from synthetic import SyntheticEmbryo
+
+
+def test_results_do_not_share_cached_state(school_module):
+    school = school_module.EmbryoSchool()
+    embryo = SyntheticEmbryo(seed=4, embryo_id="school")
+    first = school.evaluate_embryo(embryo)
+
+    first["specializations"].append("mutated")
+    for readiness in first["readiness_assessment"].values():
+        readiness["ready"] = "mutated"
+        readiness["requirements"].clear()
+    school.embryo_status(embryo)["neural_connections"].clear()
+    school.program_readiness(embryo, "basic_cognition")["requirements"]["x"] = 1
+    for path in school.create_curriculum(embryo)["specialization_paths"]:
+        path["path"].append("mutated")
+
+    assert school.evaluate_embryo(embryo) == school_module.EmbryoSchool().evaluate_embryo(embryo)
+    assert all("mutated" not in path for path in school.curriculum_paths.values())
+
+
+def test_status_cache_follows_embryo_changes(school_module):
+    school = school_module.EmbryoSchool()
+    embryo = SyntheticEmbryo(seed=4, embryo_id="school")
+    before = school.embryo_status(embryo)
+    assert school.cached_status(embryo) is school.cached_status(embryo)
+    embryo.develop()
+    assert school.embryo_status(embryo)["development_stage"] > before["development_stage"]
+
+
+def test_readiness_follows_program_edits(school_module):
+    school = school_module.EmbryoSchool()
+    embryo = SyntheticEmbryo(seed=4, embryo_id="school")
+    assert school.program_readiness(embryo, "basic_cognition")["ready"]
+    school.training_programs["basic_cognition"]["required_stage"] = 50
+    readiness = school.program_readiness(embryo, "basic_cognition")
+    assert not readiness["ready"]
+    assert readiness["requirements"]["required_stage"] == 50
+
+
+def test_cached_status_leaves_out_age(school_module):
+    class AgingEmbryo(SyntheticEmbryo):
+        def get_status(self):
+            self.age += 1
+            return super().get_status()
+
+    school = school_module.EmbryoSchool()
+    embryo = AgingEmbryo(seed=4, embryo_id="school")
+    assert "age" not in school.cached_status(embryo)
+    assert school.embryo_status(embryo)["age"] < school.embryo_status(embryo)["age"]
+
+
+def test_cache_counters_are_exact_under_threads(school_module):
+    school = school_module.EmbryoSchool()
+    embryo = SyntheticEmbryo(seed=4, embryo_id="school")
+    school.performance_metrics(embryo)
+
+    def lookups():
+        for _ in range(2000):
+            school.performance_metrics(embryo)
+
+    threads = [threading.Thread(target=lookups) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert school.metrics_cache_stats == {"hits": 8000, "misses": 1}
@@ -0,0 +1,117 @@
+import os
+import threading
+
+import pytest
+
+from embryo_services import CreationJob, EmbryoServices
+
+EMBRYO_FILE = '''
+class Embryo:
+    def __init__(self):
+        self.embryo_id = "abc"
+        self.experiences = []
+        self.stage = {stage}
+
+embryo = Embryo()
+'''
+
+
+def write_embryo(workdir, stage):
+    embryo_file = workdir / "embryos" / "embryo_abc.py"
+    embryo_file.parent.mkdir(exist_ok=True)
+    embryo_file.write_text(EMBRYO_FILE.format(stage=stage))
+    return embryo_file
+
+
+def test_load_embryo_hands_out_copies(workdir):
+    write_embryo(workdir, 1)
+    services = EmbryoServices()
+    first = services.load_embryo("abc")
+    first.experiences.append("trained")
+    second = services.load_embryo("abc")
+    assert second is not first
+    assert second.experiences == []
+
+
+def test_load_embryo_follows_file_changes(workdir):
+    embryo_file = write_embryo(workdir, 1)
+    services = EmbryoServices()
+    assert services.load_embryo("abc").stage == 1
+    write_embryo(workdir, 2)
+    stat = embryo_file.stat()
+    os.utime(embryo_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert services.load_embryo("abc").stage == 2
+
+
+def drain(job, timeout=10.0):
+    """Batches a job put on its queue, up to the end marker"""
+    batches = []
+    while True:
+        batch = job.results.get(timeout=timeout)
+        if batch is None:
+            return batches
+        batches.append(batch)
+
+
+def test_creation_job_streams_batches(genetics, tmp_path):
+    job = CreationJob(5, batch_size=2, flush_interval=60, records_dir=tmp_path).start()
+    batches = drain(job)
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    rows = [row for batch in batches for row in batch]
+    assert {row[1] for row in rows} == {"Random"}
+    assert all((tmp_path / f"conception_{row[0]}.json").exists() for row in rows)
+    assert (job.created, job.errors) == (5, 0)
+
+    parents = (rows[0][0], rows[1][0])
+    child = CreationJob(1, parents, records_dir=tmp_path).start()
+    assert drain(child)[0][0][1] == "Inherited"
+
+
+def test_creation_job_reports_failed_embryos(genetics, tmp_path, monkeypatch):
+    conceive = genetics.conceive_embryo
+    calls = []
+
+    def flaky(*args, **kwargs):
+        calls.append(args)
+        if len(calls) % 2 == 0:
+            raise OSError("disk full")
+        return conceive(*args, **kwargs)
+
+    monkeypatch.setattr(genetics, "conceive_embryo", flaky)
+    job = CreationJob(4, batch_size=10, records_dir=tmp_path).start()
+    rows = [row for batch in drain(job) for row in batch]
+    assert [row[0] == "error" for row in rows] == [False, True, False, True]
+    assert rows[1] == ("error", "OSError: disk full")
+    assert (job.created, job.errors) == (2, 2)
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_creation_job_ends_its_stream_when_it_dies(genetics, tmp_path, monkeypatch):
+    def broken(*args, **kwargs):
+        raise RuntimeError("no records")
+
+    monkeypatch.setattr(genetics, "prefetch_parents", broken)
+    job = CreationJob(3, ("a", "b"), records_dir=tmp_path).start()
+    assert drain(job) == []
+    job._thread.join(5)
+    assert not job.is_running() and job.created == 0
+
+
+def test_creation_job_stops_when_cancelled(genetics, tmp_path, monkeypatch):
+    conceive = genetics.conceive_embryo
+    started, release = threading.Event(), threading.Event()
+
+    def slow(*args, **kwargs):
+        started.set()
+        release.wait(5)
+        return conceive(*args, **kwargs)
+
+    monkeypatch.setattr(genetics, "conceive_embryo", slow)
+    job = CreationJob(100, batch_size=10, records_dir=tmp_path).start()
+    assert started.wait(5)
+    job.cancel()
+    release.set()
+    rows = [row for batch in drain(job) for row in batch]
+    assert job.cancelled and len(rows) == job.created == 1
+    job._thread.join(5)
+    assert not job.is_running()
@@ -0,0 +1,79 @@
+import os
+import threading
+import time
+
+import pytest
+
+import fs_watch
+from fs_watch import CREATED, DELETED, MODIFIED, RESCAN, Change
+
+
+def test_polling_read_returns_within_timeout(tmp_path):
+    backend = fs_watch._PollingBackend([tmp_path], interval=30.0)
+    start = time.monotonic()
+    assert backend.read(0.05) == []
+    assert time.monotonic() - start < 1.0
+
+
+def test_polling_reports_changes_once_interval_is_up(tmp_path):
+    existing = tmp_path / "a.json"
+    existing.write_text("1")
+    backend = fs_watch._PollingBackend([tmp_path], interval=0.05)
+    existing.unlink()
+    (tmp_path / "b.json").write_text("2")
+    changes = []
+    deadline = time.monotonic() + 2.0
+    while not changes and time.monotonic() < deadline:
+        changes = backend.read(0.01)
+    assert set(changes) == {Change(existing.resolve(), DELETED),
+                            Change((tmp_path / "b.json").resolve(), CREATED)}
+
+
+def test_rescan_survives_coalescing():
+    assert fs_watch._coalesce(None, RESCAN) == RESCAN
+    assert fs_watch._coalesce(RESCAN, MODIFIED) == RESCAN
+    assert fs_watch._coalesce(CREATED, RESCAN) == RESCAN
+    assert fs_watch._coalesce(CREATED, DELETED) is None
+
+
+@pytest.mark.skipif(not hasattr(os, "uname") or os.uname().sysname != "Linux",
+                    reason="inotify is Linux only")
+def test_queue_overflow_asks_for_rescan(tmp_path, monkeypatch):
+    root = tmp_path / "development_logs"
+    root.mkdir()
+    backend = fs_watch._InotifyBackend([root])
+    try:
+        # A subdirectory whose creation event was dropped with the overflow
+        (root / "abc").mkdir()
+        overflow = fs_watch.EVENT_HEADER.pack(-1, fs_watch.IN_Q_OVERFLOW, 0, 0)
+        monkeypatch.setattr(fs_watch.select, "select", lambda r, w, x, t: (r, [], []))
+        monkeypatch.setattr(fs_watch.os, "read", lambda fd, size: overflow)
+        assert backend.read(0) == [Change(root.resolve(), RESCAN)]
+        watched = {directory for directory, role in backend.watches.values() if role == "sub"}
+        assert (root / "abc").resolve() in watched
+    finally:
+        backend.close()
+
+
+def test_callback_errors_go_to_on_error(tmp_path):
+    errors = []
+    delivered = threading.Event()
+
+    def callback(batch):
+        raise RuntimeError("boom")
+
+    def on_error(error, batch):
+        errors.append((error, batch))
+        delivered.set()
+
+    watcher = fs_watch.DirectoryWatcher([tmp_path], callback, debounce=0.02, max_delay=0.1,
+                                        backend="polling", poll_interval=0.02,
+                                        on_error=on_error).start()
+    try:
+        (tmp_path / "a.json").write_text("1")
+        assert delivered.wait(5.0)
+    finally:
+        watcher.stop()
+    error, batch = errors[0]
+    assert isinstance(error, RuntimeError)
+    assert batch == [Change((tmp_path / "a.json").resolve(), CREATED)]
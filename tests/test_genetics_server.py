@@ -0,0 +1,101 @@
+import asyncio
+import json
+from http import HTTPStatus
+
+import pytest
+
+from genetics_server import GeneticsServer, HTTPError
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = GeneticsServer(tmp_path, workers=1, max_pending=8, max_batch=4)
+    yield server
+    server.close()
+
+
+@pytest.mark.parametrize("pairs", [["ab"], [["a"]], [["a", "b", "c"]], [["a", 1]],
+                                   [["a", ""]], "ab", [None]])
+def test_rejects_malformed_pairs(server, pairs):
+    with pytest.raises(HTTPError) as error:
+        server._batch_pairs({"pairs": pairs})
+    assert error.value.status == HTTPStatus.BAD_REQUEST
+
+
+def test_caps_batch_size(server):
+    assert server._batch_pairs({"count": 4}) == [(None, None)] * 4
+    assert server._batch_pairs({"pairs": [["a", "b"]]}) == [("a", "b")]
+    for body in ({"count": 5}, {"count": -1}, {"count": "many"},
+                 {"pairs": [["a", "b"]] * 5}):
+        with pytest.raises(HTTPError):
+            server._batch_pairs(body)
+
+
+def test_batch_items_count_against_max_pending(server):
+    async def fake_offload(fn, pairs):
+        return [{"embryo_id": f"{i}"} for i in range(len(pairs))]
+
+    server.offload = fake_offload
+    body = json.dumps({"count": 4}).encode()
+
+    async def run():
+        server.in_flight = 5
+        busy = await server.dispatch("POST", "/conceive/batch", body)
+        server.in_flight = 4
+        ok = await server.dispatch("POST", "/conceive/batch", body)
+        return busy, ok, server.in_flight
+
+    (busy_status, _), (ok_status, payload), in_flight = asyncio.run(run())
+    assert busy_status == HTTPStatus.SERVICE_UNAVAILABLE
+    assert ok_status == HTTPStatus.OK
+    assert len(payload["results"]) == 4
+    assert in_flight == 4
+
+
+async def _exchange(server, raw: bytes) -> bytes:
+    listener = await asyncio.start_server(server.handle_connection, "127.0.0.1", 0)
+    port = listener.sockets[0].getsockname()[1]
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(raw)
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), 5)
+        writer.close()
+        return response
+    finally:
+        listener.close()
+        await listener.wait_closed()
+
+
+@pytest.mark.parametrize("length, status", [("abc", 400), ("-5", 400), ("²", 400),
+                                            (str(1 << 30), 413)])
+def test_bad_content_length_gets_a_response(server, length, status):
+    raw = (f"POST /conceive HTTP/1.1\r\nContent-Length: {length}\r\n\r\n{{}}").encode("latin-1")
+    response = asyncio.run(_exchange(server, raw))
+    assert response.startswith(f"HTTP/1.1 {status} ".encode())
+
+
+def test_conceive_requires_known_parents(server, tmp_path):
+    async def fake_offload(fn, pairs):
+        return [{"embryo_id": "child"} for _ in pairs]
+
+    server.offload = fake_offload
+    (tmp_path / "conception_records").mkdir()
+    for embryo_id in ("p1", "p2"):
+        (tmp_path / "conception_records" / f"conception_{embryo_id}.json").write_text("{}")
+
+    async def conceive(body):
+        return await server.dispatch("POST", "/conceive", json.dumps(body).encode())
+
+    async def run():
+        return [await conceive({"parent1_id": "p1", "parent2_id": "nope"}),
+                await conceive({"parent1_id": "p1"}),
+                await conceive({"parent1_id": "p1", "parent2_id": "p2"}),
+                await server.dispatch("POST", "/conceive/batch",
+                                      json.dumps({"pairs": [["p1", "x"]]}).encode())]
+
+    missing, partial, ok, batch = asyncio.run(run())
+    assert missing[0] == HTTPStatus.NOT_FOUND
+    assert partial[0] == HTTPStatus.BAD_REQUEST
+    assert ok == (HTTPStatus.OK, {"embryo_id": "child"})
+    assert batch[0] == HTTPStatus.NOT_FOUND
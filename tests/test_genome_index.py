@@ -0,0 +1,89 @@
+import random
+
+import numpy as np
+import pytest
+
+from genome_index import (GenomeIndex, pack_genome, pack_sequence, symbol_mismatches,
+                          unpack_sequence)
+
+NAMES = ["a", "b", "c", "d"]
+
+
+def _genome(rng):
+    return {name: [rng.randint(0, 3) for _ in range(8)] for name in NAMES}
+
+
+def _mismatches(g1, g2, weights=None):
+    weights = weights or {}
+    return sum(weights.get(name, 1) * sum(x != y for x, y in zip(g1[name], g2[name]))
+               for name in NAMES)
+
+
+@pytest.fixture
+def population():
+    rng = random.Random(5)
+    genomes = {f"e{i}": _genome(rng) for i in range(200)}
+    # A near copy for the duplicate search
+    genomes["copy"] = {name: list(seq) for name, seq in genomes["e0"].items()}
+    genomes["copy"]["a"][0] ^= 1
+    index = GenomeIndex(NAMES, capacity=4)
+    for embryo_id, genome in genomes.items():
+        index.add(embryo_id, genome)
+    return index, genomes
+
+
+def test_pack_round_trip():
+    sequence = [0, 1, 2, 3, 3, 2, 1, 0]
+    assert unpack_sequence(pack_sequence(sequence)) == sequence
+    assert pack_sequence([3] * 8) == 0xFFFF
+    assert int(symbol_mismatches(np.uint16(pack_sequence([1] * 8)),
+                                 np.uint16(pack_sequence([2] * 8)))) == 8
+
+
+def test_distances_match_brute_force(population):
+    index, genomes = population
+    distances = index.distances("e3")
+    for embryo_id, genome in genomes.items():
+        assert distances[index.positions[embryo_id]] == _mismatches(genomes["e3"], genome)
+
+
+def test_partial_weights_keep_other_traits(population):
+    index, genomes = population
+    weights = {"a": 3.0, "b": 0.0}
+    distances = index.distances(genomes["e1"], weights)
+    for embryo_id, genome in genomes.items():
+        assert distances[index.positions[embryo_id]] == _mismatches(genomes["e1"], genome, weights)
+    with pytest.raises(ValueError):
+        index.distances("e1", {"unknown": 1.0})
+
+
+def test_nearest_and_within(population):
+    index, genomes = population
+    nearest = index.nearest("e0", k=3)
+    assert nearest[0] == ("copy", 1.0)
+    assert "e0" not in [embryo_id for embryo_id, _ in nearest]
+    assert [d for _, d in nearest] == sorted(d for _, d in nearest)
+    assert index.within("e0", 1) == [("copy", 1.0)]
+
+
+def test_near_duplicates_match_brute_force(population):
+    index, genomes = population
+    ids = list(genomes)
+    expected = sorted((ids[i], ids[j], _mismatches(genomes[ids[i]], genomes[ids[j]]))
+                      for i in range(len(ids)) for j in range(i + 1, len(ids))
+                      if _mismatches(genomes[ids[i]], genomes[ids[j]]) <= 2)
+    assert sorted(index.near_duplicates(2)) == expected
+    with pytest.raises(ValueError):
+        index.near_duplicates(len(NAMES))
+
+
+def test_save_load_round_trip(population, tmp_path):
+    index, genomes = population
+    index.add("e5", genomes["e6"])  # replacing keeps the position
+    assert len(index) == len(genomes)
+    index.save(tmp_path / "index.npz")
+    loaded = GenomeIndex.load(tmp_path / "index.npz")
+    assert loaded.embryo_ids == index.embryo_ids
+    assert loaded.trait_names == NAMES
+    assert np.array_equal(loaded.genomes[:len(loaded)], index.genomes[:len(index)])
+    assert np.array_equal(loaded.genomes[loaded.positions["e5"]], pack_genome(genomes["e6"], NAMES))
@@ -0,0 +1,125 @@
+import random
+
+import genome_store
+import record_io
+from genome_store import GenomeStore
+
+
+def _genetic_data(value=2.5, generation=0):
+    return {
+        "combined_traits": {"learning_capacity": value, "memory_capacity": 2.0},
+        "specializations": ["memory_capacity", "adaptability"],
+        "potential_capabilities": {"learning_potential": 2.5},
+        "growth_rate": 0.15,
+        "dna_information": {
+            "mutation_rates": {"point": 0.001, "insertion": 0.0005, "deletion": 0.0005},
+            "generation": generation,
+            "trait_sequences": {"learning_capacity": [0, 1, 2, 3, 0, 1, 2, 3]},
+        },
+    }
+
+
+def test_put_get_and_dedupe(tmp_path):
+    store = GenomeStore(tmp_path)
+    digest = store.put({"a": [1, 2]})
+    assert store.put({"a": [1, 2]}) == digest
+    assert store.stats()["objects"] == 1
+    # Another process sees the object through the index file
+    assert GenomeStore(tmp_path).get(digest) == {"a": [1, 2]}
+
+
+def test_partial_index_line_is_ignored(tmp_path):
+    store = GenomeStore(tmp_path)
+    digest = store.put([1])
+    with open(store.index_file, "ab") as f:
+        f.write(b"deadbeef 12")
+    reopened = GenomeStore(tmp_path)
+    assert list(reopened.index) == [digest]
+    assert reopened.get(digest) == [1]
+
+
+def test_recurring_blocks_are_shared_and_the_rest_inline(tmp_path):
+    store = GenomeStore(tmp_path)
+    first = store.encode_genetic_data(_genetic_data())
+    second = store.encode_genetic_data(_genetic_data(value=2.7, generation=1))
+    assert store.decode_genetic_data(first) == _genetic_data()
+    assert store.decode_genetic_data(second) == _genetic_data(value=2.7, generation=1)
+    # A block seen once stays inline; it goes to the pack when it recurs
+    assert first["specializations"] == _genetic_data()["specializations"]
+    assert isinstance(second["specializations"], str)
+    assert isinstance(second["dna_information"]["mutation_rates"], str)
+    assert second["combined_traits"] == _genetic_data(value=2.7)["combined_traits"]
+    assert second["dna_information"]["trait_sequences"] == \
+        _genetic_data()["dna_information"]["trait_sequences"]
+    # Decoded data is a copy; editing it leaves the cached object alone
+    decoded = store.decode_genetic_data(second)
+    decoded["dna_information"]["trait_sequences"]["learning_capacity"][0] = 3
+    decoded["combined_traits"]["learning_capacity"] = 0
+    decoded["specializations"].append("x")
+    assert store.decode_genetic_data(second) == _genetic_data(value=2.7, generation=1)
+
+
+def test_children_are_stored_as_deltas_against_parents(tmp_path):
+    store = genome_store.store_for(tmp_path)
+    parent_id, parent = "p0", _genetic_data()
+    _record(tmp_path, parent_id, store=store)
+    for generation in range(1, genome_store.MAX_DELTA_CHAIN + 3):
+        child_id = f"p{generation}"
+        child = _genetic_data(generation=generation)
+        child["combined_traits"]["memory_capacity"] = 2.0 + generation
+        encoded = store.encode_genetic_data(child, {parent_id: parent, "other": None})
+        if generation == genome_store.MAX_DELTA_CHAIN + 1:
+            # The chain is full, so this child starts a new one
+            assert encoded["combined_traits"] == child["combined_traits"]
+        else:
+            assert encoded["combined_traits"] == [
+                parent_id, generation % (genome_store.MAX_DELTA_CHAIN + 1),
+                [["memory_capacity", 2.0 + generation]]]
+        record_io.write(tmp_path / f"conception_{child_id}.json",
+                        {"embryo_id": child_id, "genetic_data": encoded})
+        # A fresh store decodes the chain from the records alone
+        assert GenomeStore(tmp_path).decode_genetic_data(encoded) == child
+        parent_id, parent = child_id, child
+
+
+def test_content_records_are_smaller_than_full_ones(genetics, tmp_path, monkeypatch):
+    def population_bytes(storage):
+        records_dir = tmp_path / storage
+        monkeypatch.setattr(genetics, "RECORD_STORAGE", storage)
+        rng = random.Random(1)
+        generation = [genetics.conceive_embryo(embryo_id=f"0_{i}", records_dir=records_dir,
+                                               rng=rng) for i in range(20)]
+        for depth in range(1, 11):
+            generation = [genetics.conceive_embryo(*rng.sample(generation, 2), f"{depth}_{i}",
+                                                   records_dir, rng=rng) for i in range(20)]
+        return sum(path.stat().st_size for path in records_dir.iterdir())
+
+    assert population_bytes("content") < population_bytes("full")
+    for _, record in genome_store.walk_lineage("10_0", tmp_path / "content", 2):
+        full = record_io.read(tmp_path / "full" / f"conception_{record['embryo_id']}.json")
+        assert record["genetic_data"] == full["genetic_data"]
+
+
+def _record(records_dir, embryo_id, parents=None, store=None):
+    record = {"embryo_id": embryo_id, "genetic_data": _genetic_data(),
+              "parentage": {"parent1_id": parents[0], "parent2_id": parents[1]}
+              if parents else None}
+    if store is not None:
+        record = dict(record, genetic_data=store.encode_genetic_data(record["genetic_data"]))
+    record_io.write(records_dir / f"conception_{embryo_id}.json", record)
+
+
+def test_walk_lineage_breadth_first(tmp_path):
+    store = genome_store.store_for(tmp_path)
+    _record(tmp_path, "a", store=store)
+    _record(tmp_path, "b")
+    _record(tmp_path, "c", ("a", "b"), store=store)
+    _record(tmp_path, "d", ("c", "a"))
+    _record(tmp_path, "e", ("d", "missing"))
+
+    walked = [(depth, record["embryo_id"])
+              for depth, record in genome_store.walk_lineage("e", tmp_path)]
+    assert walked == [(0, "e"), (1, "d"), (2, "c"), (2, "a"), (3, "b")]
+    assert all(record["genetic_data"] == _genetic_data()
+               for _, record in genome_store.walk_lineage("e", tmp_path))
+    assert [r["embryo_id"] for _, r in genome_store.walk_lineage("e", tmp_path, 1)] == ["e", "d"]
@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+import conceive_batch
+import instrumentation
+
+
+@pytest.fixture(autouse=True)
+def clean_instrumentation():
+    was_enabled = instrumentation.is_enabled()
+    instrumentation.disable()
+    instrumentation.reset()
+    yield
+    instrumentation.reset()
+    if was_enabled:
+        instrumentation.enable()
+
+
+def test_run_collects_and_exports(tmp_path):
+    @instrumentation.instrumented("work")
+    def work():
+        instrumentation.count("items", 2)
+
+    with instrumentation.run("test", export_to=tmp_path / "stats.json"):
+        work()
+        work()
+    assert not instrumentation.is_enabled()
+    exported = json.loads((tmp_path / "stats.json").read_text())
+    assert exported["run"] == "test"
+    assert exported["timers"]["work"]["count"] == 2
+    assert exported["counters"] == {"items": 4}
+
+
+def test_unknown_profiler_leaves_instrumentation_off():
+    with pytest.raises(ValueError):
+        with instrumentation.run("test", profiler="bogus"):
+            pass
+    assert not instrumentation.is_enabled()
+
+
+def test_drain_and_merge_combine_timers():
+    instrumentation.enable()
+    instrumentation.record("t", 10)
+    instrumentation.count("c")
+    drained = instrumentation.drain()
+    assert instrumentation.stats()["timers"] == {}
+    instrumentation.record("t", 30)
+    instrumentation.merge(drained)
+    instrumentation.merge(None)
+    stats = instrumentation.stats()
+    assert stats["timers"]["t"]["count"] == 2
+    assert stats["timers"]["t"]["min_us"] == 0.01 and stats["timers"]["t"]["max_us"] == 0.03
+    assert stats["counters"] == {"c": 1}
+    instrumentation.disable()
+    assert instrumentation.drain() is None
+
+
+def test_pool_worker_stats_reach_the_parent(tmp_path):
+    tasks = [(i, None, None) for i in range(4)]
+    with instrumentation.run("batch"):
+        results = list(conceive_batch.conceive_many(tasks, workers=2, seed=1,
+                                                    records_dir=tmp_path, chunksize=1))
+        stats = instrumentation.stats()
+    assert all("instrumentation" not in result for result in results)
+    assert stats["timers"]["conceive_embryo"]["count"] == 4
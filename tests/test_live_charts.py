@@ -0,0 +1,91 @@
+import random
+
+import pytest
+
+from embryo_manager_extensions import EmbryoManagerExtensions
+from live_charts import MinMaxDecimator
+from timeseries_store import DevelopmentLogStore
+
+
+def check_buckets(decimator, xs, ys):
+    """Buckets cover consecutive runs of bucket_size samples and keep their extremes"""
+    position = 0
+    for i, (x_min, y_min, x_max, y_max, n) in enumerate(decimator.buckets):
+        if i < len(decimator.buckets) - 1:
+            assert n == decimator.bucket_size
+        run = list(zip(xs[position:position + n], ys[position:position + n]))
+        assert y_min == min(y for _, y in run) and (x_min, y_min) in run
+        assert y_max == max(y for _, y in run) and (x_max, y_max) in run
+        position += n
+    assert position == decimator.count == len(ys)
+    assert len(decimator.buckets) <= 2 * decimator.n_buckets
+
+
+@pytest.mark.parametrize("chunks", [[1000], [3, 5, 7, 500, 1, 64, 420], [1] * 300])
+def test_extend_and_add_keep_bucket_extremes(chunks):
+    rng = random.Random(7)
+    decimator = MinMaxDecimator(16)
+    xs, ys = [], []
+    for size in chunks:
+        new_x = list(range(len(xs) + 5000, len(xs) + 5000 + size))
+        new_y = [rng.uniform(-1, 1) for _ in range(size)]
+        if size == 1:
+            decimator.add(new_x[0], new_y[0])
+        else:
+            decimator.extend(new_x, new_y)
+        xs += new_x
+        ys += new_y
+    check_buckets(decimator, xs, ys)
+    point_x, point_y = decimator.points()
+    assert list(point_x) == sorted(point_x)
+    assert max(point_y) == max(ys) and min(point_y) == min(ys)
+    assert decimator.bounds() == (5000, max(point_x), min(ys), max(ys))
+
+
+def test_merge_pairs_at_bucket_boundaries():
+    decimator = MinMaxDecimator(2)
+    for x in range(5):
+        decimator.add(x, float(x % 3))
+    # Five samples overflow four buckets: pairs merge and the odd one is carried
+    assert decimator.bucket_size == 2
+    assert [b[4] for b in decimator.buckets] == [2, 2, 1]
+    assert decimator.buckets[1] == [3, 0.0, 2, 2.0, 2]
+    decimator.add(5, 9.0)
+    assert decimator.buckets[-1] == [4, 1.0, 5, 9.0, 2]
+
+
+class FakeChart:
+    def __init__(self):
+        self.xs, self.ys = [], []
+
+    def reset(self, ys, xs=None):
+        self.xs, self.ys = list(xs), list(ys)
+
+    def extend(self, ys, xs=None):
+        self.xs += list(xs)
+        self.ys += list(ys)
+
+
+def test_streamed_samples_keep_their_sample_index(tmp_path):
+    store = DevelopmentLogStore(tmp_path / "abc", ["stage"])
+    for i in range(500):
+        store.append(i / 1000, stage=float(i))
+    extensions = object.__new__(EmbryoManagerExtensions)
+    extensions.ensure_monitoring_graphs = lambda: None
+    extensions.update_neural_graph = lambda connections: None
+    extensions.dev_chart = FakeChart()
+    extensions.dev_chart_embryo = None
+    extensions.dev_chart_next = 0
+
+    data = extensions.load_development_series(store, max_points=100)
+    extensions.update_monitoring_graphs(data, "abc")
+    assert len(extensions.dev_chart.xs) <= 200
+    assert extensions.dev_chart.xs[-1] == 499
+
+    for i in range(500, 510):
+        store.append(i / 1000, stage=float(i))
+    data = extensions.load_development_series(store, start=data["last_timestamp"] + 1e-9)
+    extensions.append_development_samples([d["stage"] for d in data["development_history"]],
+                                          [d["index"] for d in data["development_history"]])
+    assert extensions.dev_chart.xs[-10:] == list(range(500, 510))
+    assert extensions.dev_chart_next == 510
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+import pareto_front
+from pareto_front import ParetoSelector, non_dominated_ranks
+
+
+def brute_force_ranks(points):
+    """Peel fronts by comparing every pair of rows"""
+    # dominates[j, i]: row j is at least as good everywhere and better somewhere
+    dominates = ((points[:, None] >= points[None]).all(axis=2)
+                 & (points[:, None] > points[None]).any(axis=2))
+    ranks = np.full(len(points), -1)
+    remaining = np.ones(len(points), dtype=bool)
+    rank = 0
+    while remaining.any():
+        front = remaining & ~dominates[remaining].any(axis=0)
+        ranks[front] = rank
+        remaining &= ~front
+        rank += 1
+    return ranks
+
+
+@pytest.mark.parametrize("objectives", [1, 2, 3, 4, 5])
+@pytest.mark.parametrize("seed", range(5))
+def test_ranks_match_brute_force(objectives, seed):
+    rng = np.random.default_rng(seed)
+    # Few distinct values, so ties on single objectives are common
+    points = rng.integers(0, 6, size=(300, objectives)).astype(float)
+    np.testing.assert_array_equal(non_dominated_ranks(points), brute_force_ranks(points))
+
+
+@pytest.mark.parametrize("objectives", [2, 3, 4])
+def test_continuous_points_match_brute_force(objectives):
+    # More rows than the brute-force block size, so Kung's split is used for 4
+    points = np.random.default_rng(7).normal(size=(400, objectives))
+    np.testing.assert_array_equal(non_dominated_ranks(points), brute_force_ranks(points))
+
+
+@pytest.mark.parametrize("objectives", [2, 3, 4])
+def test_duplicates_share_a_rank(objectives):
+    rng = np.random.default_rng(objectives)
+    base = rng.integers(0, 4, size=(40, objectives)).astype(float)
+    points = np.vstack([base, base[::2], base[:5]])
+    ranks = non_dominated_ranks(points)
+    np.testing.assert_array_equal(ranks, brute_force_ranks(points))
+    np.testing.assert_array_equal(ranks[40:60], ranks[0:40:2])
+    np.testing.assert_array_equal(ranks[60:], ranks[:5])
+
+
+@pytest.mark.parametrize("objectives", [2, 3, 4])
+def test_ties_on_one_objective(objectives):
+    points = np.zeros((6, objectives))
+    points[:, 1] = [3, 2, 1, 3, 2, 1]
+    points[3:, 0] = 1
+    expected = brute_force_ranks(points)
+    np.testing.assert_array_equal(non_dominated_ranks(points), expected)
+    assert expected.tolist() == [1, 2, 3, 0, 1, 2]
+
+
+@pytest.mark.parametrize("objectives", [3, 4])
+def test_early_stop_ranks_a_prefix(objectives):
+    points = np.random.default_rng(3).integers(0, 5, size=(200, objectives)).astype(float)
+    expected = brute_force_ranks(points)
+    limited = non_dominated_ranks(points, max_rank=2)
+    np.testing.assert_array_equal(limited, np.where(expected < 2, expected, -1))
+    assert pareto_front.pareto_front(points).tolist() == np.flatnonzero(expected == 0).tolist()
+
+    partial = non_dominated_ranks(points, min_count=50)
+    ranked = partial >= 0
+    assert ranked.sum() >= 50
+    np.testing.assert_array_equal(partial[ranked], expected[ranked])
+
+
+def test_selector_minimises_and_selects_whole_fronts():
+    selector = ParetoSelector(["a", "b:min"])
+    selector.add_many(["x", "y", "z", "w"],
+                      [{"a": 1, "b": 1}, {"a": 2, "b": 2}, {"a": 0, "b": 2}, {"a": 2}])
+    assert selector.fronts() == [["x", "y"], ["z", "w"]]
+    assert selector.select(2) == ["x", "y"]
+    assert len(selector.select(3)) == 3
@@ -0,0 +1,97 @@
+import os
+
+import pytest
+
+import population_analytics
+import record_io
+from population_analytics import PopulationAnalytics
+
+
+def test_listener_errors_do_not_fail_conception(genetics, tmp_path, capsys):
+    def broken(record):
+        raise RuntimeError("boom")
+
+    analytics = PopulationAnalytics()
+    genetics.add_conception_listener(broken)
+    analytics.attach(genetics)
+    try:
+        embryo_id = genetics.conceive_embryo(records_dir=tmp_path)
+    finally:
+        genetics.remove_conception_listener(broken)
+        analytics.detach()
+    assert (tmp_path / f"conception_{embryo_id}.json").exists()
+    assert analytics.population_size() == 1
+    assert "Warning: Conception listener failed" in capsys.readouterr().out
+
+
+def test_seen_window_is_bounded(genetics, tmp_path):
+    analytics = PopulationAnalytics(max_seen=3)
+    analytics.attach(genetics)
+    try:
+        ids = [genetics.conceive_embryo(records_dir=tmp_path) for _ in range(5)]
+    finally:
+        analytics.detach()
+    assert list(analytics.seen) == ids[-3:]
+    assert analytics.population_size() == 5
+
+
+def test_ingest_only_reads_new_records(genetics, tmp_path):
+    ids = [genetics.conceive_embryo(records_dir=tmp_path) for _ in range(4)]
+    analytics = PopulationAnalytics(max_seen=2)
+    assert analytics.ingest_records_dir(tmp_path) == 4
+    assert analytics.ingest_records_dir(tmp_path) == 0
+
+    # Older records fall out of the seen window but are not re-read
+    stamp = max((tmp_path / f"conception_{i}.json").stat().st_mtime_ns for i in ids)
+    newest = genetics.conceive_embryo(records_dir=tmp_path)
+    os.utime(tmp_path / f"conception_{newest}.json", ns=(stamp + 10**9, stamp + 10**9))
+    assert analytics.ingest_records_dir(tmp_path) == 1
+    assert analytics.population_size() == 5
+
+
+def test_save_load_keeps_window(genetics, tmp_path):
+    records = tmp_path / "records"
+    for _ in range(3):
+        genetics.conceive_embryo(records_dir=records)
+    analytics = PopulationAnalytics(max_seen=2)
+    analytics.ingest_records_dir(records)
+    analytics.save(tmp_path / "analytics.json")
+    loaded = PopulationAnalytics.load(tmp_path / "analytics.json")
+    assert loaded.seen == analytics.seen
+    assert loaded.max_seen == 2
+    assert loaded.ingest_records_dir(records) == 0
+    assert loaded.population_size() == 3
+    assert record_io.read(tmp_path / "analytics.json")["ingested_to"]
+
+
+def test_ingest_reads_records_that_land_late(genetics, tmp_path):
+    genetics.conceive_embryo(records_dir=tmp_path)
+    analytics = PopulationAnalytics()
+    assert analytics.ingest_records_dir(tmp_path) == 1
+    since = analytics.ingested_to[str(tmp_path.resolve())][0]
+
+    # Renamed into place after the pass, stamped when its temp file was written
+    late = genetics.conceive_embryo(records_dir=tmp_path)
+    os.utime(tmp_path / f"conception_{late}.json", ns=(since - 10**9, since - 10**9))
+    # Too old to have been in flight during the last pass
+    stale = genetics.conceive_embryo(records_dir=tmp_path)
+    old = since - population_analytics.INGEST_WINDOW_NS - 1
+    os.utime(tmp_path / f"conception_{stale}.json", ns=(old, old))
+
+    assert analytics.ingest_records_dir(tmp_path) == 1
+    assert late in analytics.seen and stale not in analytics.seen
+    assert analytics.ingest_records_dir(tmp_path) == 0
+
+
+def test_heterozygosity_rejects_bad_arguments(genetics, tmp_path):
+    genetics.conceive_embryo(records_dir=tmp_path)
+    analytics = PopulationAnalytics()
+    analytics.ingest_records_dir(tmp_path)
+    trait = analytics.trait_names[0]
+    assert 0.0 <= analytics.heterozygosity(0, trait, position=0) <= 1.0
+    for kwargs in ({"position": 0}, {"trait": "wings"}, {"trait": trait, "position": 8},
+                   {"trait": trait, "position": -1}):
+        with pytest.raises(ValueError):
+            analytics.heterozygosity(0, **kwargs)
+    with pytest.raises(ValueError):
+        analytics.allele_frequencies(0, "wings")
@@ -0,0 +1,100 @@
+import os
+import tracemalloc
+
+import pytest
+
+import record_io
+from population_store import SpillingPopulation
+
+
+def genetic_data(embryo_id, generation, padding=100):
+    return {"embryo_id": embryo_id, "dna_information": {"generation": generation},
+            "combined_traits": {"intelligence": 0.5}, "notes": "x" * padding}
+
+
+@pytest.fixture
+def population(tmp_path):
+    population = SpillingPopulation(tmp_path / "spill")
+    # Room for roughly one generation of ten records
+    population.memory_budget = 12 * population.record_size(genetic_data("g0_0", 0))
+    yield population
+    population.close()
+
+
+def fill(population, generations, per_generation=10):
+    for generation in range(generations):
+        for index in range(per_generation):
+            embryo_id = f"g{generation}_{index}"
+            population.add(embryo_id, genetic_data(embryo_id, generation))
+
+
+def test_spilled_records_read_back(population):
+    fill(population, 4)
+    assert not population.is_resident("g0_3")
+    assert population.is_resident("g3_3")
+    assert population["g0_3"] == genetic_data("g0_3", 0)
+    assert dict(population.items()) == {
+        f"g{g}_{i}": genetic_data(f"g{g}_{i}", g) for g in range(4) for i in range(10)}
+
+
+def test_one_segment_file_and_no_open_files(population):
+    before = len(os.listdir("/proc/self/fd")) if os.path.isdir("/proc/self/fd") else None
+    fill(population, 40)
+    assert [p.name for p in population.directory.iterdir()] == ["population.seg"]
+    if before is not None:
+        # The segment's map is the only handle that stays open
+        assert len(os.listdir("/proc/self/fd")) <= before + 1
+    assert population.stats()["spilled_embryos"] == 390
+
+
+def test_respilling_a_generation_appends(population):
+    fill(population, 2)
+    population.pin_embryos(["g0_1"])
+    population.unpin_embryos(["g0_1"])
+    fill(population, 3)
+    assert population["g0_1"] == genetic_data("g0_1", 0)
+    assert population.spill_stats["segments"] >= 2
+    assert len(list(population.directory.iterdir())) == 1
+
+
+def test_current_generation_over_budget_warns_once(tmp_path, capsys, monkeypatch):
+    population = SpillingPopulation(tmp_path)
+    population.memory_budget = 3 * population.record_size(genetic_data("g0_0", 0))
+    calls = []
+    spill = population.spill
+    monkeypatch.setattr(population, "spill", lambda *a: calls.append(a) or spill(*a))
+    try:
+        fill(population, 1)
+        assert capsys.readouterr().out.count("Warning") == 1
+        # Nothing more can be spilled until a new generation starts
+        assert len(calls) == 1
+        fill(population, 2)
+        assert population.is_resident("g1_0") and not population.is_resident("g0_0")
+    finally:
+        population.close()
+
+
+def test_resident_bytes_track_heap_size(tmp_path):
+    population = SpillingPopulation(tmp_path, memory_budget=10**9)
+    try:
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        # Decoded like records read from disk, so nothing is shared between them
+        records = [record_io.loads(record_io.dumps(
+            genetic_data(f"g0_{i}", 0, padding=i * 37 % 300), "compact"))
+            for i in range(200)]
+        allocated = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        for record in records:
+            population.add(record["embryo_id"], record)
+        assert population.size_ratio > 2
+        assert 0.8 < population.resident_bytes / allocated < 1.25
+    finally:
+        population.close()
+
+
+def test_close_removes_segment(population):
+    fill(population, 3)
+    path = population.segment.path
+    population.close()
+    assert not path.exists()
@@ -0,0 +1,111 @@
+import multiprocessing
+
+import pytest
+
+import conceive_batch
+import record_io
+from population_table import PopulationTable, attach_worker, worker_table
+
+TRAITS = ["a", "b"]
+CAPABILITIES = ["x"]
+SPECIALIZATIONS = ["s1", "s2", "s3"]
+
+
+def _table(**kwargs):
+    return PopulationTable.create(capacity=4, trait_names=TRAITS, capability_names=CAPABILITIES,
+                                  specialization_names=SPECIALIZATIONS, **kwargs)
+
+
+def _genetic_data(generation=1, sequences=True, growth_rate=0.15):
+    data = {
+        "combined_traits": {"a": 2.5, "b": 1.75},
+        "specializations": ["s1", "s3"],
+        "potential_capabilities": {"x": 2.25},
+        "dna_information": {"generation": generation},
+    }
+    if sequences:
+        data["dna_information"]["trait_sequences"] = {"a": [0, 1, 2, 3, 3, 2, 1, 0],
+                                                      "b": [3] * 8}
+    if growth_rate is not None:
+        data["growth_rate"] = growth_rate
+    return data
+
+
+@pytest.mark.parametrize("backing", ["shm", "file"])
+def test_round_trip_through_attached_reader(backing, tmp_path):
+    table = _table(path=tmp_path / "table.bin") if backing == "file" else _table()
+    try:
+        table.append("e1", _genetic_data())
+        table.append("e2", _genetic_data(generation=2, sequences=False, growth_rate=None))
+        reader = PopulationTable.open_handle(table.handle)
+        assert reader.genetic_data("e1") == _genetic_data()
+        assert reader.genetic_data("e2") == _genetic_data(generation=2, sequences=False,
+                                                          growth_rate=None)
+        assert reader.genetic_data("missing") is None
+        # Rows published after attaching are visible to the reader
+        table.append("e3", _genetic_data(generation=3))
+        assert reader.genetic_data("e3")["dna_information"]["generation"] == 3
+        assert reader.generations.tolist() == [1, 2, 3]
+        assert reader.with_specialization("s3").tolist() == [0, 1, 2]
+        with pytest.raises(PermissionError):
+            reader.append("e4", _genetic_data())
+        reader.close()
+    finally:
+        table.close()
+        table.unlink()
+
+
+def test_rejects_overflow_and_bad_rows():
+    table = _table()
+    try:
+        with pytest.raises(ValueError):
+            table.append("x" * 17, _genetic_data())
+        bad = _genetic_data()
+        bad["specializations"] = ["unknown"]
+        with pytest.raises(ValueError):
+            table.append("e0", bad)
+        for i in range(4):
+            table.append(f"e{i}", _genetic_data())
+        with pytest.raises(ValueError):
+            table.append("e5", _genetic_data())
+    finally:
+        table.close()
+        table.unlink()
+
+
+def _read_in_worker(embryo_id):
+    return worker_table().genetic_data(embryo_id)
+
+
+def test_workers_read_the_table():
+    table = _table()
+    try:
+        table.append("e1", _genetic_data())
+        with multiprocessing.Pool(2, initializer=attach_worker, initargs=(table.handle,)) as pool:
+            assert pool.map(_read_in_worker, ["e1", "missing"]) == [_genetic_data(), None]
+    finally:
+        table.close()
+        table.unlink()
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_conceive_many_appends_children(genetics, tmp_path, workers):
+    parents = [genetics.conceive_embryo(records_dir=tmp_path) for _ in range(2)]
+    table = PopulationTable.from_records_dir(tmp_path, reserve=3)
+    try:
+        tasks = [(i, *parents) for i in range(3)]
+        results = list(conceive_batch.conceive_many(tasks, workers, seed=1,
+                                                    records_dir=tmp_path, table=table))
+        assert all("genetic_data" not in result and "error" not in result
+                   for result in results)
+        assert len(table) == 5
+        for result in results:
+            record = record_io.read(tmp_path / f"conception_{result['embryo_id']}.json")
+            stored = table.genetic_data(result["embryo_id"])
+            assert stored["growth_rate"] == record["genetic_data"]["growth_rate"]
+            assert stored["dna_information"]["trait_sequences"] == \
+                record["genetic_data"]["dna_information"]["trait_sequences"]
+        assert conceive_batch._worker_options.get("table") is None
+    finally:
+        table.close()
+        table.unlink()
@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+import status_tracking
+from readiness_tracker import ReadinessEvent, ReadinessTracker
+from synthetic import SyntheticEmbryo
+
+DRILLS = {
+    "experiences": [{"type": "memory", "complexity": 0.4}],
+    "duration": 2,
+    "required_stage": 0.25,
+    "metrics": ["memory_capacity"],
+}
+
+
+@pytest.fixture
+def school(school_module):
+    school = school_module.EmbryoSchool()
+    school.training_programs = {"drills": json.loads(json.dumps(DRILLS))}
+    return school
+
+
+@pytest.fixture
+def tracker(school):
+    tracker = ReadinessTracker(school)
+    tracker.events = []
+    tracker.add_listener(tracker.events.append)
+    yield tracker
+    tracker.close()
+
+
+def test_crossing_the_stage_threshold_emits_events(tracker):
+    embryo = SyntheticEmbryo(seed=1, embryo_id="e1")
+    tracker.watch(embryo)
+    assert tracker.ready_programs("e1") == set()
+    while embryo.development_stage < DRILLS["required_stage"]:
+        embryo.develop()
+    assert tracker.events == [ReadinessEvent("e1", "drills", True)]
+    assert tracker.ready_embryos("drills") == {"e1"}
+
+    embryo.development_stage = 0.0
+    status_tracking.mark_changed(embryo)
+    assert tracker.events[1:] == [ReadinessEvent("e1", "drills", False)]
+    assert tracker.ready_embryos("drills") == set()
+
+
+def test_program_changes_rebuild_the_index(tracker, school, tmp_path):
+    embryo = SyntheticEmbryo(seed=1, embryo_id="e1", development_stage=1.0)
+    tracker.watch(embryo)
+    assert tracker.ready_programs("e1") == {"drills"}
+
+    # Recompiling an edited program re-indexes its thresholds
+    school.training_programs["drills"]["required_stage"] = 5
+    school.compiled_program("drills")
+    assert tracker.events == [ReadinessEvent("e1", "drills", False)]
+
+    config = tmp_path / "programs.json"
+    config.write_text(json.dumps({"programs": {"easy": {**DRILLS, "required_stage": 0}}}))
+    school.load_programs(config)
+    assert tracker.events[1:] == [ReadinessEvent("e1", "easy", True)]
+
+    # Programs added to the dict directly show up at the next query
+    school.training_programs["also_easy"] = {**DRILLS, "required_stage": 0}
+    assert tracker.ready_programs("e1") == {"easy", "also_easy"}
+    del school.training_programs["easy"]
+    assert tracker.ready_programs("e1") == {"also_easy"}
+
+
+def test_unwatched_embryos_are_forgotten(tracker):
+    embryo = SyntheticEmbryo(seed=1, embryo_id="e1", development_stage=1.0)
+    tracker.watch(embryo)
+    tracker.unwatch("e1")
+    assert tracker.ready_embryos("drills") == set()
+    assert embryo.__dict__[status_tracking.LISTENERS_ATTR] == []
+    embryo.development_stage = 0.0
+    status_tracking.mark_changed(embryo)
+    assert tracker.events == []
+    with pytest.raises(KeyError):
+        tracker.ready_programs("e1")
@@ -0,0 +1,66 @@
+import os
+
+import record_io
+
+
+def write_record(records_dir, embryo_id, value=0.5, fmt=None):
+    record = {"embryo_id": embryo_id, "parentage": None,
+              "genetic_data": {"combined_traits": {"intelligence": value}}}
+    path = record_io.write(records_dir / f"conception_{embryo_id}.json", record, fmt)
+    return record, path
+
+
+def test_changed_files_are_reloaded(genetics, tmp_path):
+    cache = genetics.RecordCache()
+    record, path = write_record(tmp_path, "a")
+    first = cache.get("a", tmp_path)
+    assert first == record
+    assert cache.get("a", tmp_path) is first
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # Same size, so only the mtime tells the versions apart
+    changed, _ = write_record(tmp_path, "a", value=0.7)
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert cache.get("a", tmp_path) == changed
+    # A record rewritten in another format is found and reloaded too
+    binary, _ = write_record(tmp_path, "a", value=0.9, fmt="binary")
+    assert cache.get("a", tmp_path) == binary
+    assert cache.misses == 3 and cache.stats()["entries"] == 1
+
+
+def test_least_recently_used_records_are_evicted(genetics, tmp_path):
+    _, path = write_record(tmp_path, "a")
+    size = path.stat().st_size
+    for embryo_id in "bc":
+        write_record(tmp_path, embryo_id)
+    cache = genetics.RecordCache(max_bytes=2 * size)
+    cache.get("a", tmp_path)
+    cache.get("b", tmp_path)
+    cache.get("a", tmp_path)
+    cache.get("c", tmp_path)
+    assert cache.stats()["entries"] == 2 and cache.total_bytes <= 2 * size
+    cache.get("a", tmp_path)
+    cache.get("b", tmp_path)
+    assert (cache.hits, cache.misses) == (2, 4)
+
+    # Records larger than the whole budget are never kept
+    small = genetics.RecordCache(max_bytes=size - 1)
+    small.get("a", tmp_path)
+    assert small.stats()["entries"] == 0 and small.total_bytes == 0
+
+
+def test_prefetch_reads_each_parent_once(genetics, tmp_path):
+    for embryo_id in "abc":
+        write_record(tmp_path, embryo_id, value=ord(embryo_id))
+    before = genetics.record_cache.stats()
+    parents = genetics.prefetch_parents(
+        [("a", "b"), ("b", "c"), ("a", "missing"), (None, "c")], tmp_path)
+    assert parents == {embryo_id: {"combined_traits": {"intelligence": ord(embryo_id)}}
+                       for embryo_id in "abc"}
+    after = genetics.record_cache.stats()
+    assert after["misses"] - before["misses"] == 3
+    assert after["hits"] == before["hits"]
+    # Later loads of a prefetched parent are cache hits
+    genetics.load_conception_record("b", tmp_path)
+    assert genetics.record_cache.stats()["hits"] == before["hits"] + 1
@@ -0,0 +1,103 @@
+import math
+import os
+
+import pytest
+
+import genome_store
+import record_io
+from population_analytics import PopulationAnalytics
+from population_table import PopulationTable
+
+RECORD = {"embryo_id": "abc", "values": [1, 2.5, None], "nested": {"text": "é", "flag": True}}
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def encoder(request, monkeypatch):
+    if request.param == "stdlib":
+        monkeypatch.setattr(record_io, "orjson", None)
+    elif record_io.orjson is None:
+        pytest.skip("orjson is not installed")
+    return request.param
+
+
+@pytest.mark.parametrize("fmt", record_io.FORMATS)
+def test_round_trip(fmt, encoder):
+    data = record_io.dumps(RECORD, fmt)
+    assert record_io.loads(data) == RECORD
+    assert record_io.is_binary(data) == (fmt == "binary")
+    assert record_io.loads(data.decode() if fmt != "binary" else data) == RECORD
+
+
+def test_non_finite_values_survive_both_encoders(encoder):
+    data = record_io.dumps({"a": [math.nan, math.inf], "b": None}, "compact")
+    assert b"NaN" in data and b"Infinity" in data
+    decoded = record_io.loads(data)
+    assert math.isnan(decoded["a"][0]) and decoded["a"][1] == math.inf
+    assert decoded["b"] is None
+
+
+def test_rejects_unknown_formats():
+    with pytest.raises(ValueError):
+        record_io.dumps(RECORD, "xml")
+    with pytest.raises(ValueError):
+        record_io.loads(record_io.BINARY_MAGIC + bytes((9, 1)) + b"data")
+
+
+def test_binary_records_use_bin_suffix(tmp_path):
+    name = tmp_path / "conception_abc.json"
+    assert record_io.write(name, RECORD) == name
+    written = record_io.write(name, RECORD, "binary")
+    assert written == tmp_path / "conception_abc.bin"
+    # The record lives in exactly one file, found under its usual name
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["conception_abc.bin"]
+    assert record_io.exists(name) and record_io.locate(name) == written
+    assert record_io.read(name) == RECORD
+    assert [p.name for p in record_io.glob(tmp_path, "conception_*")] == ["conception_abc.bin"]
+    record_io.write(written, RECORD, "json")
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["conception_abc.json"]
+    # Other files keep their names whatever the format
+    assert record_io.write(tmp_path / "stats.out", RECORD, "binary").name == "stats.out"
+
+
+def test_failed_write_leaves_no_temp_file(tmp_path, monkeypatch):
+    record_io.write(tmp_path / "r.json", {"old": True})
+
+    def fail(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "replace", fail)
+    with pytest.raises(OSError):
+        record_io.write(tmp_path / "r.json", RECORD)
+    monkeypatch.undo()
+    assert [p.name for p in tmp_path.iterdir()] == ["r.json"]
+    assert record_io.read(tmp_path / "r.json") == {"old": True}
+    with pytest.raises(TypeError):
+        record_io.write(tmp_path / "r.json", {"bad": object()})
+    assert [p.name for p in tmp_path.iterdir()] == ["r.json"]
+
+
+def test_binary_conception_records_are_found(genetics, tmp_path, monkeypatch):
+    monkeypatch.setattr(record_io, "RECORD_FORMAT", "binary")
+    parents = [genetics.conceive_embryo(records_dir=tmp_path) for _ in range(2)]
+    child = genetics.conceive_embryo(*parents, records_dir=tmp_path)
+    assert {p.suffix for p in tmp_path.iterdir()} == {".bin"}
+    genetics.record_cache.invalidate()
+    assert genetics.load_conception_record(child, tmp_path)["embryo_id"] == child
+    assert [r["embryo_id"] for _, r in genome_store.walk_lineage(child, tmp_path)][0] == child
+    assert PopulationAnalytics().ingest_records_dir(tmp_path) == 3
+    table = PopulationTable.from_records_dir(tmp_path)
+    try:
+        assert len(table) == 3
+    finally:
+        table.close()
+        table.unlink()
+
+
+def test_exclusive_write_refuses_existing_record(tmp_path):
+    record_io.write(tmp_path / "r.json", {"a": 1}, "binary")
+    with pytest.raises(FileExistsError):
+        record_io.write(tmp_path / "r.json", {"a": 2}, "compact", exclusive=True)
+    assert record_io.read(tmp_path / "r.json") == {"a": 1}
+    assert [p.name for p in tmp_path.iterdir()] == ["r.bin"]
+    record_io.write(tmp_path / "s.json", {"b": 1}, exclusive=True)
+    assert record_io.read(tmp_path / "s.json") == {"b": 1}
@@ -0,0 +1,22 @@
+import pytest
+
+import record_io
+import run_benchmarks
+
+
+@pytest.mark.parametrize("fmt", ["compact", "binary"])
+def test_record_read_finds_records_in_any_format(workdir, fmt):
+    records_dir = workdir / "conception_records"
+    records_dir.mkdir()
+    for i in range(3):
+        record_io.write(records_dir / f"conception_{i}.json", {"embryo_id": str(i)}, fmt)
+    operation, ops = run_benchmarks.bench_record_read(3, [], 10)
+    assert ops == 3
+    for i in range(ops):
+        operation(i)
+
+
+def test_record_read_without_records_says_so(workdir):
+    (workdir / "conception_records").mkdir()
+    with pytest.raises(RuntimeError, match="No conception records"):
+        run_benchmarks.bench_record_read(3, [], 10)
@@ -0,0 +1,56 @@
+import gc
+import weakref
+
+import pytest
+
+import status_tracking
+
+
+class Embryo:
+    def __init__(self):
+        self.embryo_id = "e1"
+        self.stage = 0
+
+    def develop(self):
+        self.stage += 1
+
+    def learn_from_experience(self, experience):
+        raise ValueError("bad experience")
+
+
+def test_listener_errors_are_reported_not_raised(capsys):
+    embryo = Embryo()
+    calls = []
+    status_tracking.add_listener(embryo, lambda e, reason: 1 / 0)
+    status_tracking.add_listener(embryo, lambda e, reason: calls.append(reason))
+    embryo.develop()
+    assert embryo.stage == 1 and calls == ["develop"]
+    assert "Warning: Status listener failed for e1: ZeroDivisionError" in capsys.readouterr().out
+
+
+def test_failing_methods_skip_listeners_but_drop_the_cache():
+    embryo = Embryo()
+    calls = []
+    status_tracking.add_listener(embryo, lambda e, reason: calls.append(reason))
+    status_tracking.state_cache(embryo)["status"] = "stale"
+    version = status_tracking.version(embryo)
+    with pytest.raises(ValueError, match="bad experience"):
+        embryo.learn_from_experience({})
+    assert calls == []
+    assert status_tracking.state_cache(embryo) == {}
+    assert status_tracking.version(embryo) == version + 1
+
+
+def test_tracked_classes_can_be_collected():
+    namespace = {}
+    exec("class Reloaded:\n    def develop(self):\n        pass\n", namespace)
+    base = namespace.pop("Reloaded")
+    embryo = base()
+    status_tracking.track(embryo)
+    assert status_tracking.is_tracked(embryo) and type(embryo) is not base
+    assert status_tracking._tracked_class(base) is type(embryo)
+
+    alive = weakref.ref(base)
+    del base, embryo
+    gc.collect()
+    assert alive() is None
@@ -0,0 +1,154 @@
+import math
+import multiprocessing
+
+import pytest
+
+from timeseries_store import DevelopmentLogStore
+
+
+def _store(directory, **kwargs):
+    return DevelopmentLogStore(directory, ["stage", "neural.memory"], **kwargs)
+
+
+def test_round_trip_and_reopen(tmp_path):
+    store = _store(tmp_path / "e1", chunk_size=4, resolutions=(10,))
+    for i in range(10):
+        store.append(float(i), stage=i / 10, **{"neural.memory": i * 2})
+    assert len(store) == 10
+    assert store.chunk_rows == [4, 4, 2]
+
+    reopened = DevelopmentLogStore(tmp_path / "e1")
+    assert reopened.fields == ["stage", "neural.memory"]
+    assert reopened.range(3, 7) == store.range(3, 7)
+    assert reopened.range(3, 7)["timestamp"] == [3.0, 4.0, 5.0, 6.0]
+    assert reopened.latest()["neural.memory"] == 18.0
+
+
+def test_missing_fields_are_nan(tmp_path):
+    store = _store(tmp_path / "e1")
+    store.append(1.0, stage=0.5)
+    assert math.isnan(store.range()["neural.memory"][0])
+
+
+def test_rejects_backwards_timestamps_and_unknown_fields(tmp_path):
+    store = _store(tmp_path / "e1")
+    store.append(5.0, stage=1)
+    with pytest.raises(ValueError):
+        store.append(4.0, stage=1)
+    with pytest.raises(ValueError):
+        store.append_row(6.0, {"neural.unknown": 1})
+    store.append(6.0, stage=1, ignore_unknown=True, **{"neural.unknown": 1})
+    assert len(store) == 2
+
+
+def test_open_without_fields_fails(tmp_path):
+    with pytest.raises(ValueError):
+        DevelopmentLogStore(tmp_path / "missing")
+
+
+def test_rollups_match_raw_samples(tmp_path):
+    store = _store(tmp_path / "e1", resolutions=(10, 100))
+    for i in range(250):
+        store.append(float(i), stage=float(i))
+    buckets = store.rollup(10)
+    assert [b["start"] for b in buckets] == [float(s) for s in range(0, 250, 10)]
+    assert all(b["count"] == 10 for b in buckets)
+    assert buckets[3]["fields"]["stage"] == {"min": 30.0, "max": 39.0, "mean": 34.5}
+    # The open bucket is rebuilt from raw samples when the series is reopened
+    reopened = DevelopmentLogStore(tmp_path / "e1")
+    assert reopened.rollup(100) == store.rollup(100)
+
+
+def test_query_switches_to_rollups(tmp_path):
+    store = _store(tmp_path / "e1", resolutions=(10, 100))
+    for i in range(500):
+        store.append(float(i), stage=1.0)
+    assert store.query(max_points=1000)["resolution"] is None
+    assert store.query(max_points=60)["resolution"] == 10
+
+
+def test_torn_trailing_row_is_ignored(tmp_path):
+    store = _store(tmp_path / "e1")
+    store.append(1.0, stage=1)
+    store.append(2.0, stage=2)
+    with open(store._chunk_file(0), "ab") as f:
+        f.write(b"\x00" * 5)
+    reopened = DevelopmentLogStore(tmp_path / "e1")
+    assert len(reopened) == 2
+    assert reopened.range()["timestamp"] == [1.0, 2.0]
+
+
+def test_none_timestamp_is_now_and_monotonic(tmp_path):
+    store = _store(tmp_path / "e1")
+    store.append(None, stage=1)
+    store.append(None, stage=2)
+    first, second = store.range()["timestamp"]
+    assert first <= second
+
+
+def test_writers_see_each_others_appends(tmp_path):
+    a = _store(tmp_path / "e1", chunk_size=3)
+    b = DevelopmentLogStore(tmp_path / "e1")
+    a.append(1.0, stage=1)
+    b.append(2.0, stage=2)
+    with pytest.raises(ValueError):
+        a.append(1.5, stage=3)
+    a.append(3.0, stage=3)
+    b.append(4.0, stage=4)
+    assert DevelopmentLogStore(tmp_path / "e1").chunk_rows == [3, 1]
+
+
+def _writer(directory, n):
+    store = DevelopmentLogStore(directory, ["stage", "neural.memory"], chunk_size=64,
+                                resolutions=(1,))
+    for i in range(n):
+        store.append(None, stage=i, **{"neural.memory": i})
+
+
+def test_concurrent_processes_append_in_order(tmp_path):
+    directory = tmp_path / "e1"
+    processes = [multiprocessing.Process(target=_writer, args=(directory, 200))
+                 for _ in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+        assert process.exitcode == 0
+
+    store = DevelopmentLogStore(directory)
+    timestamps = store.range()["timestamp"]
+    assert len(timestamps) == 800
+    assert timestamps == sorted(timestamps)
+    assert all(rows <= 64 for rows in store.chunk_rows)
+    # Each window is flushed once, so closed buckets and the open one add up
+    assert sum(b["count"] for b in store.rollup(1)) == 800
+    starts = [b["start"] for b in store.rollup(1)]
+    assert starts == sorted(set(starts))
+
+
+def test_bursts_are_decimated_by_sample_count(tmp_path):
+    store = _store(tmp_path / "e1", chunk_size=64)
+    # Two training runs a day apart, samples a millisecond apart
+    for run in range(2):
+        for i in range(500):
+            store.append(run * 86400 + i / 1000, stage=run * 500 + i)
+    view = store.query(max_points=100)
+    assert view["resolution"] == "samples"
+    buckets = view["buckets"]
+    assert 50 <= len(buckets) <= 100
+    assert sum(b["count"] for b in buckets) == 1000
+    stage = buckets[-1]["fields"]["stage"]
+    assert stage["max"] == 999.0 and stage["max_index"] == 999
+    assert [b["index"] for b in buckets] == sorted(b["index"] for b in buckets)
+
+
+def test_sample_indices_follow_the_series(tmp_path):
+    store = _store(tmp_path / "e1", chunk_size=4, resolutions=(10,))
+    for i in range(30):
+        store.append(float(i // 2), stage=float(i))
+    assert store.index_of(5.0) == 10
+    assert store.index_of(-1.0) == 0 and store.index_of(100.0) == 30
+    samples = store.range(5.0, 7.0, with_index=True)
+    assert samples["index"] == [10, 11, 12, 13]
+    assert samples["stage"] == [10.0, 11.0, 12.0, 13.0]
+    assert [b["index"] for b in store.rollup(10, 10.0)] == [20]
@@ -0,0 +1,72 @@
+from datetime import datetime
+
+import pytest
+
+import record_io
+from training_archive import TrainingArchive
+
+NOW = datetime(2026, 3, 1, 12, 0)
+
+
+def training_record(embryo_id, program, improvement=0.1):
+    return {
+        "embryo_id": embryo_id,
+        "program": program,
+        "training_log": [{"timestamp": "2026-03-01T10:00:00", "day": 1}],
+        "performance_history": [{"day": 1, "experiences": [
+            {"type": "pattern", "performance": 0.5}], "metrics": {"learning_capacity": 40.0}}],
+        "initial_metrics": {"learning_capacity": 39.0},
+        "final_metrics": {"learning_capacity": 40.0},
+        "improvement": {"learning_capacity": improvement},
+    }
+
+
+@pytest.fixture
+def logs(workdir):
+    log_dir = workdir / "training_logs"
+    log_dir.mkdir()
+    record_io.write(log_dir / "training_ab12_basic_cognition.json",
+                    training_record("ab12", "basic_cognition"), "json")
+    record_io.write(log_dir / "training_ab12_memory.json",
+                    training_record("ab12", "memory", 0.3), "binary")
+    return log_dir
+
+
+def test_compacts_json_and_binary_logs(logs):
+    archive = TrainingArchive()
+    stats = archive.compact(now=NOW)
+    assert stats["runs"] == 2 and stats["removed_sources"] == 2
+    assert not list(logs.iterdir())
+    assert sorted(run["program"] for run in archive.runs("ab12")) == \
+        ["basic_cognition", "memory"]
+    assert archive.program_summary("ab12", "memory")["memory"]["improvement"][
+        "learning_capacity"]["mean"] == pytest.approx(0.3)
+    assert archive._load_index("ab12")["sources"] == {}
+
+
+def test_interrupted_compaction_keeps_sources(logs, monkeypatch):
+    def fail(index):
+        raise OSError("disk full")
+
+    archive = TrainingArchive()
+    with monkeypatch.context() as patch:
+        patch.setattr(archive, "_save_index", fail)
+        with pytest.raises(OSError):
+            archive.compact(now=NOW)
+    assert len(list(logs.iterdir())) == 2
+
+    assert archive.compact(now=NOW)["removed_sources"] == 2
+    # Runs from the interrupted job are not counted twice
+    assert len(list(archive.runs("ab12"))) == 2
+    assert archive.program_summary("ab12")["memory"]["runs"] == 1
+
+
+def test_rejects_path_like_embryo_ids(logs, workdir, capsys):
+    record_io.write(logs / "training_evil_x.json", training_record("../evil", "x"))
+    archive = TrainingArchive()
+    assert archive.compact(now=NOW)["runs"] == 2
+    assert "Invalid embryo ID" in capsys.readouterr().out
+    assert (logs / "training_evil_x.json").exists()
+    assert not (workdir / "evil").exists()
+    with pytest.raises(ValueError):
+        archive.program_summary("../evil")
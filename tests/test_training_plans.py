@@ -0,0 +1,68 @@
+import json
+import pickle
+
+import pytest
+
+import training_plans
+
+PROGRAM = {
+    "experiences": [{"type": "memory", "complexity": 0.4, "data": "recall"},
+                    {"type": "pattern", "complexity": 0.2}],
+    "duration": 4,
+    "required_stage": 1,
+    "metrics": ["memory_capacity"],
+}
+
+
+def test_plan_is_immutable_and_detached():
+    details = json.loads(json.dumps(PROGRAM))
+    plan = training_plans.CompiledProgram("drills", details)
+    details["experiences"][0]["data"] = "changed"
+    assert plan.steps[0] == ("memory", {"data": "recall"})
+    assert plan.complexity.tolist() == [0.4, 0.2]
+    with pytest.raises(AttributeError):
+        plan.duration = 9
+    with pytest.raises(ValueError):
+        plan.complexity[0] = 1.0
+    assert pickle.loads(pickle.dumps(plan)).matches(PROGRAM)
+
+
+def test_day_complexities_scale_the_base_vector():
+    plan = training_plans.CompiledProgram("drills", PROGRAM)
+    assert plan.day_complexities([1.0, 1.1]) == pytest.approx([0.4, 0.22])
+
+
+def test_in_place_edits_recompile(school_module):
+    school = school_module.EmbryoSchool()
+    assert school.compiled_program("basic_cognition").duration == 5
+    school.training_programs["basic_cognition"]["duration"] = 99
+    assert school.compiled_program("basic_cognition").duration == 99
+    plan = school.compiled_program("basic_cognition")
+    assert school.compiled_program("basic_cognition") is plan
+
+
+@pytest.mark.parametrize("field, value", [
+    ("duration", "5"), ("duration", 2.5), ("required_stage", "hi"), ("metrics", "memory"),
+    ("experiences", [{"type": "memory", "complexity": "hi"}]),
+    ("experiences", [{"type": 3, "complexity": 0.1}]),
+])
+def test_rejects_mistyped_fields(field, value):
+    with pytest.raises(ValueError):
+        training_plans.validate_program("bad", {**PROGRAM, field: value})
+
+
+def test_bad_config_program_leaves_school_unchanged(school_module, tmp_path):
+    school = school_module.EmbryoSchool()
+    before = dict(school.training_programs)
+    config = tmp_path / "programs.json"
+    config.write_text(json.dumps({"programs": {
+        "drills": PROGRAM,
+        "broken": {**PROGRAM, "experiences": [{"type": "memory", "complexity": "hi"}]}}}))
+    with pytest.raises(ValueError):
+        school.load_programs(config)
+    assert school.training_programs == before
+
+    config.write_text(json.dumps({"programs": {"drills": PROGRAM},
+                                  "curriculum_paths": {"memory": ["drills"]}}))
+    assert school.load_programs(config) == ["drills"]
+    assert school.compiled_curriculum(school.curriculum_paths["memory"]).duration == 4
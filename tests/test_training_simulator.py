@@ -0,0 +1,75 @@
+import random
+import threading
+
+import numpy as np
+
+from synthetic import SyntheticEmbryo
+from training_simulator import TrainingSimulator
+
+
+def test_in_process_trials_leave_school_and_embryo_alone(school_module, workdir):
+    school = school_module.EmbryoSchool()
+    embryo = SyntheticEmbryo(seed=1, embryo_id="sim")
+    before = school.performance_metrics(embryo)
+    simulator = TrainingSimulator(school)
+
+    seen = []
+    original = school._run_program
+
+    def spy(*args, **kwargs):
+        seen.append(school.development_log_dir)
+        return original(*args, **kwargs)
+
+    school._run_program = spy
+    random.seed(3)
+    expected = random.random()
+    random.seed(3)
+    first = simulator.simulate(embryo, "basic_cognition", trials=4, seed=9)
+    assert random.random() == expected
+
+    assert set(seen) == {school.development_log_dir} and seen[0] is not None
+    assert school.performance_metrics(embryo) == before
+    assert not (workdir / "development_logs").exists()
+    assert simulator.simulate(embryo, "basic_cognition", trials=4, seed=9) == first
+
+
+def test_concurrent_simulation_does_not_disturb_training(school_module, workdir):
+    school = school_module.EmbryoSchool()
+    simulator = TrainingSimulator(school)
+    embryo = SyntheticEmbryo(seed=2, embryo_id="sim")
+    stop = threading.Event()
+
+    def simulate():
+        while not stop.is_set():
+            simulator.run_trials(embryo, "basic_cognition", trials=2, seed=1)
+
+    thread = threading.Thread(target=simulate)
+    thread.start()
+    try:
+        for _ in range(20):
+            assert school.development_log_dir is not None
+    finally:
+        stop.set()
+        thread.join()
+
+
+def test_trials_use_their_own_generators(school_module, workdir, monkeypatch):
+    def global_seed(*args):
+        raise AssertionError("the global random state was reseeded")
+
+    class RecordingEmbryo(SyntheticEmbryo):
+        def learn_from_experience(self, experience):
+            complexities.append(experience["complexity"])
+            return super().learn_from_experience(experience)
+
+    monkeypatch.setattr(random, "seed", global_seed)
+    monkeypatch.setattr(np.random, "seed", global_seed)
+    simulator = TrainingSimulator(school_module.EmbryoSchool())
+    embryo = RecordingEmbryo(seed=1, embryo_id="sim")
+    complexities = []
+    simulator.run_trials(embryo, "basic_cognition", trials=2, seed=5)
+    first, complexities = complexities, []
+    simulator.run_trials(embryo, "basic_cognition", trials=2, seed=5)
+    assert complexities == first
+    half = len(first) // 2
+    assert first[:half] != first[half:]
@@ -0,0 +1,456 @@
+# timeseries_store.py
+import json
+import math
+import os
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+
+import record_io
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+DEFAULT_CHUNK_SIZE = 4096
+DEFAULT_RESOLUTIONS = (60, 3600, 86400)
+# A rollup with fewer than max_points // ROLLUP_MIN_FILL buckets is too coarse
+# for a view; such ranges are decimated by sample count instead, up to this
+# many raw samples
+ROLLUP_MIN_FILL = 4
+MAX_DECIMATE_SAMPLES = 1_000_000
+ITEM_SIZE = array('d').itemsize
+
+
+def _timestamp(value) -> float:
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, str):
+        return datetime.fromisoformat(value).timestamp()
+    return float(value)
+
+
+class _Bucket:
+    """Running count/min/max/sum for one rollup bucket"""
+
+    def __init__(self, start: float, n_fields: int):
+        self.start = start
+        self.count = 0
+        self.stats = [[0, math.inf, -math.inf, 0.0] for _ in range(n_fields)]
+
+    def add(self, values):
+        self.count += 1
+        for stat, value in zip(self.stats, values):
+            if value != value:  # NaN marks a missing field
+                continue
+            stat[0] += 1
+            if value < stat[1]:
+                stat[1] = value
+            if value > stat[2]:
+                stat[2] = value
+            stat[3] += value
+
+    def to_array(self) -> array:
+        row = array('d', (self.start, self.count))
+        for n, low, high, total in self.stats:
+            row.extend((n, low, high, total))
+        return row
+
+
+class DevelopmentLogStore:
+    """Append-only, chunked time series of development samples for one embryo
+
+    Samples are fixed-width rows of doubles (timestamp followed by one column
+    per field) written to chunk files that are only ever appended to. Closed
+    rollup buckets at each resolution go to their own append-only files, so
+    monitoring views can read a bounded number of points for any range.
+    """
+
+    def __init__(self, directory, fields: List[str] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 resolutions=DEFAULT_RESOLUTIONS):
+        self.directory = Path(directory)
+        meta_file = self.directory / "fields.json"
+
+        if not meta_file.exists():
+            if fields is None:
+                raise ValueError(f"No development series at {self.directory} and no fields given")
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with self._locked():
+                # Another process may have created the series meanwhile
+                if not meta_file.exists():
+                    meta = {
+                        "fields": list(fields),
+                        "chunk_size": chunk_size,
+                        "resolutions": sorted(int(r) for r in resolutions)
+                    }
+                    temp = meta_file.with_name(f".fields.{os.getpid()}.tmp")
+                    temp.write_text(json.dumps(meta, indent=2))
+                    os.replace(temp, meta_file)
+        meta = json.loads(meta_file.read_text())
+
+        self.fields: List[str] = meta["fields"]
+        self.field_index = {name: i for i, name in enumerate(self.fields)}
+        self.chunk_size: int = meta["chunk_size"]
+        self.resolutions: List[int] = meta["resolutions"]
+        self.row_width = 1 + len(self.fields)
+        self.rollup_width = 2 + 4 * len(self.fields)
+
+        self._load_index()
+
+    @classmethod
+    def for_embryo(cls, embryo_id: str, neural_types: List[str] = None,
+                   log_dir="development_logs", **kwargs):
+        """Open (or create) the development series of an embryo"""
+        fields = None
+        if neural_types is not None:
+            fields = ["stage"] + [f"neural.{name}" for name in neural_types]
+        return cls(Path(log_dir) / embryo_id, fields, **kwargs)
+
+    # -- index ---------------------------------------------------------
+
+    def _chunk_file(self, number: int) -> Path:
+        return self.directory / f"chunk_{number:06d}.bin"
+
+    def _rollup_file(self, resolution: int) -> Path:
+        return self.directory / f"rollup_{resolution}.bin"
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive lock on the series, shared by every process appending to it"""
+        with open(self.directory / ".lock", "a+b") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+    def _tail_changed(self) -> bool:
+        """Whether another writer appended since the index was loaded"""
+        if self._chunk_file(len(self.chunk_rows)).exists():
+            return True
+        if not self.chunk_rows:
+            return False
+        size = self._chunk_file(len(self.chunk_rows) - 1).stat().st_size
+        return size // (self.row_width * ITEM_SIZE) != self.chunk_rows[-1]
+
+    def _load_index(self):
+        """Rebuild chunk start times and open rollup buckets from disk"""
+        row_bytes = self.row_width * ITEM_SIZE
+        self.chunk_starts: List[float] = []
+        self.chunk_rows: List[int] = []
+        number = 0
+        while self._chunk_file(number).exists():
+            chunk_file = self._chunk_file(number)
+            rows = chunk_file.stat().st_size // row_bytes
+            if rows == 0:
+                break
+            with open(chunk_file, 'rb') as f:
+                first = array('d')
+                first.frombytes(f.read(ITEM_SIZE))
+            self.chunk_starts.append(first[0])
+            self.chunk_rows.append(rows)
+            number += 1
+
+        self.last_timestamp = -math.inf
+        if self.chunk_rows:
+            last = self._read_chunk(len(self.chunk_rows) - 1)
+            self.last_timestamp = last[-self.row_width]
+
+        # Open buckets are never persisted; rebuild them from raw samples
+        self._open_buckets: Dict[int, Optional[_Bucket]] = {}
+        for resolution in self.resolutions:
+            self._open_buckets[resolution] = None
+            if self.last_timestamp == -math.inf:
+                continue
+            bucket_start = math.floor(self.last_timestamp / resolution) * resolution
+            bucket = _Bucket(bucket_start, len(self.fields))
+            for row in self._iter_rows(bucket_start, math.inf):
+                bucket.add(row[1:])
+            self._open_buckets[resolution] = bucket
+
+    def _read_chunk(self, number: int) -> array:
+        data = array('d')
+        with open(self._chunk_file(number), 'rb') as f:
+            raw = f.read()
+        # Ignore a torn trailing row from an interrupted append
+        usable = len(raw) - len(raw) % (self.row_width * ITEM_SIZE)
+        data.frombytes(raw[:usable])
+        return data
+
+    # -- writing -------------------------------------------------------
+
+    def append(self, timestamp, stage: float = None,
+               neural_connections: Dict[str, float] = None,
+               ignore_unknown: bool = False, **values):
+        """Append one sample; timestamps must not go backwards
+
+        A timestamp of None means now, read once the series is locked, so
+        concurrent writers always append in order.
+        """
+        if stage is not None:
+            values["stage"] = stage
+        for name, value in (neural_connections or {}).items():
+            values[f"neural.{name}"] = value
+        if ignore_unknown:
+            values = {k: v for k, v in values.items() if k in self.field_index}
+        self.append_row(None if timestamp is None else _timestamp(timestamp), values)
+
+    def append_row(self, timestamp: Optional[float], values: Dict[str, float]):
+        """Append one sample given as a field -> value mapping"""
+        row = array('d', [math.nan] * self.row_width)
+        for name, value in values.items():
+            if name not in self.field_index:
+                raise ValueError(f"Unknown development series field: {name}")
+            row[1 + self.field_index[name]] = float(value)
+
+        with self._locked():
+            # Chunk sizes, the last timestamp and open buckets may be stale
+            # if another process appended since this one last looked
+            if self._tail_changed():
+                self._load_index()
+            if timestamp is None:
+                timestamp = max(time.time(), self.last_timestamp)
+            if timestamp < self.last_timestamp:
+                raise ValueError(
+                    f"Sample at {timestamp} is older than the last sample ({self.last_timestamp})")
+            row[0] = timestamp
+
+            if not self.chunk_rows or self.chunk_rows[-1] >= self.chunk_size:
+                self.chunk_starts.append(timestamp)
+                self.chunk_rows.append(0)
+            with open(self._chunk_file(len(self.chunk_rows) - 1), 'ab') as f:
+                f.write(row.tobytes())
+            self.chunk_rows[-1] += 1
+            self.last_timestamp = timestamp
+
+            self._update_rollups(timestamp, row[1:])
+
+    def _update_rollups(self, timestamp: float, values):
+        for resolution in self.resolutions:
+            bucket_start = math.floor(timestamp / resolution) * resolution
+            bucket = self._open_buckets[resolution]
+            if bucket is not None and bucket.start != bucket_start:
+                with open(self._rollup_file(resolution), 'ab') as f:
+                    f.write(bucket.to_array().tobytes())
+                bucket = None
+            if bucket is None:
+                bucket = _Bucket(bucket_start, len(self.fields))
+                self._open_buckets[resolution] = bucket
+            bucket.add(values)
+
+    # -- reading -------------------------------------------------------
+
+    def _iter_indexed(self, start: float, end: float) -> Iterator[Tuple[int, array]]:
+        """Yield (sample index, raw row) with start <= timestamp < end"""
+        # Equal timestamps may straddle a chunk boundary, so start one chunk early
+        first_chunk = max(0, bisect_left(self.chunk_starts, start) - 1)
+        base = sum(self.chunk_rows[:first_chunk])
+        width = self.row_width
+        for number in range(first_chunk, len(self.chunk_rows)):
+            if self.chunk_starts[number] >= end:
+                break
+            data = self._read_chunk(number)
+            times = data[::width]
+            lo = bisect_left(times, start)
+            hi = bisect_left(times, end)
+            for i in range(lo, hi):
+                yield base + i, data[i * width:(i + 1) * width]
+            base += len(times)
+
+    def _iter_rows(self, start: float, end: float) -> Iterator[array]:
+        """Yield raw rows with start <= timestamp < end"""
+        for _, row in self._iter_indexed(start, end):
+            yield row
+
+    def index_of(self, timestamp) -> int:
+        """Number of samples older than timestamp, i.e. the index of the first one at it"""
+        timestamp = _timestamp(timestamp)
+        number = bisect_left(self.chunk_starts, timestamp) - 1
+        if number < 0:
+            return 0
+        times = self._read_chunk(number)[::self.row_width]
+        return sum(self.chunk_rows[:number]) + bisect_left(times, timestamp)
+
+    def range(self, start=None, end=None, fields: List[str] = None,
+              with_index: bool = False) -> Dict[str, List[float]]:
+        """Return raw samples in [start, end) as columns keyed by field
+
+        with_index adds an "index" column with each sample's position in the series.
+        """
+        start = -math.inf if start is None else _timestamp(start)
+        end = math.inf if end is None else _timestamp(end)
+        fields = fields or self.fields
+        columns = [1 + self.field_index[name] for name in fields]
+
+        result = {"timestamp": []}
+        if with_index:
+            result["index"] = []
+        result.update({name: [] for name in fields})
+        for index, row in self._iter_indexed(start, end):
+            result["timestamp"].append(row[0])
+            if with_index:
+                result["index"].append(index)
+            for name, column in zip(fields, columns):
+                result[name].append(row[column])
+        return result
+
+    def decimate(self, start=None, end=None, max_points: int = 1000,
+                 fields: List[str] = None) -> List[Dict[str, Any]]:
+        """Buckets of consecutive samples in [start, end), at most max_points of them
+
+        Unlike rollups, buckets hold equal sample counts, so bursts of
+        samples keep their detail. Each bucket has the index and timestamp
+        of its first sample and, per field, min/max/mean and the sample
+        indices of the min and max.
+        """
+        start = -math.inf if start is None else _timestamp(start)
+        end = math.inf if end is None else _timestamp(end)
+        fields = fields or self.fields
+        columns = [1 + self.field_index[name] for name in fields]
+        step = max(1, math.ceil(self.count_between(start, end) / max(1, max_points)))
+
+        result = []
+        bucket = None
+        for index, row in self._iter_indexed(start, end):
+            if bucket is None or bucket["count"] == step:
+                bucket = {"index": index, "start": row[0], "count": 0,
+                          "fields": {name: {"min": None, "max": None, "mean": None,
+                                            "min_index": None, "max_index": None,
+                                            "n": 0, "total": 0.0}
+                                     for name in fields}}
+                result.append(bucket)
+            bucket["count"] += 1
+            for name, column in zip(fields, columns):
+                value = row[column]
+                if value != value:  # NaN marks a missing field
+                    continue
+                stat = bucket["fields"][name]
+                if stat["n"] == 0 or value < stat["min"]:
+                    stat["min"], stat["min_index"] = value, index
+                if stat["n"] == 0 or value > stat["max"]:
+                    stat["max"], stat["max_index"] = value, index
+                stat["n"] += 1
+                stat["total"] += value
+        for bucket in result:
+            for stat in bucket["fields"].values():
+                n, total = stat.pop("n"), stat.pop("total")
+                if n:
+                    stat["mean"] = total / n
+        return result
+
+    def rollup(self, resolution: int, start=None, end=None) -> List[Dict[str, Any]]:
+        """Return rollup buckets of a resolution overlapping [start, end)"""
+        if resolution not in self._open_buckets:
+            raise ValueError(f"No rollup at resolution {resolution}; have {self.resolutions}")
+        start = -math.inf if start is None else _timestamp(start)
+        end = math.inf if end is None else _timestamp(end)
+
+        rows = array('d')
+        rollup_file = self._rollup_file(resolution)
+        if rollup_file.exists():
+            raw = rollup_file.read_bytes()
+            rows.frombytes(raw[:len(raw) - len(raw) % (self.rollup_width * ITEM_SIZE)])
+        width = self.rollup_width
+        starts = rows[::width]
+        lo = max(0, bisect_right(starts, start - resolution))
+        hi = bisect_left(starts, end)
+
+        buckets = [rows[i * width:(i + 1) * width] for i in range(lo, hi)]
+        open_bucket = self._open_buckets[resolution]
+        if open_bucket is not None and start < open_bucket.start + resolution \
+                and open_bucket.start < end:
+            buckets.append(open_bucket.to_array())
+
+        result = []
+        index = None
+        for row in buckets:
+            if row[0] + resolution <= start:
+                continue
+            if index is None:
+                index = self.index_of(row[0])
+            stats = {}
+            for i, name in enumerate(self.fields):
+                n, low, high, total = row[2 + 4 * i:6 + 4 * i]
+                stats[name] = {
+                    "min": low if n else None,
+                    "max": high if n else None,
+                    "mean": total / n if n else None
+                }
+            result.append({"start": row[0], "index": index, "count": int(row[1]),
+                           "fields": stats})
+            index += int(row[1])
+        return result
+
+    def query(self, start=None, end=None, max_points: int = 1000) -> Dict[str, Any]:
+        """Return at most max_points raw samples or buckets for [start, end)
+
+        Raw samples (with their indices) when they fit, else the finest
+        rollup that fits, unless that rollup is so coarse that a burst of
+        samples (a training run appends a day's samples milliseconds
+        apart) would collapse into a few points; then the samples are
+        decimated by count ("resolution": "samples").
+        """
+        start_ts = -math.inf if start is None else _timestamp(start)
+        end_ts = math.inf if end is None else _timestamp(end)
+        lo_ts = max(start_ts, self.chunk_starts[0]) if self.chunk_starts else 0.0
+        hi_ts = min(end_ts, self.last_timestamp)
+        span = max(hi_ts - lo_ts, 0.0)
+
+        count = self.count_between(start_ts, end_ts)
+        if count <= max_points:
+            return {"resolution": None, "samples": self.range(start, end, with_index=True)}
+        resolution = next((r for r in self.resolutions if span / r <= max_points),
+                          self.resolutions[-1])
+        if span / resolution < max_points // ROLLUP_MIN_FILL and count <= MAX_DECIMATE_SAMPLES:
+            return {"resolution": "samples", "buckets": self.decimate(start, end, max_points)}
+        return {"resolution": resolution, "buckets": self.rollup(resolution, start, end)}
+
+    def count_between(self, start: float, end: float) -> int:
+        """Upper bound on the number of raw samples in [start, end)"""
+        lo = max(0, bisect_right(self.chunk_starts, start) - 1)
+        hi = bisect_left(self.chunk_starts, end)
+        return sum(self.chunk_rows[lo:hi])
+
+    def __len__(self):
+        return sum(self.chunk_rows)
+
+    def latest(self) -> Optional[Dict[str, float]]:
+        """Return the most recent sample"""
+        if not self.chunk_rows:
+            return None
+        row = self._read_chunk(len(self.chunk_rows) - 1)[-self.row_width:]
+        sample = {"timestamp": row[0]}
+        sample.update({name: row[1 + i] for i, name in enumerate(self.fields)})
+        return sample
+
+    # -- legacy logs ---------------------------------------------------
+
+    @classmethod
+    def import_legacy_log(cls, log_file, directory=None, **kwargs):
+        """Convert a whole-blob development_logs/{id}.json into a series"""
+        log_file = Path(log_file)
+        data = record_io.read(log_file)
+        neural_types = list(data.get("neural_connections", {}))
+        fields = ["stage"] + [f"neural.{name}" for name in neural_types]
+        store = cls(directory or log_file.with_suffix(""), fields, **kwargs)
+
+        history = data.get("development_history", [])
+        for i, entry in enumerate(history):
+            timestamp = entry.get("timestamp", entry.get("time", i))
+            store.append(timestamp, entry.get("stage"),
+                         {k: v for k, v in entry.get("neural_connections", {}).items()
+                          if k in neural_types})
+        if history and data.get("neural_connections") and \
+                not history[-1].get("neural_connections"):
+            # The blob only kept current connection counts; attach them to
+            # the latest sample so they survive the conversion
+            store.append(store.last_timestamp, None, data["neural_connections"])
+        return store
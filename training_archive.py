@@ -0,0 +1,418 @@
+# training_archive.py
+"""Compaction of training logs into per-embryo history
+
+train_embryo writes training_logs/training_{embryo}_{program}.json and
+overwrites it on every re-run. The compaction job folds each new or
+changed log into its embryo's archive and removes the source:
+
+    training_archive/{embryo_id}/
+        index.json          segments, compacted sources and rollups
+        runs_000000.jsonl   one run per line, append-only until expired
+
+A run keeps its summary (initial and final metrics, improvement) for
+good. Its raw experience rows and daily performance history are dropped
+once the run is older than the retention window, which bounds disk use
+for active embryos. Before that, they are folded into daily and
+per-program rollups, which answer historical queries without reading
+any run:
+
+    archive = TrainingArchive()
+    archive.compact()
+    archive.program_summary("ab12cd34", "basic_cognition")
+    archive.daily("ab12cd34", start="2026-01-01")
+
+Command line:
+
+    python training_archive.py compact --retention-days 7
+    python training_archive.py summary ab12cd34 [--program basic_cognition]
+    python training_archive.py daily ab12cd34 [--start 2026-01-01] [--end 2026-02-01]
+    python training_archive.py runs ab12cd34 [--program basic_cognition] [--raw]
+
+Run one compaction job at a time. A source log is removed only after
+the index recording its run has been saved, and runs appended by a job
+that stopped before saving its index are discarded by the next one, so
+an interrupted compaction can simply be run again.
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Any, Iterator, Tuple
+
+import record_io
+
+RETENTION_DAYS = float(os.environ.get("EMBRYO_TRAINING_RETENTION_DAYS", 7))
+SEGMENT_BYTES = 1024 * 1024
+RAW_FIELDS = ("training_log", "performance_history")
+
+
+def _stat(stats: Dict[str, list], name: str, value: float):
+    """Fold a value into [count, min, max, sum] (the timeseries rollup layout)"""
+    stat = stats.get(name)
+    if stat is None:
+        stats[name] = [1, value, value, value]
+        return
+    stat[0] += 1
+    stat[1] = min(stat[1], value)
+    stat[2] = max(stat[2], value)
+    stat[3] += value
+
+
+def _summarize(stats: Dict[str, list]) -> Dict[str, Dict[str, float]]:
+    return {name: {"count": n, "min": low, "max": high, "mean": total / n}
+            for name, (n, low, high, total) in stats.items()}
+
+
+def _merge(into: Dict[str, list], stats: Dict[str, list]):
+    for name, (n, low, high, total) in stats.items():
+        stat = into.get(name)
+        if stat is None:
+            into[name] = [n, low, high, total]
+        else:
+            stat[0] += n
+            stat[1] = min(stat[1], low)
+            stat[2] = max(stat[2], high)
+            stat[3] += total
+
+
+def _completed(record: Dict[str, Any], log_file: Path) -> datetime:
+    """When a run finished: its last experience, else the log's modification time"""
+    rows = record.get("training_log")
+    if rows and rows[-1].get("timestamp"):
+        return datetime.fromisoformat(rows[-1]["timestamp"])
+    return datetime.fromtimestamp(log_file.stat().st_mtime)
+
+
+def _check_embryo_id(embryo_id):
+    """Embryo IDs name archive directories, so they must not be paths"""
+    if not isinstance(embryo_id, str) or embryo_id in ("", ".") \
+            or any(part in embryo_id for part in ("/", "\\", "..")):
+        raise ValueError(f"Invalid embryo ID: {embryo_id!r}")
+
+
+def _date(value) -> str:
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    return str(value)[:10]
+
+
+class TrainingArchive:
+    """Per-embryo segments and rollups built from training logs"""
+
+    def __init__(self, archive_dir="training_archive", log_dir="training_logs",
+                 retention_days: float = None):
+        self.archive_dir = Path(archive_dir)
+        self.log_dir = Path(log_dir)
+        self.retention = timedelta(days=RETENTION_DAYS if retention_days is None
+                                   else retention_days)
+
+    # -- index ---------------------------------------------------------
+
+    def _embryo_dir(self, embryo_id: str) -> Path:
+        _check_embryo_id(embryo_id)
+        return self.archive_dir / embryo_id
+
+    def _load_index(self, embryo_id: str) -> Dict[str, Any]:
+        index_file = self._embryo_dir(embryo_id) / "index.json"
+        if index_file.exists():
+            return record_io.read(index_file)
+        return {
+            "embryo_id": embryo_id,
+            "segments": [],
+            "sources": {},
+            "programs": {},
+            "daily": {}
+        }
+
+    def _save_index(self, index: Dict[str, Any]):
+        record_io.write(self._embryo_dir(index["embryo_id"]) / "index.json", index, "json")
+
+    def embryos(self) -> List[str]:
+        if not self.archive_dir.exists():
+            return []
+        return sorted(d.name for d in self.archive_dir.iterdir()
+                      if (d / "index.json").exists())
+
+    # -- compaction ----------------------------------------------------
+
+    def compact(self, now: datetime = None, remove_sources: bool = True) -> Dict[str, int]:
+        """Fold new training logs into the archive and expire old raw rows"""
+        now = now or datetime.now()
+        stats = {"logs": 0, "runs": 0, "removed_sources": 0, "expired_runs": 0,
+                 "source_bytes": 0}
+        indexes: Dict[str, Dict[str, Any]] = {}
+        # (log file, embryo ID, stamp) to remove once the indexes are saved
+        sources: List[Tuple[Path, str, list]] = []
+
+        for log_file in sorted(record_io.glob(self.log_dir, "training_*")):
+            try:
+                stat = log_file.stat()
+                record = record_io.read(log_file)
+                embryo_id = record.get("embryo_id") or log_file.stem.split("_")[1]
+                _check_embryo_id(embryo_id)
+            except (OSError, ValueError) as e:
+                print(f"Warning: skipping {log_file}: {e}")
+                continue
+            index = indexes.get(embryo_id)
+            if index is None:
+                index = indexes[embryo_id] = self._load_index(embryo_id)
+            stamp = [stat.st_mtime_ns, stat.st_size]
+            if index["sources"].get(log_file.name) != stamp:
+                self._add_run(index, record, _completed(record, log_file))
+                index["sources"][log_file.name] = stamp
+                stats["runs"] += 1
+            stats["logs"] += 1
+            stats["source_bytes"] += stat.st_size
+            if remove_sources:
+                sources.append((log_file, embryo_id, stamp))
+
+        for embryo_id in self.embryos():
+            if embryo_id not in indexes:
+                indexes[embryo_id] = self._load_index(embryo_id)
+        cutoff = now - self.retention
+        for index in indexes.values():
+            stats["expired_runs"] += self._expire(index, cutoff)
+            self._save_index(index)
+
+        # The runs are on disk now; a crash from here on only leaves sources behind
+        changed = set()
+        for log_file, embryo_id, stamp in sources:
+            try:
+                current = log_file.stat()
+            except FileNotFoundError:
+                continue
+            # A re-run may have rewritten the log since it was read
+            if [current.st_mtime_ns, current.st_size] == stamp:
+                log_file.unlink()
+                del indexes[embryo_id]["sources"][log_file.name]
+                changed.add(embryo_id)
+                stats["removed_sources"] += 1
+        for embryo_id in changed:
+            self._save_index(indexes[embryo_id])
+        return stats
+
+    def _add_run(self, index: Dict[str, Any], record: Dict[str, Any], completed: datetime):
+        program = record.get("program")
+        run = {
+            "program": program,
+            "completed": completed.isoformat(),
+            "initial_metrics": record.get("initial_metrics", {}),
+            "final_metrics": record.get("final_metrics", {}),
+            "improvement": record.get("improvement", {}),
+            **{field: record.get(field, []) for field in RAW_FIELDS}
+        }
+        self._rollup(index, run)
+
+        line = record_io.dumps(run, "compact") + b"\n"
+        segments = index["segments"]
+        if not segments or segments[-1]["bytes"] + len(line) > SEGMENT_BYTES:
+            segments.append({"file": f"runs_{len(segments):06d}.jsonl", "runs": 0,
+                             "bytes": 0, "oldest_raw": None})
+        segment = segments[-1]
+        embryo_dir = self._embryo_dir(index["embryo_id"])
+        embryo_dir.mkdir(parents=True, exist_ok=True)
+        with open(embryo_dir / segment["file"], "ab") as f:
+            if f.tell() > segment["bytes"]:
+                # Runs appended by a compaction that stopped before saving the index
+                f.truncate(segment["bytes"])
+            f.write(line)
+        segment["runs"] += 1
+        segment["bytes"] += len(line)
+        if segment["oldest_raw"] is None or run["completed"] < segment["oldest_raw"]:
+            segment["oldest_raw"] = run["completed"]
+
+    def _rollup(self, index: Dict[str, Any], run: Dict[str, Any]):
+        """Program-level and daily rollups of one run"""
+        program = run["program"]
+        history = run["performance_history"]
+        summary = index["programs"].setdefault(program, {
+            "runs": 0, "days": 0, "first": run["completed"], "last": run["completed"],
+            "improvement": {}, "final_metrics": {}
+        })
+        summary["runs"] += 1
+        summary["days"] += len(history)
+        summary["first"] = min(summary["first"], run["completed"])
+        summary["last"] = max(summary["last"], run["completed"])
+        for metric, value in run["improvement"].items():
+            _stat(summary["improvement"], metric, value)
+        for metric, value in run["final_metrics"].items():
+            _stat(summary["final_metrics"], metric, value)
+
+        day = index["daily"].setdefault(_date(run["completed"]), {}).setdefault(program, {
+            "runs": 0, "days": 0, "experiences": 0, "performance": {},
+            "metrics": {}, "improvement": {}
+        })
+        day["runs"] += 1
+        day["days"] += len(history)
+        for entry in history:
+            for experience in entry.get("experiences", []):
+                day["experiences"] += 1
+                _stat(day["performance"], experience["type"], experience["performance"])
+            for metric, value in entry.get("metrics", {}).items():
+                _stat(day["metrics"], metric, value)
+        for metric, value in run["improvement"].items():
+            _stat(day["improvement"], metric, value)
+
+    def _expire(self, index: Dict[str, Any], cutoff: datetime) -> int:
+        """Strip raw rows from runs completed before the cutoff"""
+        cutoff = cutoff.isoformat()
+        embryo_dir = self._embryo_dir(index["embryo_id"])
+        expired = 0
+        for segment in index["segments"]:
+            if segment["oldest_raw"] is None or segment["oldest_raw"] >= cutoff:
+                continue
+            segment_file = embryo_dir / segment["file"]
+            lines, oldest_raw = [], None
+            for run in self._read_segment(segment_file, segment["bytes"]):
+                if run["completed"] < cutoff and any(run.get(f) for f in RAW_FIELDS):
+                    for field in RAW_FIELDS:
+                        run.pop(field, None)
+                    expired += 1
+                elif any(run.get(f) for f in RAW_FIELDS):
+                    oldest_raw = min(oldest_raw or run["completed"], run["completed"])
+                lines.append(record_io.dumps(run, "compact") + b"\n")
+            data = b"".join(lines)
+            temp = segment_file.with_name(f".{segment_file.name}.tmp")
+            temp.write_bytes(data)
+            os.replace(temp, segment_file)
+            segment["bytes"] = len(data)
+            segment["oldest_raw"] = oldest_raw
+        return expired
+
+    @staticmethod
+    def _read_segment(segment_file: Path, size: int) -> Iterator[Dict[str, Any]]:
+        """Runs in the first size bytes of a segment, the part its index knows about"""
+        with open(segment_file, "rb") as f:
+            data = f.read(size)
+        for line in data.splitlines():
+            if line.strip():
+                yield record_io.loads(line)
+
+    # -- queries -------------------------------------------------------
+
+    def runs(self, embryo_id: str, program: str = None, start=None, end=None,
+             include_raw: bool = False) -> Iterator[Dict[str, Any]]:
+        """Archived runs, oldest first, optionally limited to a program and [start, end)"""
+        index = self._load_index(embryo_id)
+        start = start.isoformat() if isinstance(start, datetime) else start
+        end = end.isoformat() if isinstance(end, datetime) else end
+        embryo_dir = self._embryo_dir(embryo_id)
+        for segment in index["segments"]:
+            for run in self._read_segment(embryo_dir / segment["file"], segment["bytes"]):
+                if program is not None and run["program"] != program:
+                    continue
+                if start is not None and run["completed"] < start:
+                    continue
+                if end is not None and run["completed"] >= end:
+                    continue
+                if not include_raw:
+                    for field in RAW_FIELDS:
+                        run.pop(field, None)
+                yield run
+
+    def program_summary(self, embryo_id: str, program: str = None) -> Dict[str, Any]:
+        """Run counts and improvement/final metric statistics per program"""
+        programs = self._load_index(embryo_id)["programs"]
+        if program is not None:
+            programs = {program: programs[program]} if program in programs else {}
+        return {
+            name: {
+                "runs": summary["runs"],
+                "days": summary["days"],
+                "first": summary["first"],
+                "last": summary["last"],
+                "improvement": _summarize(summary["improvement"]),
+                "final_metrics": _summarize(summary["final_metrics"])
+            }
+            for name, summary in programs.items()
+        }
+
+    def daily(self, embryo_id: str, start=None, end=None,
+              program: str = None) -> List[Dict[str, Any]]:
+        """Daily rollups in [start, end), merged over programs unless one is given"""
+        start = _date(start) if start is not None else None
+        end = _date(end) if end is not None else None
+        result = []
+        for date, programs in sorted(self._load_index(embryo_id)["daily"].items()):
+            if (start is not None and date < start) or (end is not None and date >= end):
+                continue
+            if program is not None:
+                programs = {program: programs[program]} if program in programs else {}
+            if not programs:
+                continue
+            merged = {"runs": 0, "days": 0, "experiences": 0, "performance": {},
+                      "metrics": {}, "improvement": {}}
+            for day in programs.values():
+                for key in ("runs", "days", "experiences"):
+                    merged[key] += day[key]
+                for key in ("performance", "metrics", "improvement"):
+                    _merge(merged[key], day[key])
+            result.append({
+                "date": date,
+                "programs": sorted(programs),
+                "runs": merged["runs"],
+                "days": merged["days"],
+                "experiences": merged["experiences"],
+                "performance": _summarize(merged["performance"]),
+                "metrics": _summarize(merged["metrics"]),
+                "improvement": _summarize(merged["improvement"])
+            })
+        return result
+
+    def disk_usage(self, embryo_id: str = None) -> int:
+        embryo_ids = [embryo_id] if embryo_id else self.embryos()
+        return sum(f.stat().st_size for e in embryo_ids if self._embryo_dir(e).exists()
+                   for f in self._embryo_dir(e).iterdir() if f.is_file())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compact and query training logs")
+    parser.add_argument("--archive-dir", default="training_archive")
+    parser.add_argument("--log-dir", default="training_logs")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    compact = commands.add_parser("compact", help="fold new training logs into the archive")
+    compact.add_argument("--retention-days", type=float,
+                         help=f"keep raw rows this long (default {RETENTION_DAYS:g})")
+    compact.add_argument("--keep-sources", action="store_true",
+                         help="leave training logs in place after compacting them")
+
+    summary = commands.add_parser("summary", help="per-program rollups of an embryo")
+    summary.add_argument("embryo_id")
+    summary.add_argument("--program")
+
+    daily = commands.add_parser("daily", help="daily rollups of an embryo")
+    daily.add_argument("embryo_id")
+    daily.add_argument("--program")
+    daily.add_argument("--start", help="first date, YYYY-MM-DD")
+    daily.add_argument("--end", help="date after the last one, YYYY-MM-DD")
+
+    runs = commands.add_parser("runs", help="archived runs of an embryo as JSON lines")
+    runs.add_argument("embryo_id")
+    runs.add_argument("--program")
+    runs.add_argument("--raw", action="store_true", help="include unexpired raw rows")
+    args = parser.parse_args(argv)
+
+    archive = TrainingArchive(args.archive_dir, args.log_dir,
+                              getattr(args, "retention_days", None))
+    if args.command == "compact":
+        before = archive.disk_usage()
+        stats = archive.compact(remove_sources=not args.keep_sources)
+        stats["archive_bytes"] = archive.disk_usage()
+        stats["archive_growth"] = stats["archive_bytes"] - before
+        print(json.dumps(stats, indent=2))
+    elif args.command == "summary":
+        print(json.dumps(archive.program_summary(args.embryo_id, args.program), indent=2))
+    elif args.command == "daily":
+        print(json.dumps(archive.daily(args.embryo_id, args.start, args.end, args.program),
+                         indent=2))
+    else:
+        for run in archive.runs(args.embryo_id, args.program, include_raw=args.raw):
+            print(record_io.dumps(run, "compact").decode())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+# training_plans.py
+"""Compiled training programs and curricula
+
+EmbryoSchool.training_programs is a nested dict meant for editing. A
+training loop only needs a fixed sequence of experiences, so each program
+is compiled once into an immutable plan: the experience steps, the base
+complexity vector as a read-only array (each day's jitter is applied to
+it in one step), the duration and the focus metrics. A plan keeps a
+private copy of its definition, so the school's cache
+(EmbryoSchool.compiled_program) notices programs edited in place and
+every training engine runs from current plans.
+
+Programs and curriculum paths can also come from config files, JSON or
+(with PyYAML installed) YAML:
+
+    {
+      "programs": {
+        "memory_drills": {
+          "experiences": [{"type": "memory", "complexity": 0.4, "data": "recall"}],
+          "duration": 4,
+          "required_stage": 1,
+          "metrics": ["memory_capacity"]
+        }
+      },
+      "curriculum_paths": {"memory_focus": ["basic_cognition", "memory_drills"]}
+    }
+"""
+import copy
+import os
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, List, Any, Sequence, Tuple
+
+import numpy as np
+
+import record_io
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+REQUIRED_FIELDS = ("experiences", "duration", "required_stage", "metrics")
+
+
+def _frozen(values, dtype) -> np.ndarray:
+    array = np.array(values, dtype=dtype)
+    array.setflags(write=False)
+    return array
+
+
+class CompiledProgram:
+    """Immutable, array-backed form of one training program"""
+
+    __slots__ = ("name", "duration", "required_stage", "metric_threshold", "metrics",
+                 "experience_types", "complexity", "steps", "source")
+
+    def __init__(self, name: str, details: Dict[str, Any]):
+        validate_program(name, details)
+        # Later edits to the definition must not leak into the plan
+        details = copy.deepcopy(details)
+        experiences = details["experiences"]
+        setattr_ = object.__setattr__
+        setattr_(self, "name", name)
+        setattr_(self, "source", details)
+        setattr_(self, "duration", int(details["duration"]))
+        setattr_(self, "required_stage", details["required_stage"])
+        # Threshold each focus metric must reach (see _assess_program_readiness)
+        setattr_(self, "metric_threshold", 100 * (details["required_stage"] / 10))
+        setattr_(self, "metrics", tuple(details["metrics"]))
+        setattr_(self, "experience_types", tuple(e["type"] for e in experiences))
+        setattr_(self, "complexity", _frozen([e["complexity"] for e in experiences],
+                                             np.float64))
+        # (type, other fields) for building each day's experiences
+        setattr_(self, "steps", tuple(
+            (e["type"],
+             MappingProxyType({k: v for k, v in e.items() if k not in ("type", "complexity")}))
+            for e in experiences
+        ))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Compiled programs are immutable")
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+    def matches(self, details: Dict[str, Any]) -> bool:
+        """True if the plan was compiled from a definition equal to details"""
+        return details == self.source
+
+    def day_complexities(self, jitter: Sequence[float]) -> List[float]:
+        """Complexity of each experience for one day, scaled by its jitter factor"""
+        return (self.complexity * jitter).tolist()
+
+    def __reduce__(self):
+        return (CompiledProgram, (self.name, self.source))
+
+    def __repr__(self) -> str:
+        return (f"CompiledProgram({self.name!r}, experiences={len(self)}, "
+                f"duration={self.duration}, required_stage={self.required_stage})")
+
+
+class CompiledCurriculum:
+    """Ordered programs of a curriculum path with their combined duration"""
+
+    __slots__ = ("name", "programs", "duration")
+
+    def __init__(self, name: str, programs: Sequence[CompiledProgram]):
+        object.__setattr__(self, "name", name)
+        object.__setattr__(self, "programs", tuple(programs))
+        object.__setattr__(self, "duration", sum(p.duration for p in self.programs))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Compiled curricula are immutable")
+
+    @property
+    def program_names(self) -> Tuple[str, ...]:
+        return tuple(p.name for p in self.programs)
+
+    def __repr__(self) -> str:
+        return f"CompiledCurriculum({self.name!r}, programs={list(self.program_names)})"
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def validate_program(name: str, details: Dict[str, Any]):
+    """Raise ValueError if a program definition cannot be compiled"""
+    if not isinstance(details, dict):
+        raise ValueError(f"Training program {name} must be a mapping")
+    missing = [field for field in REQUIRED_FIELDS if field not in details]
+    if missing:
+        raise ValueError(f"Training program {name} is missing {', '.join(missing)}")
+    experiences = details["experiences"]
+    if not isinstance(experiences, (list, tuple)) or not experiences:
+        raise ValueError(f"Training program {name} has no experiences")
+    for experience in experiences:
+        if not isinstance(experience, dict) or "type" not in experience \
+                or "complexity" not in experience:
+            raise ValueError(f"Training program {name} has an experience without "
+                             f"type or complexity")
+        if not isinstance(experience["type"], str):
+            raise ValueError(f"Training program {name} has a non-string experience type")
+        if not _is_number(experience["complexity"]):
+            raise ValueError(f"Training program {name} has a non-numeric complexity: "
+                             f"{experience['complexity']!r}")
+    duration = details["duration"]
+    if not _is_number(duration) or duration != int(duration):
+        raise ValueError(f"Training program {name} needs a whole number of days, "
+                         f"got {duration!r}")
+    if duration < 1:
+        raise ValueError(f"Training program {name} must last at least one day")
+    if not _is_number(details["required_stage"]):
+        raise ValueError(f"Training program {name} has a non-numeric required_stage")
+    metrics = details["metrics"]
+    if not isinstance(metrics, (list, tuple)) or not all(isinstance(m, str) for m in metrics):
+        raise ValueError(f"Training program {name} metrics must be a list of names")
+
+
+def load_config(path) -> Dict[str, Any]:
+    """Read a program config file into {"programs": ..., "curriculum_paths": ...}"""
+    path = Path(path)
+    if path.suffix in (".yaml", ".yml"):
+        if yaml is None:
+            raise ValueError(f"PyYAML is required to load {path}")
+        config = yaml.safe_load(path.read_text()) or {}
+    else:
+        config = record_io.read(path)
+    unknown = set(config) - {"programs", "curriculum_paths"}
+    if unknown:
+        raise ValueError(f"Unknown section in {path}: {sorted(unknown)[0]}")
+    programs = config.get("programs", {})
+    for name, details in programs.items():
+        validate_program(name, details)
+    return {"programs": programs, "curriculum_paths": config.get("curriculum_paths", {})}
+
+
+def config_paths(value: str) -> List[Path]:
+    """Config files named in an os.pathsep-separated list; directories add their files"""
+    paths = []
+    for entry in filter(None, value.split(os.pathsep)):
+        entry = Path(entry)
+        if entry.is_dir():
+            paths += sorted(p for p in entry.iterdir()
+                            if p.suffix in (".json", ".yaml", ".yml"))
+        else:
+            paths.append(entry)
+    return paths
@@ -0,0 +1,197 @@
+# training_simulator.py
+"""Monte Carlo training outcomes without touching real embryos
+
+Each trial clones the embryo's state, runs a program or a whole
+curriculum plan on the clone with its own random generator and reports
+the final metrics. Nothing is written to disk, and neither the real
+embryo nor the global random state is touched:
+
+    simulator = TrainingSimulator(workers=8)
+    result = simulator.simulate(embryo, ["basic_cognition", "advanced_patterns"],
+                                trials=500, seed=1, embryo_file="embryos/embryo_ab12.py")
+    result["improvement"]["overall_score"]["p50"]
+
+Worker processes rebuild the embryo from its file plus a copy of its
+current attributes; embryos whose class is importable (for example the
+benchmark SyntheticEmbryo) are pickled instead. Without either the
+trials run in this process. A seed reproduces the school's draws;
+embryos that draw from the global random module themselves are not
+reproduced by it.
+"""
+import copy
+import multiprocessing
+import pickle
+import random
+from typing import Dict, List, Any, Optional, Sequence, Union
+
+import numpy as np
+
+import embryo_services
+import status_tracking
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+_worker_school = None
+
+
+def _init_worker():
+    global _worker_school
+    _worker_school = embryo_services.school_module().EmbryoSchool()
+
+
+def _restore_embryo(payload):
+    kind, data = payload[0], payload[1:]
+    if kind == "pickle":
+        return pickle.loads(data[0])
+    embryo_file, state = data
+    embryo = _worker_school.load_embryo(embryo_file)
+    embryo.__dict__.update(pickle.loads(state))
+    status_tracking.track(embryo)
+    return embryo
+
+
+def _run_trial(school, embryo, plan: List[str], trial_seed: int) -> Dict[str, Any]:
+    """One trial on an embryo the caller owns"""
+    rng = random.Random(trial_seed)
+    initial_metrics = school.performance_metrics(embryo)
+    programs = {}
+    for program_name in plan:
+        outcome = school._run_program(embryo, program_name, keep_log=False, rng=rng)
+        programs[program_name] = outcome["improvement"]["overall_score"]
+    final_metrics = school.performance_metrics(embryo)
+    return {
+        "final_metrics": final_metrics,
+        "improvement": {metric: final_metrics[metric] - initial_metrics[metric]
+                        for metric in initial_metrics},
+        "final_stage": school.cached_status(embryo)["development_stage"],
+        "program_improvement": programs
+    }
+
+
+def _run_trials(payload, programs: Dict[str, Any], plan: List[str],
+                seeds: List[int]) -> List[Dict[str, Any]]:
+    """Worker task: run a chunk of trials, each on a fresh clone"""
+    for name, details in programs.items():
+        # Programs edited in the parent since the worker started are
+        # replaced; compiled_program recompiles them on first use
+        if _worker_school.training_programs.get(name) != details:
+            _worker_school.training_programs[name] = details
+    base = _restore_embryo(payload)
+    return [_run_trial(_worker_school, copy.deepcopy(base), plan, seed) for seed in seeds]
+
+
+def distribution(values: Sequence[float]) -> Dict[str, float]:
+    """Mean, spread and percentiles of a sample"""
+    values = np.asarray(values, dtype=float)
+    summary = {"mean": float(values.mean()), "std": float(values.std()),
+               "min": float(values.min()), "max": float(values.max())}
+    for p, value in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+        summary[f"p{p}"] = float(value)
+    return summary
+
+
+class TrainingSimulator:
+    """Run randomized training trials on clones of an embryo"""
+
+    def __init__(self, school=None, workers: int = 1):
+        self.school = school or embryo_services.school_module().EmbryoSchool()
+        self.workers = workers
+        self._pool = None
+
+    def _worker_pool(self):
+        if self._pool is None:
+            self._pool = multiprocessing.Pool(self.workers, initializer=_init_worker)
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def _payload(self, embryo, embryo_file) -> Optional[tuple]:
+        """How a worker process can rebuild the embryo, if it can at all"""
+        if embryo_file is not None:
+            return ("file", str(embryo_file),
+                    pickle.dumps(status_tracking.copyable_state(embryo)))
+        try:
+            return ("pickle", pickle.dumps(embryo))
+        except (pickle.PicklingError, AttributeError, TypeError):
+            return None
+
+    def _in_process(self, embryo, plan: List[str], seeds: List[int]) -> List[Dict[str, Any]]:
+        # _run_program writes nothing, so the shared school is used as is
+        return [_run_trial(self.school, copy.deepcopy(embryo), plan, seed) for seed in seeds]
+
+    def run_trials(self, embryo, plan: Union[str, List[str]], trials: int = 100,
+                   seed: int = None, embryo_file=None) -> List[Dict[str, Any]]:
+        """Raw per-trial outcomes of a program or a list of programs"""
+        if trials < 1:
+            raise ValueError("trials must be at least 1")
+        plan = [plan] if isinstance(plan, str) else list(plan)
+        # Compiling up front rejects unknown or malformed programs before any trial
+        compiled = {name: self.school.compiled_program(name) for name in plan}
+        rng = random.Random(seed)
+        seeds = [rng.getrandbits(64) for _ in range(trials)]
+
+        payload = self._payload(embryo, embryo_file) if self.workers > 1 else None
+        if payload is None:
+            return self._in_process(embryo, plan, seeds)
+
+        programs = {name: program.source for name, program in compiled.items()}
+        size = max(1, -(-trials // (self.workers * 4)))
+        chunks = [seeds[i:i + size] for i in range(0, trials, size)]
+        pool = self._worker_pool()
+        pending = [pool.apply_async(_run_trials, (payload, programs, plan, chunk))
+                   for chunk in chunks]
+        return [outcome for result in pending for outcome in result.get()]
+
+    def simulate(self, embryo, plan: Union[str, List[str]], trials: int = 100,
+                 seed: int = None, embryo_file=None) -> Dict[str, Any]:
+        """Distributions of final metrics and improvement over many trials"""
+        outcomes = self.run_trials(embryo, plan, trials, seed, embryo_file)
+        metrics = list(outcomes[0]["final_metrics"]) if outcomes else []
+        program_names = [plan] if isinstance(plan, str) else list(plan)
+        return {
+            "embryo_id": embryo.embryo_id,
+            "plan": program_names,
+            "trials": len(outcomes),
+            "seed": seed,
+            "final_metrics": {m: distribution([o["final_metrics"][m] for o in outcomes])
+                              for m in metrics},
+            "improvement": {m: distribution([o["improvement"][m] for o in outcomes])
+                            for m in metrics},
+            "final_stage": distribution([o["final_stage"] for o in outcomes]),
+            "program_improvement": {
+                name: distribution([o["program_improvement"][name] for o in outcomes])
+                for name in dict.fromkeys(program_names)
+            }
+        }
+
+    def simulate_curriculum(self, embryo, trials: int = 100, seed: int = None,
+                            embryo_file=None) -> Dict[str, Any]:
+        """Simulate the plan create_curriculum recommends for the embryo"""
+        curriculum = self.school.create_curriculum(embryo)
+        result = self.simulate(embryo, curriculum["recommended_curriculum"], trials, seed,
+                               embryo_file)
+        result["estimated_duration"] = curriculum["estimated_duration"]
+        return result
+
+    def compare(self, embryo, plans: Dict[str, Union[str, List[str]]], trials: int = 100,
+                seed: int = None, embryo_file=None,
+                metric: str = "overall_score") -> List[Dict[str, Any]]:
+        """Simulate several named plans with the same seeds, best median first"""
+        results = []
+        for name, plan in plans.items():
+            result = self.simulate(embryo, plan, trials, seed, embryo_file)
+            result["name"] = name
+            results.append(result)
+        results.sort(key=lambda r: r["improvement"][metric]["p50"], reverse=True)
+        return results